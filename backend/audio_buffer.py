@@ -0,0 +1,89 @@
+"""Audio Buffer - Bounded chunked ring buffer for call audio"""
+import logging
+from typing import List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_SAMPLE = 2  # LINEAR16
+
+def max_call_audio_bytes() -> int:
+    """Bytes of LINEAR16 audio in the longest allowed call"""
+    return settings.MAX_CALL_DURATION * settings.SAMPLE_RATE * BYTES_PER_SAMPLE
+
+class AudioRingBuffer:
+    """Ring of fixed-size chunks addressed by absolute byte offset
+
+    Writing a frame copies it once into the current chunk, so the cost per
+    frame does not depend on how much audio is already buffered. Chunks are
+    allocated lazily, so a short call only holds the audio it received; once
+    ``capacity`` is reached the oldest chunk is reused and its audio dropped.
+    Readers get memoryviews over the chunks instead of copies.
+    """
+
+    def __init__(self, capacity: int = None, chunk_size: int = None):
+        capacity = capacity or max_call_audio_bytes()
+        self.chunk_size = chunk_size or settings.SAMPLE_RATE * BYTES_PER_SAMPLE  # 1 s
+        self.chunk_count = max(1, -(-capacity // self.chunk_size))
+        self.capacity = self.chunk_count * self.chunk_size
+        self._chunks: List[Optional[bytearray]] = [None] * self.chunk_count
+        self.start = 0  # absolute offset of the oldest retained byte
+        self.end = 0  # absolute offset one past the newest byte
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def total_written(self) -> int:
+        return self.end
+
+    def write(self, data) -> int:
+        """Append a frame, overwriting the oldest audio when full"""
+        source = memoryview(data).cast("B")
+        remaining = len(source)
+        if remaining > self.capacity:
+            # Only the newest capacity bytes can be kept anyway
+            skipped = remaining - self.capacity
+            self.end += skipped
+            self.start = max(self.start, self.end)
+            source = source[skipped:]
+            remaining = len(source)
+
+        position = 0
+        while remaining:
+            slot, offset = divmod(self.end % self.capacity, self.chunk_size)
+            chunk = self._chunks[slot]
+            if chunk is None:
+                chunk = self._chunks[slot] = bytearray(self.chunk_size)
+            count = min(remaining, self.chunk_size - offset)
+            chunk[offset:offset + count] = source[position:position + count]
+            position += count
+            remaining -= count
+            self.end += count
+            if self.end - self.start > self.capacity:
+                self.start = self.end - self.capacity
+        return len(source)
+
+    def views(self, start: int = None, end: int = None) -> List[memoryview]:
+        """Zero-copy views of [start, end) split at chunk boundaries
+
+        A view stays valid until the ring wraps around and overwrites it.
+        """
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        segments = []
+        while start < end:
+            slot, offset = divmod(start % self.capacity, self.chunk_size)
+            count = min(end - start, self.chunk_size - offset)
+            segments.append(memoryview(self._chunks[slot])[offset:offset + count])
+            start += count
+        return segments
+
+    def read(self, start: int = None, end: int = None) -> bytes:
+        """Copy [start, end) into a single bytes object"""
+        return b"".join(self.views(start, end))
+
+    def clear(self):
+        """Drop buffered audio but keep the allocated chunks"""
+        self.start = self.end
@@ -0,0 +1,246 @@
+"""Audio Codecs - Call audio format negotiation and vectorized conversion"""
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Codec -> sample rates accepted on the call leg (None = any rate)
+INPUT_CODECS = {
+    "pcm16": None,
+    "mulaw": (8000,),
+    "opus": (8000, 12000, 16000, 24000, 48000),
+}
+OUTPUT_CODECS = {
+    "mp3": None,
+    "pcm16": None,
+    "mulaw": (8000,),
+    "opus": (8000, 12000, 16000, 24000, 48000),
+}
+
+# WAV fmt chunk format tags
+WAV_FORMAT_TAGS = {1: "pcm16", 7: "mulaw"}
+
+# Google encodings for each codec
+STT_ENCODINGS = {"pcm16": "LINEAR16", "mulaw": "MULAW", "opus": "OGG_OPUS"}
+TTS_ENCODINGS = {"mp3": "MP3", "pcm16": "LINEAR16", "mulaw": "MULAW", "opus": "OGG_OPUS"}
+
+class AudioFormatError(ValueError):
+    """Raised when no offered audio format is supported"""
+
+class AudioFormat(NamedTuple):
+    """Codec and sample rate of one direction of a call"""
+    codec: str
+    sample_rate: Optional[int] = None
+
+    def __str__(self) -> str:
+        return self.codec if self.sample_rate is None else f"{self.codec}/{self.sample_rate}"
+
+DEFAULT_INPUT_FORMAT = AudioFormat("pcm16", settings.SAMPLE_RATE)
+DEFAULT_OUTPUT_FORMAT = AudioFormat("mp3")
+
+class CallAudioFormat(NamedTuple):
+    """Negotiated input (caller to server) and output formats for a call"""
+    input: AudioFormat = DEFAULT_INPUT_FORMAT
+    output: AudioFormat = DEFAULT_OUTPUT_FORMAT
+
+    def as_dict(self) -> dict:
+        return {"input": str(self.input), "output": str(self.output)}
+
+def parse_format(spec: str) -> AudioFormat:
+    """Parse 'codec' or 'codec/rate', e.g. 'mulaw/8000'"""
+    codec, _, rate = spec.strip().lower().partition("/")
+    return AudioFormat(codec, int(rate) if rate else None)
+
+def _select(offers: List[str], supported: dict, default_rate: Optional[int]) -> AudioFormat:
+    for spec in offers:
+        try:
+            fmt = parse_format(spec)
+        except ValueError:
+            continue
+        if fmt.codec not in supported:
+            continue
+        rates = supported[fmt.codec]
+        rate = fmt.sample_rate
+        if rate is None:
+            rate = rates[-1] if rates else default_rate
+        if rates is None or rate in rates:
+            return AudioFormat(fmt.codec, rate)
+    raise AudioFormatError(f"None of the offered formats are supported: {offers}")
+
+def negotiate(input_offers: Optional[List[str]] = None, output_offers: Optional[List[str]] = None) -> CallAudioFormat:
+    """Pick the first supported input and output format in the caller's preference order"""
+    input_format = _select(input_offers, INPUT_CODECS, settings.SAMPLE_RATE) if input_offers else DEFAULT_INPUT_FORMAT
+    output_format = _select(output_offers, OUTPUT_CODECS, None) if output_offers else DEFAULT_OUTPUT_FORMAT
+    if output_format.codec == "mp3":
+        output_format = AudioFormat("mp3")
+    return CallAudioFormat(input_format, output_format)
+
+# G.711 mu-law
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+def _build_mulaw_decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = ((mantissa.astype(np.int32) << 3) + MULAW_BIAS) << exponent
+    samples = magnitude - MULAW_BIAS
+    return np.where(sign != 0, -samples, samples).astype(np.int16)
+
+MULAW_DECODE_TABLE = _build_mulaw_decode_table()
+
+def mulaw_decode(data) -> np.ndarray:
+    """Decode mu-law bytes to int16 samples with a table lookup"""
+    return MULAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    """Encode int16 samples as mu-law bytes"""
+    pcm = samples.astype(np.int32)
+    sign = np.where(pcm < 0, 0x80, 0x00)
+    magnitude = np.minimum(np.abs(pcm), MULAW_CLIP) + MULAW_BIAS
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    exponent = np.clip(exponent, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa)).astype(np.uint8).tobytes()
+
+# Resampling
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Resample int16 samples with linear interpolation"""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    if from_rate % to_rate == 0:
+        return decimate(samples, from_rate // to_rate)
+    count = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+def decimate(samples: np.ndarray, factor: int) -> np.ndarray:
+    """Downsample by an integer factor, averaging each group as a low-pass"""
+    usable = len(samples) - len(samples) % factor
+    groups = samples[:usable].reshape(-1, factor).astype(np.int32)
+    return (groups.sum(axis=1) // factor).astype(np.int16)
+
+class StreamResampler:
+    """Linear-interpolation resampler that keeps its phase across frames
+
+    Output sample ``k`` of the stream sits at input position
+    ``k * from_rate / to_rate``, tracked exactly in units of ``1 / to_rate``.
+    The last input sample of each frame is kept so interpolation spans the
+    frame boundary, making chunked output identical to whole-buffer output.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int):
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        # Position of the next output sample in the buffer, times to_rate
+        self._position = 0
+        self._history = np.zeros(0, dtype=np.int16)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next run of int16 samples"""
+        buffer = np.concatenate((self._history, samples)) if len(self._history) else samples
+        if len(buffer) == 0:
+            return np.zeros(0, dtype=np.int16)
+        end = (len(buffer) - 1) * self.to_rate
+        count = max(0, (end - self._position) // self.from_rate + 1)
+        positions = self._position + np.arange(count, dtype=np.int64) * self.from_rate
+        index, weight = np.divmod(positions, self.to_rate)
+        padded = np.append(buffer, buffer[-1]).astype(np.int64)
+        # Integer weights keep the result independent of frame boundaries
+        out = ((padded[index] * (self.to_rate - weight) + padded[index + 1] * weight)
+               // self.to_rate).astype(np.int16)
+        self._position += count * self.from_rate - end
+        self._history = buffer[-1:]
+        return out
+
+def read_wav(audio: bytes) -> Tuple[Optional[AudioFormat], bytes]:
+    """Split a WAV file into its format and mono sample data
+
+    Returns ``(None, audio)`` unchanged when the bytes are not a RIFF/WAVE
+    container. Multi-channel PCM16 is reduced to its first channel.
+    """
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None, audio
+    audio_format = None
+    channels = 1
+    position = 12
+    while position + 8 <= len(audio):
+        chunk_id = audio[position:position + 4]
+        size = int.from_bytes(audio[position + 4:position + 8], "little")
+        body = audio[position + 8:position + 8 + size]
+        if chunk_id == b"fmt " and len(body) >= 16:
+            tag = int.from_bytes(body[0:2], "little")
+            channels = int.from_bytes(body[2:4], "little") or 1
+            rate = int.from_bytes(body[4:8], "little")
+            audio_format = AudioFormat(WAV_FORMAT_TAGS.get(tag, "pcm16"), rate)
+        elif chunk_id == b"data":
+            if channels > 1 and (audio_format is None or audio_format.codec == "pcm16"):
+                samples = np.frombuffer(body[:len(body) - len(body) % (2 * channels)], dtype="<i2")
+                body = samples.reshape(-1, channels)[:, 0].tobytes()
+            return audio_format, body
+        position += 8 + size + (size & 1)
+    return audio_format, b""
+
+def strip_wav_header(audio: bytes) -> bytes:
+    """Drop the RIFF header Google adds to LINEAR16 and MULAW output"""
+    return read_wav(audio)[1]
+
+class InboundConverter:
+    """Converts caller audio frames into the format the pipeline consumes
+
+    PCM16 at or below SAMPLE_RATE passes through untouched. Higher PCM16
+    rates are downsampled to SAMPLE_RATE, statefully across frames, and
+    mu-law is expanded to PCM16, both vectorized per frame. Opus cannot be decoded here, so it is passed
+    through for the recognizer to decode and the pipeline skips VAD.
+    """
+
+    def __init__(self, input_format: AudioFormat = DEFAULT_INPUT_FORMAT):
+        self.input_format = input_format
+        rate = input_format.sample_rate or settings.SAMPLE_RATE
+        if input_format.codec == "pcm16":
+            self.output_rate = min(rate, settings.SAMPLE_RATE)
+        else:
+            self.output_rate = rate
+        self.passthrough = input_format.codec == "opus" or (
+            input_format.codec == "pcm16" and rate == self.output_rate
+        )
+        self.decodes_pcm = input_format.codec != "opus"
+        self._carry = b""
+        self._resampler = None
+        if input_format.codec == "pcm16" and rate % self.output_rate:
+            self._resampler = StreamResampler(rate, self.output_rate)
+
+    @property
+    def stt_format(self) -> AudioFormat:
+        """Format of the audio leaving the converter"""
+        if self.input_format.codec == "opus":
+            return self.input_format
+        return AudioFormat("pcm16", self.output_rate)
+
+    def convert(self, data: bytes):
+        """Convert one frame, returning bytes-like audio"""
+        if self.passthrough:
+            return data
+        if self.input_format.codec == "mulaw":
+            return mulaw_decode(data).tobytes()
+
+        # PCM16 above the pipeline rate: keep odd bytes and partial groups
+        # for the next frame, and the resampler's phase for uneven ratios,
+        # so the stream resamples seamlessly
+        factor = self.input_format.sample_rate / self.output_rate
+        raw = self._carry + bytes(data) if self._carry else data
+        usable = len(raw) - len(raw) % 2
+        samples = np.frombuffer(raw[:usable], dtype="<i2")
+        if factor.is_integer():
+            keep = len(samples) - len(samples) % int(factor)
+            self._carry = bytes(raw[keep * 2:])
+            return decimate(samples[:keep], int(factor)).astype("<i2").tobytes()
+        self._carry = bytes(raw[usable:])
+        return self._resampler.process(samples).astype("<i2").tobytes()
@@ -0,0 +1,273 @@
+"""Batch Transcription - Parallel re-transcription of recorded calls
+
+Usable from the API (POST /transcriptions/batch) or as a CLI:
+
+    python batch_transcription.py recordings/*.wav --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from audio_codecs import AudioFormat, DEFAULT_INPUT_FORMAT, InboundConverter, read_wav
+from models import CallRecord, ConversationTurn
+from vad import VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
+
+class AudioChunk(NamedTuple):
+    """One utterance-sized slice of a recording"""
+    start: float  # seconds from the start of the recording
+    end: float
+    audio: bytes
+
+class ChunkTranscript(NamedTuple):
+    """Transcript of one chunk"""
+    start: float
+    end: float
+    text: str
+    confidence: float
+
+class RecordingResult(NamedTuple):
+    """Transcription outcome for one recording"""
+    call_id: str
+    name: str
+    audio_seconds: float
+    transcripts: List[ChunkTranscript]
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "call_id": self.call_id,
+            "name": self.name,
+            "audio_seconds": self.audio_seconds,
+            "chunks": len(self.transcripts),
+            "turns": sum(1 for t in self.transcripts if t.text),
+            "error": self.error,
+        }
+
+def split_on_silence(
+    pcm: bytes,
+    sample_rate: int,
+    max_chunk_seconds: float = None,
+    min_silence_ms: int = None,
+) -> List[Tuple[int, int]]:
+    """Byte ranges of the utterances in a PCM16 recording
+
+    Boundaries come from the VAD run over the whole recording at once.
+    Utterances longer than ``max_chunk_seconds`` are cut at the quietest
+    frame near the limit so every chunk fits a synchronous recognize call.
+    """
+    max_chunk_seconds = max_chunk_seconds or settings.BATCH_MAX_CHUNK_SECONDS
+    vad = VoiceActivityDetector(
+        sample_rate=sample_rate,
+        hangover_ms=min_silence_ms if min_silence_ms is not None else settings.BATCH_MIN_SILENCE_MS,
+    )
+    ranges = []
+    start = None
+    for event in vad.process(pcm):
+        if event.kind == "start":
+            start = event.offset
+        elif start is not None:
+            ranges.append((start, event.offset))
+            start = None
+    if start is not None:
+        ranges.append((start, len(pcm) - len(pcm) % 2))
+
+    max_bytes = int(max_chunk_seconds * sample_rate) * 2
+    chunks = []
+    for start, end in ranges:
+        while end - start > max_bytes:
+            cut = _quietest_cut(pcm, start + max_bytes // 2, start + max_bytes, vad.frame_bytes)
+            chunks.append((start, cut))
+            start = cut
+        chunks.append((start, end))
+    return chunks
+
+def _quietest_cut(pcm: bytes, low: int, high: int, frame_bytes: int) -> int:
+    """Frame-aligned offset with the lowest energy in [low, high)"""
+    low -= (low % frame_bytes)
+    count = (high - low) // frame_bytes
+    frames = np.frombuffer(pcm, dtype="<i2", count=count * frame_bytes // 2, offset=low)
+    energy = np.abs(frames.reshape(count, -1).astype(np.int32)).sum(axis=1)
+    return low + int(np.argmin(energy)) * frame_bytes
+
+def ogg_duration(data: bytes) -> float:
+    """Length of an Ogg Opus file from the granule position of its last page"""
+    last_page = data.rfind(b"OggS")
+    if last_page < 0 or last_page + 14 > len(data):
+        return 0.0
+    return int.from_bytes(data[last_page + 6:last_page + 14], "little") / 48000
+
+def prepare_recording(
+    data: bytes,
+    audio_format: Optional[AudioFormat] = None,
+) -> Tuple[AudioFormat, List[AudioChunk], float]:
+    """Decode a recording and split it into chunks to transcribe
+
+    Returns the format the chunks are in, the chunks and the audio length
+    in seconds.
+    """
+    wav_format, body = read_wav(data)
+    audio_format = wav_format or audio_format or DEFAULT_INPUT_FORMAT
+    if audio_format.codec == "opus":
+        # Cannot be decoded server-side; send the whole file as one request
+        seconds = ogg_duration(body)
+        return audio_format, [AudioChunk(0.0, seconds, body)], seconds
+
+    converter = InboundConverter(audio_format)
+    pcm = bytes(converter.convert(body))
+    rate = converter.output_rate
+    chunks = [
+        AudioChunk(start / (2 * rate), end / (2 * rate), pcm[start:end])
+        for start, end in split_on_silence(pcm, rate)
+    ]
+    return converter.stt_format, chunks, len(pcm) / (2 * rate)
+
+class BatchTranscriber:
+    """Transcribes many recordings with a bounded pool of concurrent workers
+
+    ``voice_manager`` only needs an async ``transcribe_audio(audio,
+    audio_format)``, so a local fake recognizer can stand in for Google.
+    """
+
+    def __init__(self, voice_manager, concurrency: int = None):
+        self.voice_manager = voice_manager
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+        self.audio_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Audio seconds transcribed per wall-clock second"""
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    async def transcribe_recordings(
+        self,
+        recordings: List[Tuple[str, bytes]],
+        audio_format: Optional[AudioFormat] = None,
+    ) -> List[RecordingResult]:
+        """Transcribe (name, data) recordings, chunks of all files in parallel"""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def transcribe_chunk(stt_format: AudioFormat, chunk: AudioChunk) -> ChunkTranscript:
+            async with semaphore:
+                text, confidence = await self.voice_manager.transcribe_audio(chunk.audio, audio_format=stt_format)
+            return ChunkTranscript(chunk.start, chunk.end, text, confidence)
+
+        async def transcribe_recording(name: str, data: bytes) -> RecordingResult:
+            call_id = str(uuid.uuid4())
+            try:
+                # Decoding and VAD are CPU work, keep them off the event loop
+                stt_format, chunks, seconds = await asyncio.to_thread(prepare_recording, data, audio_format)
+                transcripts = await asyncio.gather(*(
+                    transcribe_chunk(stt_format, chunk) for chunk in chunks
+                ))
+                return RecordingResult(call_id, name, seconds, list(transcripts))
+            except Exception as e:
+                logger.error(f"Batch transcription failed for {name}: {e}")
+                return RecordingResult(call_id, name, 0.0, [], str(e))
+
+        results = await asyncio.gather(*(
+            transcribe_recording(name, data) for name, data in recordings
+        ))
+
+        self.wall_seconds += time.perf_counter() - started
+        self.audio_seconds += sum(result.audio_seconds for result in results)
+        logger.info(
+            f"Batch transcribed {len(results)} recordings, "
+            f"{self.audio_seconds:.1f}s audio at {self.throughput:.1f}x real time"
+        )
+        return list(results)
+
+def save_results(db, results: List[RecordingResult], voice_profile: str = "lifestyle", search=None):
+    """Write transcripts back as ConversationTurn rows, one commit per batch
+
+    With a ``TranscriptSearch`` the turns are indexed in the same commit.
+    Blocks on the database; from the event loop run it in a thread.
+    """
+    if search is not None:
+        search.prepare()  # before the batch's transaction
+    now = datetime.utcnow()
+    calls = []
+    turns = []
+    for result in results:
+        if result.error:
+            continue
+        calls.append(CallRecord(
+            call_id=result.call_id,
+            user_id="batch",
+            voice_profile=voice_profile,
+            status="transcribed",
+            start_time=now,
+            end_time=now + timedelta(seconds=result.audio_seconds),
+            duration=result.audio_seconds,
+            transcript="\n".join(f"user: {t.text}" for t in result.transcripts if t.text),
+            audio_path=result.name,
+        ))
+        turns.extend(
+            ConversationTurn(
+                call_id=result.call_id,
+                role="user",
+                text=transcript.text,
+                confidence=transcript.confidence,
+                timestamp=now + timedelta(seconds=transcript.start),
+            )
+            for transcript in result.transcripts
+            if transcript.text
+        )
+    # Calls must exist before their turns for the foreign key
+    db.add_all(calls)
+    db.flush()
+    db.add_all(turns)
+    if search is not None:
+        db.flush()  # assigns the turn ids
+        search.index_turns(db, [{"turn_id": turn.turn_id, "text": turn.text} for turn in turns])
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch transcribe recorded calls")
+    parser.add_argument("files", nargs="+", help="WAV or raw audio files")
+    parser.add_argument("--format", default=str(DEFAULT_INPUT_FORMAT),
+                        help="format of raw (non-WAV) files, e.g. mulaw/8000")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    parser.add_argument("--voice-profile", default="lifestyle")
+    parser.add_argument("--dry-run", action="store_true", help="do not write to the database")
+    args = parser.parse_args()
+
+    from audio_codecs import parse_format
+    from voice_manager import get_voice_manager
+
+    recordings = []
+    for path in args.files:
+        with open(path, "rb") as f:
+            recordings.append((os.path.basename(path), f.read()))
+
+    transcriber = BatchTranscriber(get_voice_manager(), args.concurrency)
+    results = asyncio.run(transcriber.transcribe_recordings(recordings, parse_format(args.format)))
+
+    if not args.dry_run:
+        from database import SessionLocal
+        from transcript_search import get_transcript_search
+        db = SessionLocal()
+        try:
+            save_results(db, results, args.voice_profile, get_transcript_search())
+        finally:
+            db.close()
+
+    for result in results:
+        status = result.error or f"{len(result.transcripts)} chunks"
+        print(f"{result.name}: {result.audio_seconds:.1f}s -> {status}")
+    print(f"Throughput: {transcriber.throughput:.1f} audio-seconds per wall-second")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    main()
@@ -0,0 +1,91 @@
+"""Call Archive - Calls read back from the database
+
+Calls evicted from the ``CallRegistry`` are answered from the
+``CallRecord`` and ``ConversationTurn`` rows the write-behind writer
+(``persistence``) stored for them.
+"""
+import logging
+from datetime import timezone
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from call_index import CallFilter, Cursor
+from models import CallRecord, ConversationTurn
+from transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+def epoch(value) -> float:
+    """Seconds since the epoch of a naive UTC datetime"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+class CallArchive:
+    """Loads stored calls as registry call records"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def load(self, call_id: str) -> Optional[dict]:
+        """An archived call in the registry's record format"""
+        db = self.session_factory()
+        try:
+            record = db.get(CallRecord, call_id)
+            if record is None:
+                return None
+            turns = (
+                db.query(ConversationTurn)
+                .filter(ConversationTurn.call_id == call_id)
+                .order_by(ConversationTurn.timestamp)
+                .all()
+            )
+            transcript = Transcript(started_at=epoch(record.start_time))
+            for turn in turns:
+                transcript.append(turn.role, turn.text, turn.confidence, at=epoch(turn.timestamp))
+            return {
+                "call_id": record.call_id,
+                "user_id": record.user_id,
+                "voice_profile": record.voice_profile,
+                "status": record.status,
+                "start_time": record.start_time,
+                "end_time": record.end_time,
+                "duration": record.duration,
+                "transcript": transcript,
+                "flow_manager": None,
+                "audio_format": None,
+                "archived": True,
+            }
+        finally:
+            db.close()
+
+    def page(self, filters: CallFilter, limit: int, cursor: Cursor) -> Tuple[List[dict], bool]:
+        """Stored calls below ``cursor``, newest first, and whether more follow
+
+        Served by the (field, start_time) indexes on ``calls``.
+        """
+        db = self.session_factory()
+        try:
+            query = db.query(
+                CallRecord.call_id, CallRecord.user_id, CallRecord.voice_profile,
+                CallRecord.status, CallRecord.start_time,
+            )
+            for field, value in filters.equalities():
+                query = query.filter(getattr(CallRecord, field) == value)
+            if filters.since is not None:
+                query = query.filter(CallRecord.start_time >= filters.since)
+            if filters.until is not None:
+                query = query.filter(CallRecord.start_time < filters.until)
+            query = query.filter(or_(
+                CallRecord.start_time < cursor.start_time,
+                and_(CallRecord.start_time == cursor.start_time, CallRecord.call_id < cursor.call_id),
+            ))
+            rows = (
+                query.order_by(CallRecord.start_time.desc(), CallRecord.call_id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+            calls = [row._asdict() for row in rows[:limit]]
+            return calls, len(rows) > limit
+        finally:
+            db.close()
@@ -0,0 +1,144 @@
+"""Call Index - Filtered, cursor-paginated call listing
+
+Calls are listed newest first. Every call the registry creates gets an
+increasing sequence number; the ``CallIndex`` keeps the sequence numbers of
+the calls in memory in sorted lists, one for all calls (with their start
+times alongside, for time ranges) and one per status, voice profile and
+user. A page is read by bisecting into the shortest list that matches a
+filter and walking down from the cursor, so its cost depends on the page
+size and not on how many calls are retained.
+
+Calls evicted from memory are listed from the database, which has matching
+indexes on ``calls``. Memory holds every call newer than the newest evicted
+one (the horizon), so a listing walks memory down to the horizon and then
+continues in the database below it.
+"""
+import base64
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+INDEXED_FIELDS = ("status", "voice_profile", "user_id")
+
+class CallFilter(NamedTuple):
+    """Listing filters; None matches everything"""
+    status: Optional[str] = None
+    voice_profile: Optional[str] = None
+    user_id: Optional[str] = None
+    since: Optional[datetime] = None  # start_time >= since
+    until: Optional[datetime] = None  # start_time < until
+
+    def equalities(self) -> List[Tuple[str, str]]:
+        return [(field, getattr(self, field)) for field in INDEXED_FIELDS if getattr(self, field) is not None]
+
+    def matches(self, call: dict) -> bool:
+        return all(call[field] == value for field, value in self.equalities())
+
+class Cursor(NamedTuple):
+    """Position after the last call of a page"""
+    seq: int  # 0 once the listing has moved on to the database
+    start_time: datetime
+    call_id: str
+
+    def encode(self) -> str:
+        raw = json.dumps([self.seq, self.start_time.isoformat(), self.call_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            seq, start_time, call_id = json.loads(raw)
+            return cls(int(seq), datetime.fromisoformat(start_time), str(call_id))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {token!r}") from e
+
+    @classmethod
+    def after(cls, call: dict, in_memory: bool = True) -> "Cursor":
+        return cls(call["seq"] if in_memory else 0, call["start_time"], call["call_id"])
+
+def _remove(seqs: List[int], seq: int):
+    position = bisect_left(seqs, seq)
+    if position < len(seqs) and seqs[position] == seq:
+        del seqs[position]
+
+class CallIndex:
+    """Sorted sequence-number indexes over the calls in memory"""
+
+    def __init__(self):
+        self.by_seq: Dict[int, dict] = {}
+        self.order: List[int] = []
+        self.starts: List[datetime] = []
+        self.fields: Dict[Tuple[str, str], List[int]] = {}
+        # Sequence number of the newest call evicted so far
+        self.horizon = 0
+        self.horizon_start: Optional[datetime] = None
+
+    def add(self, call: dict):
+        """Index a new call; its sequence number is the highest so far"""
+        seq = call["seq"]
+        self.by_seq[seq] = call
+        self.order.append(seq)
+        self.starts.append(call["start_time"])
+        for field in INDEXED_FIELDS:
+            self.fields.setdefault((field, call[field]), []).append(seq)
+
+    def status_changed(self, call: dict, previous: str):
+        if call["seq"] not in self.by_seq:
+            return  # not indexed
+        _remove(self.fields.get(("status", previous), []), call["seq"])
+        insort(self.fields.setdefault(("status", call["status"]), []), call["seq"])
+
+    def remove(self, call: dict, evicted: bool = True):
+        """Drop a call; an evicted one moves the horizon past it"""
+        seq = call["seq"]
+        if self.by_seq.pop(seq, None) is None:
+            return
+        position = bisect_left(self.order, seq)
+        del self.order[position]
+        del self.starts[position]
+        for field in INDEXED_FIELDS:
+            key = (field, call[field])
+            seqs = self.fields.get(key)
+            if seqs is not None:
+                _remove(seqs, seq)
+                if not seqs:
+                    del self.fields[key]
+        if evicted and seq > self.horizon:
+            self.horizon = seq
+            self.horizon_start = call["start_time"]
+
+    def page(self, filters: CallFilter, limit: int, cursor: Optional[Cursor] = None) -> Tuple[List[dict], bool]:
+        """Calls in memory above the horizon, newest first
+
+        Returns up to ``limit`` calls and whether memory has more matches.
+        """
+        if cursor is not None:
+            upper = cursor.seq
+        else:
+            upper = self.order[-1] + 1 if self.order else 0
+        if filters.until is not None:
+            # The first call started at or after ``until`` bounds the walk
+            position = bisect_left(self.starts, filters.until)
+            if position < len(self.order):
+                upper = min(upper, self.order[position])
+        candidates = [self.fields.get(key, []) for key in filters.equalities()] or [self.order]
+        seqs = min(candidates, key=len)
+
+        calls = []
+        position = bisect_left(seqs, upper) - 1
+        while position >= 0:
+            seq = seqs[position]
+            position -= 1
+            if seq <= self.horizon:
+                break
+            call = self.by_seq[seq]
+            if filters.since is not None and call["start_time"] < filters.since:
+                break
+            if not filters.matches(call):
+                continue
+            if len(calls) == limit:
+                return calls, True
+            calls.append(call)
+        return calls, False
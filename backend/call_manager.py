@@ -1,31 +1,25 @@
 """Call Manager - Manages call lifecycle and state"""
 import logging
-import uuid
-from datetime import datetime
 from typing import Dict, List, Optional
-import json
+
+from call_registry import CallRegistry, get_call_registry
 
 logger = logging.getLogger(__name__)
 
 class CallManager:
     """Manages call state and lifecycle"""
     
-    def __init__(self):
-        self.active_calls: Dict[str, dict] = {}
+    def __init__(self, registry: CallRegistry = None):
+        self.registry = registry if registry is not None else CallRegistry()
+    
+    @property
+    def active_calls(self) -> Dict[str, dict]:
+        return self.registry.active
     
-    def create_call(self, user_id: str, voice_profile: str) -> str:
+    async def create_call(self, user_id: str, voice_profile: str) -> str:
         """Create a new call record"""
         try:
-            call_id = str(uuid.uuid4())
-            
-            self.active_calls[call_id] = {
-                "user_id": user_id,
-                "voice_profile": voice_profile,
-                "status": "active",
-                "start_time": datetime.utcnow(),
-                "turns": [],
-                "transcript": []
-            }
+            call_id = (await self.registry.register(user_id, voice_profile))["call_id"]
             
             logger.info(f"Call created: {call_id} for user {user_id}")
             return call_id
@@ -34,25 +28,20 @@ class CallManager:
             logger.error(f"Error creating call: {e}")
             raise
     
-    def add_conversation_turn(self, call_id: str, role: str, text: str, confidence: float = 1.0):
-        """Add a conversation turn to a call"""
+    async def add_conversation_turn(self, call_id: str, role: str, text: str, confidence: Optional[float] = 1.0):
+        """Add a conversation turn to a call
+
+        ``confidence`` is the recognizer's score for spoken user turns and
+        None for typed ones.
+        """
         try:
-            if call_id not in self.active_calls:
+            call_info = await self.registry.get(call_id)
+            if call_info is None:
                 raise ValueError(f"Call {call_id} not found")
             
-            turn_id = str(uuid.uuid4())
-            
-            turn_data = {
-                "turn_id": turn_id,
-                "role": role,
-                "text": text,
-                "confidence": confidence if role == "user" else 1.0,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            self.active_calls[call_id]["turns"].append(turn_data)
-            self.active_calls[call_id]["transcript"].append(f"{role}: {text}")
-            self.active_calls[call_id]["status"] = "active"
+            if role == "user" and confidence is not None:
+                self.registry.stats.record("stt_confidence", call_info["voice_profile"], confidence)
+            await self.registry.add_turn(call_info, role, text, confidence if role == "user" else 1.0)
             
             logger.info(f"Turn added to call {call_id}: {role}")
             
@@ -60,28 +49,25 @@ class CallManager:
             logger.error(f"Error adding conversation turn: {e}")
             raise
     
-    def end_call(self, call_id: str) -> dict:
+    async def end_call(self, call_id: str) -> dict:
         """End a call and save final data"""
         try:
             if call_id not in self.active_calls:
                 raise ValueError(f"Call {call_id} not found")
             
-            call_info = self.active_calls[call_id]
-            end_time = datetime.utcnow()
-            start_time = call_info["start_time"]
-            duration = (end_time - start_time).total_seconds()
+            call_info = await self.registry.complete(call_id)
+            duration = call_info["duration"]
             
             summary = {
                 "call_id": call_id,
                 "status": "completed",
                 "duration": duration,
-                "turns": len(call_info["turns"]),
+                "turns": len(call_info["transcript"]),
                 "user_id": call_info["user_id"],
                 "voice_profile": call_info["voice_profile"],
-                "end_time": end_time.isoformat()
+                "end_time": call_info["end_time"].isoformat()
             }
             
-            del self.active_calls[call_id]
             logger.info(f"Call ended: {call_id}, duration: {duration}s")
             
             return summary
@@ -90,22 +76,21 @@ class CallManager:
             logger.error(f"Error ending call: {e}")
             raise
     
-    def get_call_summary(self, call_id: str) -> Optional[dict]:
+    async def get_call_summary(self, call_id: str) -> Optional[dict]:
         """Get summary of a call"""
         try:
-            if call_id not in self.active_calls:
+            call_info = await self.registry.get(call_id)
+            if call_info is None:
                 return None
             
-            call_info = self.active_calls[call_id]
-            
             return {
                 "call_id": call_id,
                 "user_id": call_info["user_id"],
                 "voice_profile": call_info["voice_profile"],
                 "status": call_info["status"],
                 "start_time": call_info["start_time"].isoformat(),
-                "turns_count": len(call_info["turns"]),
-                "transcript": "\\n".join(call_info["transcript"])
+                "turns_count": len(call_info["transcript"]),
+                "transcript": call_info["transcript"].text()
             }
         except Exception as e:
             logger.error(f"Error getting call summary: {e}")
@@ -129,5 +114,5 @@ def get_call_manager() -> CallManager:
     """Get or create call manager instance"""
     global _call_manager
     if _call_manager is None:
-        _call_manager = CallManager()
+        _call_manager = CallManager(get_call_registry())
     return _call_manager
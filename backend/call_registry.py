@@ -0,0 +1,355 @@
+"""Call Registry - The one place call state lives
+
+The REST API (``main``), ``CallManager`` and the WebSocket handlers all read
+and write calls through the ``CallRegistry``. Besides the call records it
+keeps running counters that are updated on every state transition, so the
+dashboard statistics cost the same no matter how many calls are retained,
+and feeds completed calls into the ``CallStats`` distributions.
+
+Calls started, turns and completions are also written through to the
+call state backend (``call_state``), which holds the counters and, when
+several workers share it, lets every worker read any call: a call owned by
+another worker is completed there and its owner told, and a worker that
+gets a call's socket takes the call over from the worker that created it.
+The backend may be a server, so the methods that reach it are coroutines.
+
+Every change to a call and every turn is queued on the write-behind
+``WriteBehindWriter``. Completed calls stay in memory for
+``CALL_RETENTION_SECONDS``; their expiry times go on a heap, so eviction
+only touches calls that are due. Due calls are dropped once the writer has
+flushed them, and ``get`` falls through to the ``CallArchive`` for calls
+that are no longer in memory.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from call_index import CallFilter, CallIndex, Cursor
+from call_state import CallStateBackend, InProcessCallState, MessageHandler
+from call_stats import CallStats, get_call_stats
+from transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+class CallRegistry:
+    """Call records by id, with O(1) lifecycle counters"""
+
+    def __init__(
+        self,
+        stats: CallStats = None,
+        archive=None,
+        writer=None,
+        retention: float = None,
+        clock: Callable[[], float] = time.monotonic,
+        state: CallStateBackend = None,
+        worker_id: str = None,
+    ):
+        self.stats = stats if stats is not None else CallStats()
+        self.archive = archive
+        self.writer = writer
+        self.retention = settings.CALL_RETENTION_SECONDS if retention is None else retention
+        self.clock = clock
+        self.state = state if state is not None else InProcessCallState()
+        self.worker_id = worker_id or settings.WORKER_ID
+        self.calls: Dict[str, dict] = {}
+        self.active: Dict[str, dict] = {}
+        self.index = CallIndex()
+        self._seq = 0
+        self.evicted = 0
+        self.flush_failures = 0
+        self._expiry: List[Tuple[float, str]] = []
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self.calls
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    async def register(
+        self,
+        user_id: Optional[str],
+        voice_profile: str,
+        call_id: str = None,
+        flow_manager=None,
+        audio_format=None,
+    ) -> dict:
+        """Start a call and return its record
+
+        Registering an id whose call is still active is an error; a
+        completed call's id can be reused and starts a new call.
+        """
+        call_id = call_id or str(uuid.uuid4())
+        if call_id in self.active:
+            raise ValueError(f"Call {call_id} is already active")
+        self._seq += 1
+        call = {
+            "seq": self._seq,
+            "call_id": call_id,
+            "user_id": user_id,
+            "voice_profile": voice_profile,
+            "status": "active",
+            "start_time": datetime.utcnow(),
+            "end_time": None,
+            "transcript": Transcript(),
+            "flow_manager": flow_manager,
+            "audio_format": audio_format,
+            "owner": self.worker_id,
+        }
+        # Published before it is added, so a call the backend rejected is
+        # never served from memory
+        await self.state.call_started(call)
+        previous = self.calls.get(call_id)
+        if previous is not None:
+            self.index.remove(previous, evicted=False)
+        self._add(call)
+        if self.writer is not None:
+            self.writer.call_changed(call)
+        return call
+
+    def _add(self, call: dict, indexed: bool = True):
+        self.calls[call["call_id"]] = call
+        self.active[call["call_id"]] = call
+        if indexed:
+            self.index.add(call)
+
+    async def adopt(self, call_id: str) -> Optional[dict]:
+        """Take over an active call another worker registered
+
+        Used when a call's socket connects to this worker; the previous
+        owner is told to let go of it. Returns None if no worker has the
+        call active. The call is not indexed: it started before calls
+        registered here since, and the index keeps calls in start order.
+        Listings with shared state come from the archive anyway.
+        """
+        if call_id in self.active:
+            return self.active[call_id]
+        call = await self.state.load_call(call_id) if self.state.shared else None
+        if call is None or call["status"] != "active":
+            return None
+        previous = await self.state.set_owner(call_id, self.worker_id)
+        stale = self.calls.get(call_id)
+        if stale is not None:
+            self.index.remove(stale, evicted=False)
+        call["seq"] = 0
+        call["owner"] = self.worker_id
+        self._add(call, indexed=False)
+        if previous and previous != self.worker_id:
+            await self.state.send(previous, {"type": "released", "call_id": call_id})
+        return call
+
+    def release(self, call_id: str):
+        """Let go of an active call another worker has taken over"""
+        call = self.active.pop(call_id, None)
+        if call is not None:
+            del self.calls[call_id]
+            self.index.remove(call, evicted=False)
+
+    async def get(self, call_id: str) -> Optional[dict]:
+        """A call in memory, else from another worker, else from the archive"""
+        call = self.calls.get(call_id)
+        if call is None and self.state.shared:
+            call = await self.state.load_call(call_id)
+        if call is None and self.archive is not None:
+            try:
+                # A database read; kept off the event loop
+                call = await asyncio.to_thread(self.archive.load, call_id)
+            except Exception as e:
+                logger.error(f"Error loading archived call {call_id}: {e}")
+        return call
+
+    async def complete(self, call_id: str) -> Optional[dict]:
+        """Mark a call completed and record its duration
+
+        A call owned by another worker is completed in the shared state and
+        its owner told. Completing a call twice is harmless; returns None
+        for unknown ids.
+        """
+        call = self.calls.get(call_id)
+        if call is None:
+            return await self._complete_elsewhere(call_id) if self.state.shared else None
+        if self.active.pop(call_id, None) is None:
+            return call
+        # Finished on a copy and applied once the claim is settled, so
+        # readers never see times that are about to be replaced
+        ended = dict(call)
+        _finish(ended)
+        if not await self.state.claim_completion(ended):
+            # Ended through another worker first; its times stand
+            shared = await self.state.load_call(call_id)
+            if shared is not None:
+                ended["end_time"], ended["duration"] = shared["end_time"], shared["duration"]
+        call.update((key, ended[key]) for key in ("status", "end_time", "duration"))
+        self.index.status_changed(call, "active")
+        self.stats.record("call_duration", call["voice_profile"], call["duration"])
+        self.stats.record("turns_per_call", call["voice_profile"], len(call["transcript"]))
+        call["expires_at"] = self.clock() + self.retention
+        heapq.heappush(self._expiry, (call["expires_at"], call_id))
+        if self.writer is not None:
+            self.writer.call_changed(call)
+        return call
+
+    async def _complete_elsewhere(self, call_id: str) -> Optional[dict]:
+        call = await self.state.load_call(call_id)
+        if call is None or call["status"] != "active":
+            return call
+        _finish(call)
+        if not await self.state.claim_completion(call):
+            return await self.state.load_call(call_id)
+        await self.state.send(call["owner"], {"type": "completed", "call_id": call_id})
+        return call
+    
+    async def add_turn(self, call: dict, role: str, text: str, confidence: Optional[float] = None):
+        """Append a turn to a call's transcript"""
+        index = call["transcript"].append(role, text, confidence)
+        await self.state.turn_added(call, index)
+        if self.writer is not None:
+            self.writer.turn_added(call["call_id"], call["transcript"], index)
+    
+    async def wait_for_capacity(self):
+        """Backpressure from the database writer; returns once it keeps up"""
+        if self.writer is not None:
+            await self.writer.wait_for_capacity()
+    
+    def _pop_due(self, now: float) -> List[dict]:
+        due = []
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, call_id = heapq.heappop(self._expiry)
+            call = self.calls.get(call_id)
+            # Skip entries for ids that were reused by a newer call
+            if call is not None and call.get("expires_at") == expires_at and call_id not in self.active:
+                due.append(call)
+        return due
+    
+    async def evict_due(self, now: float = None) -> int:
+        """Drop the completed calls whose retention has passed
+
+        Calls are only dropped once everything queued for them is in the
+        database; if the writer cannot flush they are retried later.
+        """
+        due = self._pop_due(self.clock() if now is None else now)
+        if not due:
+            return 0
+        if self.writer is not None and not await self.writer.flush():
+            self.flush_failures += 1
+            logger.error(f"Keeping {len(due)} expired calls in memory until they are written")
+            retry_at = self.clock() + settings.CALL_EVICTION_INTERVAL
+            for call in due:
+                call["expires_at"] = retry_at
+                heapq.heappush(self._expiry, (retry_at, call["call_id"]))
+            return 0
+        for call in due:
+            if self.calls.get(call["call_id"]) is call:
+                del self.calls[call["call_id"]]
+                self.index.remove(call)
+                await self.state.discard(call["call_id"])
+        self.evicted += len(due)
+        return len(due)
+    
+    async def evict_all(self) -> int:
+        """Write and drop every completed call now, e.g. on shutdown"""
+        return await self.evict_due(math.inf)
+    
+    async def run_eviction(self, interval: float = None):
+        """Evict due calls until cancelled"""
+        interval = interval or settings.CALL_EVICTION_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_due()
+            except Exception as e:
+                logger.error(f"Error evicting calls: {e}")
+
+    async def listen(self, on_message: MessageHandler = None, ready: asyncio.Event = None):
+        """Handle messages other workers send about this worker's calls
+
+        Runs until cancelled. Messages the registry does not handle itself
+        go to ``on_message``.
+        """
+        async def dispatch(message: dict):
+            try:
+                if message["type"] == "completed":
+                    await self.complete(message["call_id"])
+                elif message["type"] == "released":
+                    self.release(message["call_id"])
+                elif on_message is not None:
+                    await on_message(message)
+            except Exception as e:
+                logger.error(f"Error handling call state message {message}: {e}")
+
+        await self.state.listen(self.worker_id, dispatch, ready)
+
+    async def route(self, call_id: str, message: dict) -> bool:
+        """Send a message to the worker that owns a call, if not this one"""
+        owner = await self.state.owner(call_id) if self.state.shared else None
+        if owner is None or owner == self.worker_id:
+            return False
+        return await self.state.send(owner, message)
+
+    async def list_calls(self, filters: CallFilter, limit: int, cursor: Optional[Cursor] = None) -> Tuple[List[dict], Optional[Cursor]]:
+        """One page of calls, newest first, and the cursor of the next page
+
+        Calls in memory are listed first; below the eviction horizon the
+        listing continues in the archive. With state shared between
+        workers, memory only holds this worker's calls, so all pages come
+        from the archive, where every worker's writer stores its calls.
+        """
+        calls: List[dict] = []
+        if self.state.shared and self.archive is not None and (cursor is None or cursor.seq > 0):
+            cursor = Cursor(0, datetime.max, "")
+        if cursor is None or cursor.seq > 0:
+            calls, more = self.index.page(filters, limit, cursor)
+            if more:
+                return calls, Cursor.after(calls[-1])
+            if self.archive is None or self.index.horizon_start is None:
+                return calls, None
+            if len(calls) == limit:
+                # Whether the archive has more is only known on the next page
+                return calls, Cursor.after(calls[-1])
+            # Every call at or before the horizon is in the archive; resume
+            # there, or below the cursor if eviction has passed it since
+            horizon = Cursor(0, self.index.horizon_start + timedelta(microseconds=1), "")
+            if cursor is not None and cursor.start_time < horizon.start_time:
+                horizon = Cursor(0, cursor.start_time, cursor.call_id)
+            cursor = horizon
+        elif self.archive is None:
+            return calls, None
+        # A database read; kept off the event loop
+        archived, more = await asyncio.to_thread(self.archive.page, filters, limit - len(calls), cursor)
+        calls.extend(archived)
+        return calls, Cursor.after(calls[-1], in_memory=False) if more else None
+
+    async def get_stats(self) -> dict:
+        """Lifecycle counters of all workers; durations in seconds
+
+        ``retained_calls`` and ``evicted_calls`` are this worker's.
+        """
+        stats = await self.state.counters()
+        stats["retained_calls"] = len(self.calls)
+        stats["evicted_calls"] = self.evicted
+        return stats
+
+def _finish(call: dict):
+    call["end_time"] = datetime.utcnow()
+    call["duration"] = (call["end_time"] - call["start_time"]).total_seconds()
+    call["status"] = "completed"
+
+_call_registry: Optional[CallRegistry] = None
+
+def get_call_registry() -> CallRegistry:
+    """Get or create the process call registry"""
+    global _call_registry
+    if _call_registry is None:
+        from database import ReadSessionLocal, SessionLocal
+        from call_archive import CallArchive
+        from persistence import WriteBehindWriter
+        from transcript_search import get_transcript_search
+        from call_state import create_call_state
+        writer = WriteBehindWriter(SessionLocal, search=get_transcript_search()) if settings.PERSIST_ENABLED else None
+        _call_registry = CallRegistry(get_call_stats(), CallArchive(ReadSessionLocal), writer, state=create_call_state())
+    return _call_registry
@@ -0,0 +1,300 @@
+"""Call State - Pluggable backends for call state shared between workers
+
+The ``CallRegistry`` keeps the calls a worker process owns in memory; the
+call state backend is what other workers see of them. Two backends exist:
+
+* ``InProcessCallState`` - a single worker: the registry is all the state
+  there is, so only the lifecycle counters live here
+* ``RedisCallState`` - any number of workers and nodes sharing a
+  Redis-protocol server (Redis, Valkey, or ``redis_standin`` locally)
+
+With a shared backend every call is written through as it starts, gets a
+turn and completes, so any worker can read it, along with where its
+conversation flow stands after the latest turn, and every worker listens
+on its own channel for messages about the calls whose sockets it holds:
+a call ended through another worker's API, a call whose socket another
+worker took over, and messages for the socket itself.
+"""
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from config import settings
+from call_archive import epoch
+from resp_client import RespConnection, RespError, subscribe
+from transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("total_calls", "active_calls", "completed_calls")
+
+MessageHandler = Callable[[dict], Awaitable[None]]
+
+class CallStateBackend:
+    """Interface every call state backend implements
+
+    Methods are coroutines so that backends talking to a server never block
+    the event loop.
+    """
+
+    name = "base"
+    # Whether other processes see the calls written here
+    shared = False
+
+    async def call_started(self, call: dict):
+        """Publish a new call, owned by ``call["owner"]``, and count it"""
+        raise NotImplementedError
+
+    async def turn_added(self, call: dict, index: int):
+        """Publish turn ``index`` of a call's transcript and its flow state"""
+        raise NotImplementedError
+
+    async def claim_completion(self, call: dict) -> bool:
+        """Record a completed call and count it, once per call
+
+        Returns False if the call was already completed, through any
+        worker; the first completion's times stand.
+        """
+        raise NotImplementedError
+
+    async def load_call(self, call_id: str) -> Optional[dict]:
+        """A call published by any worker, as a registry record
+
+        ``flow_state`` holds the ``ConversationFlowManager.snapshot`` of
+        the latest turn, or None.
+        """
+        raise NotImplementedError
+
+    async def owner(self, call_id: str) -> Optional[str]:
+        """The worker that owns a published call"""
+        raise NotImplementedError
+
+    async def set_owner(self, call_id: str, worker_id: str) -> Optional[str]:
+        """Make ``worker_id`` own a call; returns the previous owner"""
+        raise NotImplementedError
+
+    async def discard(self, call_id: str):
+        """Forget a call its owner has evicted"""
+        raise NotImplementedError
+
+    async def counters(self) -> dict:
+        """total_calls, active_calls, completed_calls and total_duration"""
+        raise NotImplementedError
+
+    async def send(self, worker_id: str, message: dict) -> bool:
+        """Deliver a message to a worker; False if no worker received it"""
+        raise NotImplementedError
+
+    async def listen(self, worker_id: str, handler: MessageHandler, ready: asyncio.Event = None):
+        """Pass messages sent to ``worker_id`` to ``handler`` until cancelled"""
+        raise NotImplementedError
+
+class InProcessCallState(CallStateBackend):
+    """State of a single worker process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._counters = {name: 0 for name in COUNTERS}
+        self._counters["total_duration"] = 0.0
+        self._listeners: Dict[str, MessageHandler] = {}
+
+    async def call_started(self, call: dict):
+        self._counters["total_calls"] += 1
+        self._counters["active_calls"] += 1
+
+    async def turn_added(self, call: dict, index: int):
+        pass
+
+    async def claim_completion(self, call: dict) -> bool:
+        # The registry completes each call once
+        self._counters["active_calls"] -= 1
+        self._counters["completed_calls"] += 1
+        self._counters["total_duration"] += call["duration"]
+        return True
+
+    async def load_call(self, call_id: str) -> Optional[dict]:
+        return None
+
+    async def owner(self, call_id: str) -> Optional[str]:
+        return None
+
+    async def set_owner(self, call_id: str, worker_id: str) -> Optional[str]:
+        return None
+
+    async def discard(self, call_id: str):
+        pass
+
+    async def counters(self) -> dict:
+        return dict(self._counters)
+
+    async def send(self, worker_id: str, message: dict) -> bool:
+        handler = self._listeners.get(worker_id)
+        if handler is None:
+            return False
+        asyncio.get_running_loop().create_task(handler(message))
+        return True
+
+    async def listen(self, worker_id: str, handler: MessageHandler, ready: asyncio.Event = None):
+        self._listeners[worker_id] = handler
+        if ready is not None:
+            ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._listeners.pop(worker_id, None)
+
+def _time(value: Optional[datetime]) -> str:
+    return value.isoformat() if value is not None else ""
+
+class RedisCallState(CallStateBackend):
+    """State shared through a Redis-protocol server
+
+    Each call is a hash ``<prefix>call:<id>`` with its transcript in the list
+    ``<prefix>turns:<id>``; counters are the hash ``<prefix>stats`` and each
+    worker listens on the channel ``<prefix>worker:<id>``. The connection is
+    blocking, so commands run on a thread of their own, one at a time in the
+    order they were issued, and the event loop only awaits their replies.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str = None, prefix: str = "voice:", ttl: float = None):
+        self.url = url or settings.CALL_STATE_URL
+        self.prefix = prefix
+        # Completed calls are discarded by their owner after it evicts them;
+        # the TTL only cleans up after workers that exit before that
+        self.ttl = int(ttl or settings.CALL_RETENTION_SECONDS * 2 + 3600)
+        self.connection = RespConnection(self.url)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="call-state")
+
+    async def _pipeline(self, commands: list) -> list:
+        """Run commands in one round trip, raising the first error reply"""
+        replies = await asyncio.get_running_loop().run_in_executor(self._executor, self.connection.pipeline, commands)
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _execute(self, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.connection.execute, *args)
+
+    def _keys(self, call_id: str):
+        return (f"{self.prefix}call:{call_id}", f"{self.prefix}turns:{call_id}", f"{self.prefix}done:{call_id}")
+
+    async def call_started(self, call: dict):
+        call_key, turns_key, done_key = self._keys(call["call_id"])
+        await self._pipeline([
+            ("DEL", call_key, turns_key, done_key),
+            ("HSET", call_key,
+             "user_id", call["user_id"] or "",
+             "voice_profile", call["voice_profile"],
+             "status", call["status"],
+             "start_time", _time(call["start_time"]),
+             "end_time", "",
+             "duration", 0.0,
+             "owner", call["owner"]),
+            ("HINCRBY", f"{self.prefix}stats", "total_calls", 1),
+            ("HINCRBY", f"{self.prefix}stats", "active_calls", 1),
+        ])
+
+    async def turn_added(self, call: dict, index: int):
+        call_key, turns_key, _ = self._keys(call["call_id"])
+        commands = [("RPUSH", turns_key, json.dumps(call["transcript"].turn(index)))]
+        if call["flow_manager"] is not None:
+            # Taken now: the flow moves on while the command waits its turn
+            commands.append(("HSET", call_key, "flow", json.dumps(call["flow_manager"].snapshot())))
+        await self._pipeline(commands)
+
+    async def claim_completion(self, call: dict) -> bool:
+        call_key, turns_key, done_key = self._keys(call["call_id"])
+        if await self._execute("SET", done_key, "1", "NX") is None:
+            return False
+        stats_key = f"{self.prefix}stats"
+        await self._pipeline([
+            ("HSET", call_key,
+             "status", call["status"],
+             "end_time", _time(call["end_time"]),
+             "duration", call["duration"]),
+            ("HINCRBY", stats_key, "active_calls", -1),
+            ("HINCRBY", stats_key, "completed_calls", 1),
+            ("HINCRBYFLOAT", stats_key, "total_duration", call["duration"]),
+            *(("EXPIRE", key, self.ttl) for key in (call_key, turns_key, done_key)),
+        ])
+        return True
+
+    async def load_call(self, call_id: str) -> Optional[dict]:
+        call_key, turns_key, _ = self._keys(call_id)
+        fields, turns = await self._pipeline([("HGETALL", call_key), ("LRANGE", turns_key, 0, -1)])
+        if not fields:
+            return None
+        fields = dict(zip(fields[::2], fields[1::2]))
+        start_time = datetime.fromisoformat(fields["start_time"])
+        transcript = Transcript(started_at=epoch(start_time))
+        for turn in turns:
+            turn = json.loads(turn)
+            at = epoch(datetime.fromisoformat(turn["timestamp"]))
+            transcript.append(turn["role"], turn["text"], turn["confidence"], at=at)
+        return {
+            "call_id": call_id,
+            "user_id": fields["user_id"] or None,
+            "voice_profile": fields["voice_profile"],
+            "status": fields["status"],
+            "start_time": start_time,
+            "end_time": datetime.fromisoformat(fields["end_time"]) if fields["end_time"] else None,
+            "duration": float(fields["duration"]),
+            "transcript": transcript,
+            "flow_manager": None,
+            "audio_format": None,
+            "owner": fields["owner"],
+            "flow_state": json.loads(fields["flow"]) if fields.get("flow") else None,
+        }
+
+    async def owner(self, call_id: str) -> Optional[str]:
+        call_key, _, _ = self._keys(call_id)
+        return await self._execute("HGET", call_key, "owner")
+
+    async def set_owner(self, call_id: str, worker_id: str) -> Optional[str]:
+        call_key, _, _ = self._keys(call_id)
+        previous, _ = await self._pipeline([("HGET", call_key, "owner"), ("HSET", call_key, "owner", worker_id)])
+        return previous
+
+    async def discard(self, call_id: str):
+        await self._execute("DEL", *self._keys(call_id))
+
+    async def counters(self) -> dict:
+        fields = await self._execute("HGETALL", f"{self.prefix}stats")
+        fields = dict(zip(fields[::2], fields[1::2]))
+        counters = {name: int(fields.get(name, 0)) for name in COUNTERS}
+        counters["total_duration"] = float(fields.get("total_duration", 0.0))
+        return counters
+
+    async def send(self, worker_id: str, message: dict) -> bool:
+        return await self._execute("PUBLISH", f"{self.prefix}worker:{worker_id}", json.dumps(message)) > 0
+
+    async def listen(self, worker_id: str, handler: MessageHandler, ready: asyncio.Event = None):
+        async def deliver(data: str):
+            await handler(json.loads(data))
+
+        while True:
+            try:
+                await subscribe(self.url, f"{self.prefix}worker:{worker_id}", deliver, ready)
+            except (OSError, ConnectionError) as e:
+                logger.error(f"Call state subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1.0)
+
+BACKENDS = {
+    "memory": InProcessCallState,
+    "redis": RedisCallState,
+}
+
+def create_call_state(name: str = None) -> CallStateBackend:
+    """Create the backend named by CALL_STATE_BACKEND"""
+    name = (name or settings.CALL_STATE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown call state backend: {name}")
+    return BACKENDS[name]()
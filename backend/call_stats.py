@@ -0,0 +1,148 @@
+"""Call Stats - Streaming percentiles for the dashboard
+
+Per-call and per-turn measurements (call duration, turns per call, STT
+confidence, time to first reply audio) are added to fixed-memory sketches
+as they happen, per voice profile. A ``Sketch`` keeps log-spaced bucket
+counts, so any percentile is within ``STATS_RELATIVE_ACCURACY`` of the true
+value, and two sketches merge by adding their counts. A ``SlidingSketch``
+keeps one sketch per time slot; a window is answered by merging the slots
+it covers, never by revisiting calls.
+"""
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+from config import settings
+
+METRICS = ("call_duration", "turns_per_call", "stt_confidence", "turn_latency")
+PERCENTILES = (50, 90, 99)
+
+# Values are clamped into this range, which bounds the number of buckets
+MIN_VALUE = 1e-3
+MAX_VALUE = 1e6
+
+class Sketch:
+    """Mergeable log-bucket histogram with bounded relative error"""
+
+    __slots__ = ("gamma", "counts", "zeros", "count", "total", "min", "max")
+
+    def __init__(self, relative_accuracy: float = None):
+        accuracy = relative_accuracy or settings.STATS_RELATIVE_ACCURACY
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.counts: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value < MIN_VALUE:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(min(value, MAX_VALUE), self.gamma))
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def merge(self, other: "Sketch"):
+        """Add another sketch's values to this one"""
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q / 100 * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if rank < seen:
+                # Midpoint of the bucket, clamped to what was observed
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        summary = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+        }
+        for q in PERCENTILES:
+            summary[f"p{q}"] = self.percentile(q)
+        return summary
+
+class SlidingSketch:
+    """Sketches per time slot covering the last ``slots * slot_seconds``"""
+
+    def __init__(self, slot_seconds: float = None, slots: int = None, clock: Callable[[], float] = time.time):
+        self.slot_seconds = slot_seconds or settings.STATS_SLOT_SECONDS
+        self.slots: deque = deque(maxlen=slots or settings.STATS_SLOTS)
+        self.clock = clock
+
+    @property
+    def span(self) -> float:
+        return self.slot_seconds * self.slots.maxlen
+
+    def add(self, value: float):
+        slot = int(self.clock() // self.slot_seconds)
+        if not self.slots or self.slots[-1][0] != slot:
+            self.slots.append((slot, Sketch()))
+        self.slots[-1][1].add(value)
+
+    def window(self, seconds: float) -> Sketch:
+        """Merged sketch of the values added in the last ``seconds``"""
+        oldest = int((self.clock() - seconds) // self.slot_seconds) + 1
+        merged = Sketch()
+        for slot, sketch in reversed(self.slots):
+            if slot < oldest:
+                break
+            merged.merge(sketch)
+        return merged
+
+class CallStats:
+    """Sliding-window sketches per metric and voice profile"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.metrics: Dict[str, Dict[str, SlidingSketch]] = {name: {} for name in METRICS}
+
+    def record(self, metric: str, voice_profile: str, value: float):
+        profiles = self.metrics[metric]
+        sketch = profiles.get(voice_profile)
+        if sketch is None:
+            sketch = profiles[voice_profile] = SlidingSketch(clock=self.clock)
+        sketch.add(value)
+
+    def summary(self, window: float, metrics: Iterable[str] = METRICS) -> dict:
+        """Count, mean and percentiles per profile (and ``all``) over ``window`` seconds"""
+        result = {}
+        for metric in metrics:
+            combined = Sketch()
+            by_profile = {}
+            for profile, sliding in self.metrics[metric].items():
+                sketch = sliding.window(window)
+                combined.merge(sketch)
+                by_profile[profile] = sketch.as_dict()
+            by_profile["all"] = combined.as_dict()
+            result[metric] = by_profile
+        return result
+
+_call_stats: Optional[CallStats] = None
+
+def get_call_stats() -> CallStats:
+    """Get or create the process call statistics"""
+    global _call_stats
+    if _call_stats is None:
+        _call_stats = CallStats()
+    return _call_stats
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 from typing import Dict
 
@@ -7,6 +8,12 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./voice_assistant.db")
+    SQLITE_MODE = os.getenv("SQLITE_MODE", "pooled")  # pooled (WAL, read and write pools) or shared (one connection)
+    SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL is durable to a crash under WAL, not to power loss
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(16 * 1024)))  # KiB per connection
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
     
     # API
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -17,6 +24,48 @@ class Settings:
     GOOGLE_CLOUD_CREDENTIALS = os.getenv("GOOGLE_CLOUD_CREDENTIALS", "./credentials.json")
     SPEECH_LANGUAGE = "nl-NL"  # Dutch language
     
+    # Speech Backend
+    SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "auto")  # auto, google or simulator
+    SIMULATOR_SEED = int(os.getenv("SIMULATOR_SEED", "0"))
+    SIMULATOR_TTS_LATENCY = os.getenv("SIMULATOR_TTS_LATENCY", "fixed:0")  # fixed:MS, uniform:LO:HI, lognormal:P50:P95
+    SIMULATOR_STT_LATENCY = os.getenv("SIMULATOR_STT_LATENCY", "fixed:0")
+    SIMULATOR_TTS_ERROR_RATE = float(os.getenv("SIMULATOR_TTS_ERROR_RATE", "0.0"))
+    SIMULATOR_STT_ERROR_RATE = float(os.getenv("SIMULATOR_STT_ERROR_RATE", "0.0"))
+    SIMULATOR_CHARS_PER_SECOND = float(os.getenv("SIMULATOR_CHARS_PER_SECOND", "15"))  # Dutch speech at rate 1.0
+    
+    # Speech Execution
+    SPEECH_MAX_WORKERS = int(os.getenv("SPEECH_MAX_WORKERS", "16"))
+    TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "8"))
+    STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+    TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "10.0"))  # seconds
+    STT_TIMEOUT = float(os.getenv("STT_TIMEOUT", "15.0"))  # seconds
+    
+    # Speech Tail Latency
+    TTS_LATENCY_BUDGET = float(os.getenv("TTS_LATENCY_BUDGET", "3.0"))  # seconds, hedges included
+    STT_LATENCY_BUDGET = float(os.getenv("STT_LATENCY_BUDGET", "5.0"))  # seconds, hedges included
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # before the p95 is trusted
+    HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))  # seconds
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    
+    # TTS Audio Cache
+    TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./cache/tts")
+    TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+    TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+    
+    # TTS Prewarming
+    TTS_PREWARM_MODE = os.getenv("TTS_PREWARM_MODE", "background")  # off, background or blocking
+    TTS_PREWARM_CONCURRENCY = int(os.getenv("TTS_PREWARM_CONCURRENCY", "4"))
+    TTS_PREWARM_FORMATS = os.getenv("TTS_PREWARM_FORMATS", "mp3,pcm16,mulaw/8000,opus/48000")  # output formats calls negotiate
+    TTS_PREWARM_MAX_FAILURE_RATE = float(os.getenv("TTS_PREWARM_MAX_FAILURE_RATE", "0.1"))  # above this /ready stays 503
+    
+    # Speculative Synthesis
+    SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() == "true"
+    SPECULATION_BUDGET_PER_CALL = int(os.getenv("SPECULATION_BUDGET_PER_CALL", "10"))  # syntheses per call
+    SPECULATION_MAX_PER_TURN = int(os.getenv("SPECULATION_MAX_PER_TURN", "2"))
+    
     # Voice Profiles
     VOICE_PROFILES: Dict = {
         "lifestyle": {
@@ -39,6 +88,47 @@ class Settings:
     SAMPLE_RATE = 16000
     CHUNK_SIZE = 1024
     MAX_CALL_DURATION = 3600  # 1 hour in seconds
+    FLOW_HISTORY_TURNS = int(os.getenv("FLOW_HISTORY_TURNS", "20"))  # (role, text) entries kept per call
+    CALL_RETENTION_SECONDS = float(os.getenv("CALL_RETENTION_SECONDS", "300"))  # completed calls kept in memory
+    CALL_EVICTION_INTERVAL = float(os.getenv("CALL_EVICTION_INTERVAL", "5"))  # seconds between eviction passes
+    
+    # Call State shared between worker processes
+    CALL_STATE_BACKEND = os.getenv("CALL_STATE_BACKEND", "memory")  # memory (one worker) or redis
+    CALL_STATE_URL = os.getenv("CALL_STATE_URL", "redis://localhost:6379/0")
+    WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    
+    # Write-behind Persistence
+    PERSIST_ENABLED = os.getenv("PERSIST_ENABLED", "true").lower() == "true"
+    PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "500"))  # events per transaction
+    PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.5"))  # seconds
+    PERSIST_MAX_QUEUE = int(os.getenv("PERSIST_MAX_QUEUE", "10000"))  # backpressure above this
+    PERSIST_MAX_RETRIES = int(os.getenv("PERSIST_MAX_RETRIES", "3"))  # attempts before a batch is dropped
+    
+    # Call Statistics
+    STATS_RELATIVE_ACCURACY = float(os.getenv("STATS_RELATIVE_ACCURACY", "0.01"))  # percentile error bound
+    STATS_SLOT_SECONDS = int(os.getenv("STATS_SLOT_SECONDS", "60"))
+    STATS_SLOTS = int(os.getenv("STATS_SLOTS", "1440"))  # 24 hours of 1-minute slots
+    STATS_DEFAULT_WINDOW = int(os.getenv("STATS_DEFAULT_WINDOW", "3600"))  # seconds
+    
+    # Transcript Search
+    SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "5000"))  # newest matches ranked per query
+    
+    # Conversation Flow Definitions
+    FLOW_DEFINITIONS_DIR = os.getenv("FLOW_DEFINITIONS_DIR", os.path.join(os.path.dirname(__file__), "flows"))
+    FLOW_RELOAD_INTERVAL = float(os.getenv("FLOW_RELOAD_INTERVAL", "2.0"))  # seconds between file checks
+    
+    # Batch Transcription
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_MAX_CHUNK_SECONDS = float(os.getenv("BATCH_MAX_CHUNK_SECONDS", "55"))  # sync recognize limit is 60 s
+    BATCH_MIN_SILENCE_MS = int(os.getenv("BATCH_MIN_SILENCE_MS", "500"))
+    
+    # Voice Activity Detection
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+    VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "500"))  # int16 RMS
+    VAD_ZCR_MAX = float(os.getenv("VAD_ZCR_MAX", "0.4"))
+    VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+    VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "60"))
     
     # WebSocket Settings
     WS_HEARTBEAT_INTERVAL = 30  # seconds
@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from config import settings
 from models import Base
+from sqlite_engine import create_sqlite_engines, is_file_database
 import logging
 import os
 
@@ -11,32 +12,37 @@ logger = logging.getLogger(__name__)
 # Ensure logs directory exists
 os.makedirs("./logs", exist_ok=True)
 
-# Create database engine
-if settings.DATABASE_URL.startswith("sqlite"):
+# Enable foreign keys for SQLite
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+# Create database engines; reads go through read_engine, a pool of its own
+# for SQLite files in pooled mode and the same engine otherwise
+if is_file_database(settings.DATABASE_URL) and settings.SQLITE_MODE == "pooled":
+    engine, read_engine = create_sqlite_engines(settings.DATABASE_URL)
+elif settings.DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    event.listen(engine, "connect", set_sqlite_pragma)
+    read_engine = engine
 else:
     engine = create_engine(
         settings.DATABASE_URL,
         pool_pre_ping=True,
         echo=False
     )
-
-# Enable foreign keys for SQLite
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    if "sqlite" in settings.DATABASE_URL:
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    read_engine = engine
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 def get_db() -> Session:
     """Get database session"""
@@ -50,7 +56,17 @@ def init_db():
     """Initialize database"""
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all skips tables that exist; add indexes introduced since
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+
+def close_db():
+    """Close pooled connections; the last one checkpoints an SQLite WAL"""
+    if read_engine is not engine:
+        read_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,125 @@
+"""Dutch Stemmer - Snowball stemmer for Dutch words
+
+A port of the Snowball Dutch stemming algorithm
+(https://snowballstem.org/algorithms/dutch/stemmer.html), used to index and
+query transcripts so that inflections such as "slaap" and "slapen" (both
+"slap") are found by each other. Irregular forms keep their own stems
+("sliep", "geslap"). Words are expected in lower case.
+"""
+from functools import lru_cache
+
+VOWELS = frozenset("aeiouyè")
+ACCENTS = str.maketrans("äëïöüáéíóú", "aeiouaeiou")
+
+def _vowel(word: str, index: int) -> bool:
+    return 0 <= index < len(word) and word[index] in VOWELS
+
+def _mark_consonants(word: str) -> str:
+    """Upper-case an initial y, a y after a vowel and an i between vowels
+
+    Those act as consonants; marks are made left to right, so a marked
+    letter no longer counts as a vowel for the next one.
+    """
+    chars = list(word)
+    if chars[0] == "y":
+        chars[0] = "Y"
+    for index in range(1, len(chars)):
+        if chars[index - 1] not in VOWELS:
+            continue
+        if chars[index] == "y":
+            chars[index] = "Y"
+        elif chars[index] == "i" and index + 1 < len(chars) and chars[index + 1] in VOWELS:
+            chars[index] = "I"
+    return "".join(chars)
+
+def _region(word: str, start: int) -> int:
+    """Position after the first non-vowel that follows a vowel from ``start``"""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+def _undouble(word: str) -> str:
+    return word[:-1] if word.endswith(("kk", "dd", "tt")) else word
+
+def _en_ending(word: str, r1: int) -> str:
+    """``word`` without a final "en" that is in R1 and follows a valid ending"""
+    stem = word[:-2]
+    if len(stem) >= r1 and stem and not _vowel(stem, len(stem) - 1) and not stem.endswith("gem"):
+        return _undouble(stem)
+    return word
+
+def _e_ending(word: str, r1: int):
+    """``word`` without a final "e" in R1 after a non-vowel, and whether it was removed"""
+    if word.endswith("e") and len(word) - 1 >= r1 and len(word) > 1 and not _vowel(word, len(word) - 2):
+        return _undouble(word[:-1]), True
+    return word, False
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Stem of a lower-case Dutch word"""
+    word = word.translate(ACCENTS)
+    if len(word) < 3:
+        return word
+    word = _mark_consonants(word)
+    r1 = _region(word, 0)
+    r2 = _region(word, r1)
+    r1 = max(r1, 3)
+
+    # Step 1
+    if word.endswith("heden"):
+        if len(word) - 5 >= r1:
+            word = word[:-5] + "heid"
+    elif word.endswith("ene"):
+        if len(word) - 3 >= r1:
+            shorter = _en_ending(word[:-1], r1)
+            if shorter != word[:-1]:
+                word = shorter
+    elif word.endswith("en"):
+        word = _en_ending(word, r1)
+    elif word.endswith(("se", "s")):
+        suffix = 2 if word.endswith("se") else 1
+        before = len(word) - suffix - 1
+        if before + 1 >= r1 and before >= 0 and word[before] not in VOWELS and word[before] != "j":
+            word = word[:-suffix]
+
+    # Step 2
+    word, e_found = _e_ending(word, r1)
+
+    # Step 3a
+    if word.endswith("heid") and len(word) - 4 >= r2 and not word.endswith("cheid"):
+        word = word[:-4]
+        if word.endswith("en"):
+            word = _en_ending(word, r1)
+
+    # Step 3b
+    if word.endswith(("end", "ing")):
+        if len(word) - 3 >= r2:
+            word = word[:-3]
+            if word.endswith("ig") and len(word) - 2 >= r2 and not word.endswith("eig"):
+                word = word[:-2]
+            else:
+                word = _undouble(word)
+    elif word.endswith("ig"):
+        if len(word) - 2 >= r2 and not word.endswith("eig"):
+            word = word[:-2]
+    elif word.endswith("lijk"):
+        if len(word) - 4 >= r2:
+            word, _ = _e_ending(word[:-4], r1)
+    elif word.endswith("baar"):
+        if len(word) - 4 >= r2:
+            word = word[:-4]
+    elif word.endswith("bar"):
+        if len(word) - 3 >= r2 and e_found:
+            word = word[:-3]
+
+    # Step 4: undouble the vowel of a final consonant-vowel-consonant
+    if (
+        len(word) >= 4
+        and word[-3:-1] in ("aa", "ee", "oo", "uu")
+        and word[-1] not in VOWELS and word[-1] != "I"
+        and word[-4] not in VOWELS
+    ):
+        word = word[:-2] + word[-1]
+
+    return word.lower()
@@ -0,0 +1,306 @@
+"""Flow Definitions - Declarative dialogue flows compiled to state tables
+
+Each ``flows/<profile>.json`` file describes one flow:
+
+* ``greetings`` / ``closings`` - phrase variants
+* ``intents`` - intent name -> keywords (see ``intents.IntentMatcher``)
+* ``responses`` - response set name -> phrase variants; ``{input}`` is
+  replaced by the caller's words, which makes the phrase uncacheable
+* ``states`` - state name -> ``routes`` (checked in order) and a
+  ``default``; each is an action ``{"intent", "say", "topic", "save", "next"}``
+  where ``save`` stores the input as the call's ``name`` or ``issue``
+* ``initial`` - the state a call starts in
+
+Definitions are compiled into a ``CompiledFlow``: states become integer
+ids indexing a flat table of (intent, action) routes, so dispatching a turn
+is one table lookup plus one scan of the transcript. Each state also lists
+the cacheable replies it can produce, for speculative synthesis. The
+``FlowRegistry`` reloads the files when they change and swaps the compiled
+flows in atomically; a call keeps the ``CompiledFlow`` it started with.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import settings
+from intents import IntentMatcher
+
+logger = logging.getLogger(__name__)
+
+INPUT_PLACEHOLDER = "{input}"
+SAVE_FIELDS = ("name", "issue")
+
+class FlowDefinitionError(ValueError):
+    """Raised when a flow definition is malformed"""
+
+class Action(NamedTuple):
+    """What a flow does for one turn"""
+    responses: Tuple[str, ...]
+    cacheable: bool
+    topic: Optional[str]
+    save: Optional[str]
+    next_state: int
+
+class CompiledFlow:
+    """Immutable, ready-to-dispatch form of one flow definition"""
+
+    def __init__(
+        self,
+        profile: str,
+        version: str,
+        greetings: Tuple[str, ...],
+        closings: Tuple[str, ...],
+        matcher: IntentMatcher,
+        state_names: Tuple[str, ...],
+        routes: Tuple[Tuple[Tuple[str, Action], ...], ...],
+        defaults: Tuple[Action, ...],
+        responses: Dict[str, Tuple[str, ...]],
+    ):
+        self.profile = profile
+        self.version = version
+        self.greetings = greetings
+        self.closings = closings
+        self.matcher = matcher
+        self.state_names = state_names
+        self.routes = routes
+        self.defaults = defaults
+        self.responses = responses
+        self.initial = 0
+        self.static_phrases = tuple(dict.fromkeys(
+            phrase
+            for phrases in (greetings, closings, *responses.values())
+            for phrase in phrases
+            if INPUT_PLACEHOLDER not in phrase
+        ))
+        self.predictions = tuple(self._predict(state) for state in range(len(state_names)))
+
+    def _predict(self, state: int) -> Tuple[str, ...]:
+        """Cacheable replies possible from ``state``, most certain first
+
+        Single-variant responses come first since the reply is then known
+        exactly once the action is; the default action leads each group.
+        """
+        actions = [self.defaults[state]] + [action for _, action in self.routes[state]]
+        actions = [action for action in actions if action.cacheable]
+        exact = [action.responses[0] for action in actions if len(action.responses) == 1]
+        variants = [p for action in actions if len(action.responses) > 1 for p in action.responses]
+        return tuple(dict.fromkeys(exact + variants))
+
+    def dispatch(self, state: int, user_input: str) -> Action:
+        """Action for ``user_input`` in ``state``"""
+        routes = self.routes[state]
+        if routes:
+            intents = self.matcher.match(user_input)
+            for intent, action in routes:
+                if intent in intents:
+                    return action
+        return self.defaults[state]
+
+    @staticmethod
+    def render(action: Action, user_input: str) -> str:
+        """Pick a response variant and fill in the caller's words"""
+        response = random.choice(action.responses)
+        if not action.cacheable:
+            response = response.replace(INPUT_PLACEHOLDER, user_input)
+        return response
+
+    def as_dict(self) -> dict:
+        return {
+            "profile": self.profile,
+            "version": self.version,
+            "states": list(self.state_names),
+            "static_phrases": len(self.static_phrases),
+        }
+
+def _phrases(value, where: str) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not value or not all(isinstance(p, str) and p for p in value):
+        raise FlowDefinitionError(f"{where} needs at least one non-empty phrase")
+    return tuple(value)
+
+def _keywords(value, where: str) -> Tuple[str, ...]:
+    keywords = _phrases(value, where)
+    if not all(keyword.rstrip("*").strip() for keyword in keywords):
+        raise FlowDefinitionError(f"{where} has a keyword without a word")
+    return keywords
+
+def compile_flow(definition: dict, version: str = "") -> CompiledFlow:
+    """Validate a parsed definition and build its state table"""
+    try:
+        profile = definition["profile"]
+        states = definition["states"]
+        initial = definition["initial"]
+    except KeyError as e:
+        raise FlowDefinitionError(f"Flow definition is missing {e}")
+    if initial not in states:
+        raise FlowDefinitionError(f"{profile}: initial state {initial!r} is not defined")
+
+    intents = {
+        name: _keywords(keywords, f"{profile}: intents.{name}")
+        for name, keywords in definition.get("intents", {}).items()
+    }
+    responses = {
+        name: _phrases(phrases, f"{profile}: responses.{name}")
+        for name, phrases in definition.get("responses", {}).items()
+    }
+
+    # The initial state gets id 0
+    state_names = (initial,) + tuple(name for name in states if name != initial)
+    state_ids = {name: index for index, name in enumerate(state_names)}
+
+    def compile_action(spec: dict, state: str, where: str) -> Action:
+        say = spec.get("say")
+        if say not in responses:
+            raise FlowDefinitionError(f"{profile}: {where} says unknown response set {say!r}")
+        next_state = spec.get("next", state)
+        if next_state not in state_ids:
+            raise FlowDefinitionError(f"{profile}: {where} goes to unknown state {next_state!r}")
+        save = spec.get("save")
+        if save is not None and save not in SAVE_FIELDS:
+            raise FlowDefinitionError(f"{profile}: {where} saves to unknown field {save!r}")
+        phrases = responses[say]
+        return Action(
+            responses=phrases,
+            cacheable=not any(INPUT_PLACEHOLDER in p for p in phrases),
+            topic=spec.get("topic"),
+            save=save,
+            next_state=state_ids[next_state],
+        )
+
+    routes = []
+    defaults = []
+    for name in state_names:
+        spec = states[name] or {}
+        state_routes = []
+        for index, route in enumerate(spec.get("routes", [])):
+            intent = route.get("intent")
+            if intent not in intents:
+                raise FlowDefinitionError(f"{profile}: states.{name}.routes[{index}] uses unknown intent {intent!r}")
+            state_routes.append((intent, compile_action(route, name, f"states.{name}.routes[{index}]")))
+        if "default" not in spec:
+            raise FlowDefinitionError(f"{profile}: state {name!r} has no default action")
+        routes.append(tuple(state_routes))
+        defaults.append(compile_action(spec["default"], name, f"states.{name}.default"))
+
+    try:
+        matcher = IntentMatcher(intents)
+    except (ValueError, re.error) as e:
+        raise FlowDefinitionError(f"{profile}: intents: {e}")
+
+    return CompiledFlow(
+        profile=profile,
+        version=version,
+        greetings=_phrases(definition.get("greetings"), f"{profile}: greetings"),
+        closings=_phrases(definition.get("closings"), f"{profile}: closings"),
+        matcher=matcher,
+        state_names=state_names,
+        routes=tuple(routes),
+        defaults=tuple(defaults),
+        responses=responses,
+    )
+
+def load_flow(path: str) -> CompiledFlow:
+    """Compile one definition file; the version is a hash of its contents"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        definition = json.loads(raw)
+    except ValueError as e:
+        raise FlowDefinitionError(f"{path}: {e}")
+    return compile_flow(definition, hashlib.sha256(raw).hexdigest()[:12])
+
+class FlowRegistry:
+    """Current compiled flow per profile, reloaded when the files change"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or settings.FLOW_DEFINITIONS_DIR
+        self.flows: Dict[str, CompiledFlow] = {}
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._signature = None
+        self.reload()
+
+    def _paths(self) -> List[str]:
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        )
+
+    def _current_signature(self) -> tuple:
+        signature = []
+        for path in self._paths():
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get(self, profile: str) -> CompiledFlow:
+        """Compiled flow for a profile"""
+        try:
+            return self.flows[str(getattr(profile, "value", profile))]
+        except KeyError:
+            raise FlowDefinitionError(f"No flow defined for profile {profile!r}")
+
+    def reload(self) -> bool:
+        """Compile every definition and swap them in together
+
+        If any file fails to compile the previous flows stay active.
+        """
+        signature = self._current_signature()
+        flows = {}
+        try:
+            for path in self._paths():
+                flow = load_flow(path)
+                flows[flow.profile] = flow
+        except (OSError, FlowDefinitionError) as e:
+            self.failed_reloads += 1
+            self._signature = signature
+            if not self.flows:
+                raise
+            logger.error(f"Flow reload failed, keeping the previous definitions: {e}")
+            return False
+        # A single reference swap, so a call never sees a half-loaded set
+        self.flows = flows
+        self._signature = signature
+        self.reloads += 1
+        logger.info("Flows loaded: " + ", ".join(f"{f.profile}@{f.version}" for f in flows.values()))
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Reload when a definition file was added, removed or modified"""
+        if self._current_signature() == self._signature:
+            return False
+        return self.reload()
+
+    async def watch(self, on_reload: Optional[Callable[[], None]] = None, interval: float = None):
+        """Poll the definition files until cancelled"""
+        interval = interval or settings.FLOW_RELOAD_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.reload_if_changed() and on_reload is not None:
+                    on_reload()
+            except Exception as e:
+                logger.error(f"Error checking flow definitions: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            "flows": [flow.as_dict() for flow in self.flows.values()],
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
+
+flow_registry: Optional[FlowRegistry] = None
+
+def get_flow_registry() -> FlowRegistry:
+    """Get or create the flow registry"""
+    global flow_registry
+    if flow_registry is None:
+        flow_registry = FlowRegistry()
+    return flow_registry
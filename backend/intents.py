@@ -0,0 +1,54 @@
+"""Intents - Compiled keyword matching for conversation routing
+
+All keywords of a flow are compiled into one regular expression with a
+named group per intent (``i0``, ``i1``, ... so any intent name works), so a single scan of the transcript returns every
+intent it mentions. Keywords only match whole Dutch words:
+
+* ``moe`` matches "moe" but not "moeder" or "moeilijk"
+* ``sport*`` is a stem and matches "sport", "sporten", "sportschool"
+* ``mijn naam`` is a phrase; any run of whitespace separates its words
+* apostrophe contractions (``m'n``) and diacritics (``geïrriteerd``) are
+  part of the word
+"""
+import re
+from typing import Dict, Iterable, Set
+
+# Letters, digits and in-word apostrophes, e.g. "m'n", "zo'n"
+WORD_CHARS = r"[\w']"
+
+def _keyword_pattern(keyword: str) -> str:
+    stem = keyword.endswith("*")
+    words = keyword.rstrip("*").lower().split()
+    pattern = r"\s+".join(re.escape(word) for word in words)
+    if stem:
+        pattern += WORD_CHARS + "*"
+    return pattern
+
+class IntentMatcher:
+    """Finds the intents mentioned in a transcript in one pass"""
+
+    def __init__(self, intents: Dict[str, Iterable[str]]):
+        self.intents = {name: tuple(keywords) for name, keywords in intents.items()}
+        self._names: Dict[str, str] = {}
+        groups = []
+        initials = set()
+        for index, (name, keywords) in enumerate(self.intents.items()):
+            if not keywords or not all(keyword.rstrip("*").strip() for keyword in keywords):
+                raise ValueError(f"Intent {name!r} needs non-empty keywords")
+            group = f"i{index}"
+            self._names[group] = name
+            # Longest first so "mijn naam" wins over a shorter overlapping keyword
+            alternatives = sorted((_keyword_pattern(k) for k in keywords), key=len, reverse=True)
+            groups.append(f"(?P<{group}>{'|'.join(alternatives)})")
+            initials.update(keyword.strip()[0].lower() for keyword in keywords)
+        # The lookahead on the initial letters lets the scan skip most
+        # positions without trying every alternative; input is lowercased
+        # up front, which is cheaper than a case-insensitive pattern
+        self.pattern = re.compile(
+            rf"(?=[{re.escape(''.join(sorted(initials)))}])(?<!{WORD_CHARS})"
+            rf"(?:{'|'.join(groups)})(?!{WORD_CHARS})"
+        )
+
+    def match(self, text: str) -> Set[str]:
+        """Names of every intent with a keyword in ``text``"""
+        return {self._names[m.lastgroup] for m in self.pattern.finditer(text.lower())}
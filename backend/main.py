@@ -1,31 +1,94 @@
-from fastapi import FastAPI, WebSocket, Depends, HTTPException
+from fastapi import FastAPI, WebSocket, Depends, HTTPException, File, Form, Query, UploadFile
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from database import get_db, init_db
+from database import close_db, get_db, init_db
 from models import CallCreate, CallResponse, DashboardStatsResponse
 from conversation_flows import ConversationFlowManager, VoiceProfile
+from call_registry import get_call_registry
+from call_index import CallFilter, Cursor
+from call_stats import get_call_stats
+from transcript_search import get_transcript_search
+import asyncio
 import logging
-import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from config import settings
+from speech_engine import get_speech_executor, shutdown_speech_executor
+from tts_cache import get_tts_cache
+from voice_manager import get_voice_manager
+from prewarm import PrewarmState, get_prewarm_state, prewarm_prompts
+from flow_definitions import get_flow_registry
+from speculation import speculation_stats
+from ws_handler import barge_in_stats, handle_audio_stream, handle_routed_message, handle_websocket_call, manager
+from audio_codecs import INPUT_CODECS, AudioFormatError, negotiate, parse_format
+from batch_transcription import BatchTranscriber, save_results
 from contextlib import asynccontextmanager
+from typing import List, Optional
 
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-active_calls = {}
+async def start_prewarm() -> Optional[asyncio.Task]:
+    """Warm the TTS cache according to TTS_PREWARM_MODE"""
+    state = get_prewarm_state()
+    mode = settings.TTS_PREWARM_MODE
+    try:
+        voice_manager = get_voice_manager()
+    except Exception as e:
+        logger.error(f"Voice manager unavailable, skipping prewarm: {e}")
+        voice_manager = None
+    
+    if mode == "off" or voice_manager is None:
+        state.ready = True
+        return None
+    
+    if mode == "blocking":
+        await prewarm_prompts(voice_manager, state)
+        return None
+    return asyncio.create_task(prewarm_prompts(voice_manager, state))
+
+reload_prewarm_tasks = set()
+
+def on_flows_reloaded():
+    """Synthesize the phrases of reloaded flows before calls need them"""
+    if settings.TTS_PREWARM_MODE == "off":
+        return
+    task = asyncio.create_task(prewarm_prompts(get_voice_manager(), PrewarmState()))
+    reload_prewarm_tasks.add(task)
+    task.add_done_callback(reload_prewarm_tasks.discard)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """Initialize database, load flows and prewarm prompt audio on startup"""
     try:
         init_db()
+        flow_watch_task = asyncio.create_task(get_flow_registry().watch(on_flows_reloaded))
+        call_registry = get_call_registry()
+        if call_registry.writer is not None:
+            # Turns stored before the search index existed, then new ones as written
+            await asyncio.to_thread(get_transcript_search().catch_up)
+            call_registry.writer.start()
+        eviction_task = asyncio.create_task(call_registry.run_eviction())
+        # Calls ended and sockets taken over through other workers
+        call_state_task = asyncio.create_task(call_registry.listen(handle_routed_message))
+        prewarm_task = await start_prewarm()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Startup error: {e}")
         raise
     yield
     # Cleanup on shutdown
+    flow_watch_task.cancel()
+    eviction_task.cancel()
+    call_state_task.cancel()
+    if call_registry.writer is not None:
+        # Write the calls and turns still queued before the process exits
+        await call_registry.writer.close()
+    close_db()
+    for task in (prewarm_task, *reload_prewarm_tasks):
+        if task is not None and not task.done():
+            task.cancel()
+    shutdown_speech_executor()
     logger.info("Application shutting down")
 
 app = FastAPI(
@@ -48,86 +111,152 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Dutch AI Voice Assistant"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint - 503 until prompt audio is prewarmed"""
+    state = get_prewarm_state()
+    status_code = 200 if state.ready else 503
+    return JSONResponse(status_code=status_code, content=state.as_dict())
+
 @app.post("/calls", response_model=dict)
 async def create_call(call_data: CallCreate, db: Session = Depends(get_db)):
     """Create a new call session"""
     try:
-        call_id = str(uuid.uuid4())
+        audio_format = negotiate(call_data.input_formats, call_data.output_formats)
+    except AudioFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await get_call_registry().wait_for_capacity()
+    try:
         flow_manager = ConversationFlowManager(
             profile=VoiceProfile(call_data.voice_profile)
         )
-        active_calls[call_id] = {
-            "user_id": call_data.user_id,
-            "voice_profile": call_data.voice_profile,
-            "start_time": datetime.utcnow(),
-            "flow_manager": flow_manager,
-            "transcript": [],
-            "status": "active"
-        }
+        call = await get_call_registry().register(
+            call_data.user_id,
+            call_data.voice_profile,
+            flow_manager=flow_manager,
+            audio_format=audio_format
+        )
+        call_id = call["call_id"]
         logger.info(f"Call created: {call_id} for user {call_data.user_id}")
         return {
             "call_id": call_id,
             "status": "initiated",
-            "voice_profile": call_data.voice_profile
+            "voice_profile": call_data.voice_profile,
+            "audio_format": audio_format.as_dict()
         }
     except Exception as e:
         logger.error(f"Error creating call: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/calls")
-async def list_calls():
-    """List all active calls"""
+async def list_calls(
+    status: Optional[str] = None,
+    voice_profile: Optional[str] = None,
+    user_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """List calls newest first, one page at a time
+
+    Pass ``next_cursor`` from a response as ``cursor`` for the next page.
+    ``since`` and ``until`` bound the start time (UTC).
+    """
+    try:
+        position = Cursor.decode(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    registry = get_call_registry()
+    filters = CallFilter(status, voice_profile, user_id, naive_utc(since), naive_utc(until))
+    calls, next_cursor = await registry.list_calls(filters, limit, position)
+    stats = await registry.get_stats()
     return {
-        "active_calls": len(active_calls),
+        "active_calls": stats["active_calls"],
         "calls": [
             {
-                "call_id": call_id,
+                "call_id": call["call_id"],
                 "user_id": call["user_id"],
                 "voice_profile": call["voice_profile"],
-                "status": call["status"]
+                "status": call["status"],
+                "start_time": call["start_time"]
             }
-            for call_id, call in active_calls.items()
-        ]
+            for call in calls
+        ],
+        "next_cursor": next_cursor.encode() if next_cursor else None
     }
 
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Calls are timed in naive UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+async def find_call(call_id: str) -> dict:
+    """Registered call or a 404"""
+    call = await get_call_registry().get(call_id)
+    if call is None:
+        raise HTTPException(status_code=404, detail="Call not found")
+    return call
+
 @app.get("/calls/{call_id}")
 async def get_call(call_id: str):
     """Get specific call details"""
-    if call_id not in active_calls:
-        raise HTTPException(status_code=404, detail="Call not found")
-    
-    call = active_calls[call_id]
+    call = await find_call(call_id)
     return {
         "call_id": call_id,
         "user_id": call["user_id"],
         "voice_profile": call["voice_profile"],
         "status": call["status"],
         "start_time": call["start_time"],
-        "transcript_turns": len(call["transcript"])
+        "transcript_turns": len(call["transcript"]),
+        "audio_format": call["audio_format"].as_dict() if call["audio_format"] else None
     }
 
 @app.get("/calls/{call_id}/transcript")
 async def get_transcript(call_id: str):
     """Get call transcript"""
-    if call_id not in active_calls:
-        raise HTTPException(status_code=404, detail="Call not found")
-    
-    call = active_calls[call_id]
+    call = await find_call(call_id)
     return {
         "call_id": call_id,
-        "transcript": call["transcript"]
+        "transcript": call["transcript"].as_json()
+    }
+
+@app.get("/transcripts/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=1),
+    voice_profile: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search stored turns of all calls, best matches first
+
+    Words match their Dutch inflections, "quoted phrases" match words in
+    order. ``since`` and ``until`` bound the turn time (UTC). Turns are
+    searchable once the write-behind writer has stored them.
+    """
+    try:
+        results = await asyncio.to_thread(
+            get_transcript_search().search, q, voice_profile, naive_utc(since), naive_utc(until), limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "query": q,
+        "results": results
     }
 
 @app.delete("/calls/{call_id}")
 async def end_call(call_id: str):
     """End a call session"""
-    if call_id not in active_calls:
-        raise HTTPException(status_code=404, detail="Call not found")
-    
-    call = active_calls[call_id]
-    duration = (datetime.utcnow() - call["start_time"]).total_seconds()
-    call["status"] = "completed"
-    call["duration"] = duration
+    call = await find_call(call_id)
+    if call["status"] == "active":
+        call = await get_call_registry().complete(call_id)
+        # Tell the caller's socket, wherever it is connected
+        await manager.send_message(call_id, {"type": "call_ended", "call_id": call_id})
+    duration = call["duration"]
     
     logger.info(f"Call ended: {call_id}, duration: {duration}s")
     
@@ -137,29 +266,121 @@ async def end_call(call_id: str):
         "duration": duration
     }
 
+@app.post("/transcriptions/batch")
+async def batch_transcribe(
+    files: List[UploadFile] = File(...),
+    input_format: str = Form("pcm16/16000"),
+    voice_profile: str = Form("lifestyle"),
+    concurrency: Optional[int] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Transcribe recorded calls in parallel and store them as conversation turns"""
+    try:
+        audio_format = parse_format(input_format)
+    except ValueError:
+        audio_format = None
+    if audio_format is None or audio_format.codec not in INPUT_CODECS:
+        raise HTTPException(status_code=400, detail=f"Invalid input_format: {input_format}")
+    
+    recordings = [(upload.filename, await upload.read()) for upload in files]
+    transcriber = BatchTranscriber(get_voice_manager(), concurrency)
+    results = await transcriber.transcribe_recordings(recordings, audio_format)
+    
+    try:
+        await asyncio.to_thread(save_results, db, results, voice_profile, get_transcript_search())
+    except Exception as e:
+        logger.error(f"Error saving batch transcription: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "recordings": [result.as_dict() for result in results],
+        "audio_seconds": transcriber.audio_seconds,
+        "wall_seconds": transcriber.wall_seconds,
+        "throughput": transcriber.throughput
+    }
+
 @app.get("/stats", response_model=DashboardStatsResponse)
 async def get_stats():
     """Get dashboard statistics"""
-    total = len(active_calls)
-    active = sum(1 for c in active_calls.values() if c["status"] == "active")
-    completed = sum(1 for c in active_calls.values() if c["status"] == "completed")
-    
-    total_minutes = sum(
-        c.get("duration", 0) / 60
-        for c in active_calls.values()
-        if "duration" in c
-    )
+    stats = await get_call_registry().get_stats()
+    completed = stats["completed_calls"]
+    total_minutes = stats["total_duration"] / 60
     
-    avg_duration = total_minutes / max(completed, 1) if completed > 0 else 0
+    # Seconds, as the dashboard shows it
+    avg_duration = stats["total_duration"] / completed if completed > 0 else 0
     
     return DashboardStatsResponse(
-        total_calls=total,
-        active_calls=active,
+        total_calls=stats["total_calls"],
+        active_calls=stats["active_calls"],
         completed_calls=completed,
         average_duration=avg_duration,
         total_conversation_minutes=total_minutes
     )
 
+@app.get("/stats/persistence")
+async def get_persistence_stats():
+    """Get write-behind queue depth and write counters"""
+    registry = get_call_registry()
+    stats = registry.writer.get_stats() if registry.writer is not None else {"enabled": False}
+    stats["evicted_calls"] = registry.evicted
+    stats["retained_calls"] = len(registry)
+    return stats
+
+@app.get("/stats/distributions")
+async def get_stat_distributions(window: int = None):
+    """Get p50/p90/p99 of call and turn metrics per voice profile
+
+    ``window`` is in seconds (default STATS_DEFAULT_WINDOW) and may cover at
+    most STATS_SLOTS * STATS_SLOT_SECONDS.
+    """
+    window = window or settings.STATS_DEFAULT_WINDOW
+    span = settings.STATS_SLOTS * settings.STATS_SLOT_SECONDS
+    if not 0 < window <= span:
+        raise HTTPException(status_code=400, detail=f"window must be between 1 and {span} seconds")
+    return {
+        "window": window,
+        "metrics": get_call_stats().summary(window)
+    }
+
+@app.websocket("/ws/call/{call_id}")
+async def call_websocket(
+    websocket: WebSocket,
+    call_id: str,
+    voice_profile: str = "lifestyle",
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None
+):
+    """Text conversation channel for a call"""
+    await handle_websocket_call(websocket, call_id, voice_profile, input_format, output_format)
+
+@app.websocket("/ws/audio/{call_id}")
+async def audio_websocket(
+    websocket: WebSocket,
+    call_id: str,
+    voice_profile: str = "lifestyle",
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None
+):
+    """Streaming audio channel with live transcripts for a call"""
+    await handle_audio_stream(websocket, call_id, voice_profile, input_format, output_format)
+
+@app.get("/flows")
+async def get_flows():
+    """Get the loaded flow definitions and their versions"""
+    return get_flow_registry().get_stats()
+
+@app.get("/speech/stats")
+async def get_speech_stats():
+    """Get speech worker pool and TTS cache metrics"""
+    stats = get_speech_executor().get_stats()
+    stats["backend"] = get_voice_manager().backend.name
+    stats["tts_cache"] = get_tts_cache().get_stats()
+    stats["tts_stream"] = get_voice_manager().get_stream_stats()
+    stats["resilience"] = get_voice_manager().get_guard_stats()
+    stats["speculation"] = speculation_stats.as_dict()
+    stats["barge_in"] = barge_in_stats.as_dict()
+    return stats
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
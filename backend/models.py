@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Float, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Float, Integer, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from pydantic import BaseModel
@@ -23,6 +23,14 @@ class CallRecord(Base):
     audio_path = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Newest-first call listing, alone or filtered by one field
+    __table_args__ = (
+        Index("ix_calls_start", "start_time", "call_id"),
+        Index("ix_calls_status_start", "status", "start_time", "call_id"),
+        Index("ix_calls_profile_start", "voice_profile", "start_time", "call_id"),
+        Index("ix_calls_user_start", "user_id", "start_time", "call_id"),
+    )
 
 class ConversationTurn(Base):
     """Database model for conversation turns"""
@@ -34,6 +42,11 @@ class ConversationTurn(Base):
     text = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
     confidence = Column(Float, nullable=True)
+    
+    # Time bounds of transcript search
+    __table_args__ = (
+        Index("ix_turns_timestamp", "timestamp"),
+    )
 
 class VoiceProfile(Base):
     """Database model for voice profiles"""
@@ -51,6 +64,8 @@ class CallCreate(BaseModel):
     """Schema for creating a new call"""
     user_id: str
     voice_profile: str = "lifestyle"
+    input_formats: Optional[List[str]] = None  # e.g. ["mulaw/8000", "pcm16/16000"]
+    output_formats: Optional[List[str]] = None  # e.g. ["opus/48000", "mp3"]
 
 class ConversationTurnSchema(BaseModel):
     """Schema for conversation turn"""
@@ -0,0 +1,244 @@
+"""Persistence - Write-behind storage of calls and turns
+
+Call lifecycle changes and conversation turns are queued in memory by the
+``CallRegistry`` and written to the database by a background task, so the
+request path never waits on a commit. The writer flushes when
+``PERSIST_BATCH_SIZE`` events are queued or ``PERSIST_FLUSH_INTERVAL`` has
+passed, and writes each batch in one transaction with bulk statements:
+calls are upserted (a call created and completed within a batch is written
+once) and turns inserted, and added to the transcript search index
+(``transcript_search``) when the writer has one.
+
+Producers that can wait call ``wait_for_capacity`` before adding work;
+once ``PERSIST_MAX_QUEUE`` events are pending they are held back until the
+writer has drained the queue to half that.
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import CallRecord, ConversationTurn
+from transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+CALL_EVENT = "call"
+TURN_EVENT = "turn"
+
+def call_row(call: dict) -> dict:
+    """Column values of a registry call record"""
+    return {
+        "call_id": call["call_id"],
+        "user_id": call["user_id"],
+        "voice_profile": call["voice_profile"],
+        "status": call["status"],
+        "start_time": call["start_time"],
+        "end_time": call["end_time"],
+        "duration": call.get("duration", 0.0),
+        "transcript": call["transcript"].text() if call["status"] != "active" else "",
+    }
+
+def turn_row(call_id: str, transcript: Transcript, index: int) -> dict:
+    """Column values of one transcript turn"""
+    return {
+        "turn_id": str(uuid.uuid4()),
+        "call_id": call_id,
+        "role": transcript.role(index),
+        "text": transcript.utterance(index),
+        "confidence": transcript.confidence(index),
+        "timestamp": transcript.timestamp(index),
+    }
+
+def upsert_calls(db: Session, rows: List[dict]):
+    """Insert call rows, replacing existing rows with the same id"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(CallRecord)
+        columns = {name: statement.excluded[name] for name in rows[0] if name != "call_id"}
+        db.execute(statement.on_conflict_do_update(index_elements=["call_id"], set_=columns), rows)
+        return
+    existing = {
+        call_id for (call_id,) in
+        db.query(CallRecord.call_id).filter(CallRecord.call_id.in_([row["call_id"] for row in rows]))
+    }
+    new_rows = [row for row in rows if row["call_id"] not in existing]
+    if new_rows:
+        db.execute(insert(CallRecord), new_rows)
+    if len(new_rows) < len(rows):
+        db.execute(update(CallRecord), [row for row in rows if row["call_id"] in existing])
+
+class WriteBehindWriter:
+    """Queues call and turn events and writes them in batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_queue: int = None,
+        max_retries: int = None,
+        search=None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.PERSIST_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.PERSIST_FLUSH_INTERVAL
+        self.max_queue = max_queue or settings.PERSIST_MAX_QUEUE
+        self.max_retries = max_retries or settings.PERSIST_MAX_RETRIES
+        self.search = search
+        self._queue: deque = deque()
+        # Held while a batch is taken off the queue and written, so batches
+        # reach the database in queue order
+        self._write_lock = threading.Lock()
+        self._failures = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.calls_written = 0
+        self.turns_written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped_events = 0
+        self.backpressure_waits = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def call_changed(self, call: dict):
+        """Queue the current state of a call"""
+        self._submit((CALL_EVENT, call_row(call)))
+
+    def turn_added(self, call_id: str, transcript: Transcript, index: int):
+        """Queue a new turn"""
+        self._submit((TURN_EVENT, turn_row(call_id, transcript, index)))
+
+    def _submit(self, event: Tuple[str, dict]):
+        self._queue.append(event)
+        depth = len(self._queue)
+        self.max_depth = max(self.max_depth, depth)
+        if depth >= self.batch_size and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def wait_for_capacity(self):
+        """Hold the caller back while the queue is full"""
+        if self._task is None or len(self._queue) < self.max_queue:
+            return
+        self.backpressure_waits += 1
+        self._wakeup.set()
+        while len(self._queue) > self.max_queue // 2 and not self._task.done():
+            await asyncio.sleep(self.flush_interval / 10)
+
+    def _write_batch(self) -> int:
+        """Write up to one batch from the head of the queue"""
+        with self._write_lock:
+            events = []
+            while self._queue and len(events) < self.batch_size:
+                events.append(self._queue.popleft())
+            if not events:
+                return 0
+            calls: Dict[str, dict] = {}
+            turns = []
+            for kind, row in events:
+                if kind == CALL_EVENT:
+                    calls[row["call_id"]] = row  # the latest state wins
+                else:
+                    turns.append(row)
+            if turns and self.search is not None:
+                self.search.prepare()  # before the batch's transaction
+            db = self.session_factory()
+            try:
+                # Calls first, for the turns' foreign key
+                if calls:
+                    upsert_calls(db, list(calls.values()))
+                if turns:
+                    db.execute(insert(ConversationTurn), turns)
+                    if self.search is not None:
+                        self.search.index_turns(db, turns)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self._failures += 1
+                self.failed_batches += 1
+                if self._failures >= self.max_retries:
+                    logger.error(f"Dropping {len(events)} persistence events after {self._failures} failures: {e}")
+                    self.dropped_events += len(events)
+                    self._failures = 0
+                    return len(events)
+                # Back at the head of the queue, in order, for the next try
+                self._queue.extendleft(reversed(events))
+                raise
+            finally:
+                db.close()
+            self._failures = 0
+            self.batches += 1
+            self.calls_written += len(calls)
+            self.turns_written += len(turns)
+            return len(events)
+
+    async def flush(self) -> bool:
+        """Write everything queued so far; False if a batch failed"""
+        target = len(self._queue)
+        written = 0
+        while written < target and self._queue:
+            try:
+                written += await asyncio.to_thread(self._write_batch)
+            except Exception as e:
+                logger.warning(f"Persistence batch failed, will retry: {e}")
+                return False
+        return True
+
+    async def run(self):
+        """Flush on the size or time trigger until cancelled"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not await self.flush():
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self):
+        """Start the background writer on the running loop"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def close(self):
+        """Stop the background writer and write what is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        for _ in range(self.max_retries):
+            if await self.flush():
+                break
+        if self._queue:
+            logger.error(f"{len(self._queue)} persistence events were not written")
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "max_queued": self.max_depth,
+            "calls_written": self.calls_written,
+            "turns_written": self.turns_written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dropped_events": self.dropped_events,
+            "backpressure_waits": self.backpressure_waits,
+        }
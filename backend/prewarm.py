@@ -0,0 +1,112 @@
+"""Prewarm - Synthesizes static flow prompts at startup
+
+Every prompt is synthesized in each output format of TTS_PREWARM_FORMATS,
+since the cache keys audio by format and calls negotiate their own. The
+service is ready once the prewarm finished with at most
+TTS_PREWARM_MAX_FAILURE_RATE of the syntheses failed.
+"""
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from audio_codecs import AudioFormat, negotiate
+from config import settings
+from conversation_flows import VoiceProfile, get_static_prompts
+
+logger = logging.getLogger(__name__)
+
+class PrewarmState:
+    """Readiness and progress of the prompt prewarm"""
+
+    def __init__(self):
+        self.ready = False
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "ready": self.ready,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed": elapsed,
+        }
+
+def list_prompts() -> List[Tuple[str, str]]:
+    """Every (voice_profile, text) pair to prewarm"""
+    return [
+        (profile.value, text)
+        for profile in VoiceProfile
+        for text in get_static_prompts(profile)
+    ]
+
+def prewarm_formats(specs: str = None) -> List[AudioFormat]:
+    """Output formats to prewarm, as calls offering them negotiate them"""
+    specs = specs if specs is not None else settings.TTS_PREWARM_FORMATS
+    formats = []
+    for spec in specs.split(","):
+        if spec.strip():
+            audio_format = negotiate(None, [spec]).output
+            if audio_format not in formats:
+                formats.append(audio_format)
+    return formats
+
+async def prewarm_prompts(
+    voice_manager,
+    state: PrewarmState,
+    concurrency: int = None,
+    formats: List[AudioFormat] = None
+):
+    """Synthesize all static prompts so their audio sits in the TTS cache"""
+    formats = formats if formats is not None else prewarm_formats()
+    prompts = [(profile, text, audio_format) for audio_format in formats for profile, text in list_prompts()]
+    concurrency = concurrency or settings.TTS_PREWARM_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    state.total = len(prompts)
+    state.completed = 0
+    state.failed = 0
+    state.started_at = time.monotonic()
+    log_every = max(1, state.total // 10)
+
+    logger.info(
+        f"Prewarming {state.total} prompts in {', '.join(map(str, formats))} (concurrency {concurrency})"
+    )
+
+    async def warm(voice_profile: str, text: str, audio_format: AudioFormat):
+        async with semaphore:
+            try:
+                await voice_manager.synthesize_speech(text, voice_profile, audio_format=audio_format)
+            except Exception as e:
+                state.failed += 1
+                logger.warning(f"Prewarm failed for '{text[:40]}': {e}")
+            finally:
+                state.completed += 1
+                if state.completed % log_every == 0 or state.completed == state.total:
+                    logger.info(f"Prewarm progress: {state.completed}/{state.total}")
+
+    await asyncio.gather(*(warm(*prompt) for prompt in prompts))
+
+    state.finished_at = time.monotonic()
+    state.ready = state.failed <= state.total * settings.TTS_PREWARM_MAX_FAILURE_RATE
+    logger.info(
+        f"Prewarm finished in {state.finished_at - state.started_at:.2f}s "
+        f"({state.failed} failed)"
+    )
+    if not state.ready:
+        logger.error(f"Prewarm failed for {state.failed}/{state.total} prompts; not ready")
+
+_prewarm_state: Optional[PrewarmState] = None
+
+def get_prewarm_state() -> PrewarmState:
+    """Get or create prewarm state instance"""
+    global _prewarm_state
+    if _prewarm_state is None:
+        _prewarm_state = PrewarmState()
+    return _prewarm_state
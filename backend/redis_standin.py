@@ -0,0 +1,242 @@
+"""Redis Stand-in - Small Redis-protocol server for development and tests
+
+Implements the commands ``RedisCallState`` uses (strings, hashes, lists,
+key expiry and pub/sub) in one asyncio process, so several API workers can
+share call state on a machine without Redis:
+
+    python backend/redis_standin.py --port 6379
+    CALL_STATE_BACKEND=redis uvicorn main:app --workers 4
+
+It keeps everything in memory and is not a replacement for Redis in
+production.
+"""
+import argparse
+import asyncio
+import fnmatch
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class RespWriter:
+    """Encodes replies onto a client's stream"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    def simple(self, value: str):
+        self.writer.write(b"+%s\r\n" % value.encode())
+
+    def error(self, message: str):
+        self.writer.write(b"-ERR %s\r\n" % message.encode())
+
+    def integer(self, value: int):
+        self.writer.write(b":%d\r\n" % value)
+
+    def bulk(self, value: Optional[str]):
+        if value is None:
+            self.writer.write(b"$-1\r\n")
+        else:
+            data = value.encode()
+            self.writer.write(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    def array(self, values: List[Optional[str]]):
+        self.writer.write(b"*%d\r\n" % len(values))
+        for value in values:
+            self.bulk(value)
+
+class RedisStandIn:
+    """In-memory keyspace with expiry and pub/sub channels"""
+
+    def __init__(self):
+        self.data: Dict[str, object] = {}
+        self.expires: Dict[str, float] = {}
+        self.channels: Dict[str, Set[RespWriter]] = {}
+        self.clients: Set[asyncio.Task] = set()
+        self.server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Listen for clients; returns the port"""
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening and disconnect every client"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in list(self.clients):
+            task.cancel()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+
+    def _live(self, key: str):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            del self.expires[key]
+        return self.data.get(key)
+
+    def _delete(self, key: str) -> int:
+        self.expires.pop(key, None)
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[str]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.decode().split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2].decode())
+        return args
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        reply = RespWriter(writer)
+        task = asyncio.current_task()
+        self.clients.add(task)
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    self._execute(args, reply)
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(task)
+            for subscribers in self.channels.values():
+                subscribers.discard(reply)
+            writer.close()
+
+    def _execute(self, args: List[str], reply: RespWriter):
+        name, args = args[0].upper(), args[1:]
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            reply.error(f"unknown command '{name}'")
+            return
+        try:
+            handler(args, reply)
+        except (IndexError, ValueError) as e:
+            reply.error(f"wrong arguments for '{name}': {e}")
+
+    def _hash(self, key: str) -> dict:
+        value = self._live(key)
+        if value is None:
+            value = self.data[key] = {}
+        return value
+
+    def cmd_ping(self, args, reply):
+        reply.simple("PONG")
+
+    def cmd_select(self, args, reply):
+        reply.simple("OK")
+
+    def cmd_get(self, args, reply):
+        reply.bulk(self._live(args[0]))
+
+    def cmd_set(self, args, reply):
+        key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+        if "NX" in options and self._live(key) is not None:
+            reply.bulk(None)
+            return
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if "EX" in options:
+            self.expires[key] = time.monotonic() + float(args[2 + options.index("EX") + 1])
+        reply.simple("OK")
+
+    def cmd_del(self, args, reply):
+        reply.integer(sum(self._delete(key) for key in args if self._live(key) is not None))
+
+    def cmd_expire(self, args, reply):
+        if self._live(args[0]) is None:
+            reply.integer(0)
+            return
+        self.expires[args[0]] = time.monotonic() + float(args[1])
+        reply.integer(1)
+
+    def cmd_ttl(self, args, reply):
+        if self._live(args[0]) is None:
+            reply.integer(-2)
+        elif args[0] not in self.expires:
+            reply.integer(-1)
+        else:
+            reply.integer(int(self.expires[args[0]] - time.monotonic()))
+
+    def cmd_keys(self, args, reply):
+        reply.array([key for key in list(self.data) if self._live(key) is not None and fnmatch.fnmatchcase(key, args[0])])
+
+    def cmd_hset(self, args, reply):
+        fields = self._hash(args[0])
+        added = 0
+        for field, value in zip(args[1::2], args[2::2]):
+            added += field not in fields
+            fields[field] = value
+        reply.integer(added)
+
+    def cmd_hget(self, args, reply):
+        reply.bulk((self._live(args[0]) or {}).get(args[1]))
+
+    def cmd_hgetall(self, args, reply):
+        fields = self._live(args[0]) or {}
+        reply.array([item for pair in fields.items() for item in pair])
+
+    def cmd_hincrby(self, args, reply):
+        fields = self._hash(args[0])
+        fields[args[1]] = str(int(fields.get(args[1], "0")) + int(args[2]))
+        reply.integer(int(fields[args[1]]))
+
+    def cmd_hincrbyfloat(self, args, reply):
+        fields = self._hash(args[0])
+        fields[args[1]] = repr(float(fields.get(args[1], "0")) + float(args[2]))
+        reply.bulk(fields[args[1]])
+
+    def cmd_rpush(self, args, reply):
+        values = self._live(args[0])
+        if values is None:
+            values = self.data[args[0]] = []
+        values.extend(args[1:])
+        reply.integer(len(values))
+
+    def cmd_lrange(self, args, reply):
+        values = self._live(args[0]) or []
+        start, stop = int(args[1]), int(args[2])
+        stop = len(values) if stop == -1 else stop + 1
+        reply.array(values[start:stop])
+
+    def cmd_publish(self, args, reply):
+        subscribers = self.channels.get(args[0], set())
+        for subscriber in subscribers:
+            subscriber.array(["message", args[0], args[1]])
+        reply.integer(len(subscribers))
+
+    def cmd_subscribe(self, args, reply):
+        for count, channel in enumerate(args, 1):
+            self.channels.setdefault(channel, set()).add(reply)
+            reply.writer.write(b"*3\r\n")
+            reply.bulk("subscribe")
+            reply.bulk(channel)
+            reply.integer(count)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def serve():
+        standin = RedisStandIn()
+        port = await standin.start(args.host, args.port)
+        logger.info(f"Redis stand-in listening on {args.host}:{port}")
+        await standin.server.serve_forever()
+
+    asyncio.run(serve())
+
+if __name__ == "__main__":
+    main()
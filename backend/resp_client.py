@@ -0,0 +1,169 @@
+"""RESP Client - Minimal client for Redis-protocol servers
+
+Just what ``RedisCallState`` needs: blocking commands, sent one at a time
+or pipelined, and an asyncio subscription to pub/sub channels. Speaks
+RESP2, so it works with Redis, Valkey, KeyDB and the local
+``redis_standin``.
+"""
+import asyncio
+import socket
+import threading
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+class RespError(RuntimeError):
+    """Error reply from the server"""
+
+def parse_url(url: str) -> Tuple[str, int, int, Optional[str]]:
+    """(host, port, db, password) of a redis:// URL"""
+    parts = urlparse(url)
+    if parts.scheme != "redis":
+        raise ValueError(f"Unsupported call state URL: {url}")
+    db = int(parts.path.lstrip("/") or 0)
+    return parts.hostname or "localhost", parts.port or 6379, db, parts.password
+
+def encode(args: Sequence) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        else:
+            data = repr(arg).encode() if isinstance(arg, float) else str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+def _decode_line(line: bytes, read_line, read_exact):
+    if not line:
+        raise ConnectionError("Connection closed by the server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        return None if size < 0 else read_exact(size + 2)[:-2].decode()
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [_decode_line(read_line(), read_line, read_exact) for _ in range(size)]
+    raise RespError(f"Malformed reply: {line!r}")
+
+class RespConnection:
+    """A blocking connection; safe to share between threads"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self):
+        host, port, db, password = parse_url(self.url)
+        self._sock = socket.create_connection((host, port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        setup = []
+        if password:
+            setup.append(("AUTH", password))
+        if db:
+            setup.append(("SELECT", db))
+        if setup:
+            self._sock.sendall(b"".join(encode(command) for command in setup))
+            for _ in setup:
+                reply = _decode_line(self._file.readline(), self._file.readline, self._file.read)
+                if isinstance(reply, RespError):
+                    raise reply
+
+    def _send(self, commands: Sequence[Sequence]):
+        payload = b"".join(encode(command) for command in commands)
+        if self._sock is not None:
+            try:
+                self._sock.sendall(payload)
+                return
+            except OSError:
+                self.close_socket()  # stale connection; nothing was sent
+        self._connect()
+        self._sock.sendall(payload)
+
+    def _roundtrip(self, commands: Sequence[Sequence]) -> List:
+        self._send(commands)
+        read_line, read_exact = self._file.readline, self._file.read
+        return [_decode_line(read_line(), read_line, read_exact) for _ in commands]
+
+    def pipeline(self, commands: Sequence[Sequence]) -> List:
+        """Send commands in one write and return their replies in order
+
+        Error replies are returned as ``RespError`` values, not raised.
+        """
+        with self._lock:
+            try:
+                return self._roundtrip(commands)
+            except (OSError, ValueError) as e:
+                self.close_socket()
+                raise ConnectionError(f"Call state server {self.url} unreachable: {e}") from e
+
+    def execute(self, *args):
+        """Run one command and return its reply"""
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def close_socket(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+    def close(self):
+        with self._lock:
+            self.close_socket()
+
+async def subscribe(url: str, channel: str, handler: Callable[[str], Awaitable[None]], ready: asyncio.Event = None):
+    """Call ``handler`` with every message published on ``channel``
+
+    Runs until cancelled; ``ready`` is set once the subscription is live.
+    """
+    host, port, _, password = parse_url(url)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        if password:
+            writer.write(encode(("AUTH", password)))
+        writer.write(encode(("SUBSCRIBE", channel)))
+        await writer.drain()
+
+        async def read_reply():
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Call state server closed the subscription")
+            kind, rest = line[:1], line[1:-2]
+            if kind == b"*":
+                return [await read_reply() for _ in range(int(rest))]
+            if kind == b"$":
+                size = int(rest)
+                return None if size < 0 else (await reader.readexactly(size + 2))[:-2].decode()
+            if kind == b":":
+                return int(rest)
+            if kind == b"-":
+                raise RespError(rest.decode())
+            return rest.decode()
+
+        while True:
+            reply = await read_reply()
+            if not isinstance(reply, list) or not reply:
+                continue
+            if reply[0] == "subscribe":
+                if ready is not None:
+                    ready.set()
+            elif reply[0] == "message" and reply[1] == channel:
+                await handler(reply[2])
+    finally:
+        writer.close()
@@ -0,0 +1,121 @@
+"""Speculation - Synthesize likely next replies while the caller speaks
+
+After each assistant turn the flow knows which canned replies the next turn
+can produce (``ConversationFlowManager.likely_responses``). A call's
+``Speculator`` synthesizes the most likely ones into the TTS cache right
+away, so when the caller's transcript arrives the reply is a cache hit (or
+joins the synthesis already in flight) instead of a fresh TTS request.
+
+Each call has a budget of speculative syntheses, and every speculated
+phrase is scored as a hit (it was the next reply) or waste (it was not).
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from config import settings
+from audio_codecs import AudioFormat
+
+logger = logging.getLogger(__name__)
+
+class SpeculationStats:
+    """Process-wide speculation counters"""
+
+    def __init__(self):
+        self.issued = 0
+        self.already_cached = 0
+        self.hits = 0
+        self.wasted = 0
+        self.failed = 0
+        self.budget_exhausted = 0
+
+    def as_dict(self) -> dict:
+        scored = self.hits + self.wasted
+        return {
+            "issued": self.issued,
+            "already_cached": self.already_cached,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "failed": self.failed,
+            "budget_exhausted": self.budget_exhausted,
+            "hit_rate": self.hits / scored if scored else 0.0,
+        }
+
+speculation_stats = SpeculationStats()
+
+class Speculator:
+    """Speculative synthesis for one call"""
+
+    def __init__(
+        self,
+        voice_manager,
+        flow,
+        audio_format: Optional[AudioFormat] = None,
+        budget: int = None,
+        per_turn: int = None,
+        stats: SpeculationStats = None,
+    ):
+        self.voice_manager = voice_manager
+        self.flow = flow
+        self.audio_format = audio_format
+        self.remaining = budget if budget is not None else settings.SPECULATION_BUDGET_PER_CALL
+        self.per_turn = per_turn or settings.SPECULATION_MAX_PER_TURN
+        self.stats = stats or speculation_stats
+        self.hits = 0
+        self.wasted = 0
+        self._pending: Set[str] = set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def speculate(self) -> List[str]:
+        """Start synthesizing the likely next replies, returns the phrases issued"""
+        issued = []
+        profile = self.flow.profile.value
+        for text in self.flow.likely_responses():
+            if len(issued) >= self.per_turn:
+                break
+            if text in self._pending:
+                continue
+            if self.voice_manager.is_cached(text, profile, self.audio_format):
+                self.stats.already_cached += 1
+                continue
+            if self.remaining <= 0:
+                self.stats.budget_exhausted += 1
+                break
+            self.remaining -= 1
+            self.stats.issued += 1
+            self._pending.add(text)
+            self._tasks[text] = asyncio.create_task(self._synthesize(text, profile))
+            issued.append(text)
+        return issued
+
+    async def _synthesize(self, text: str, profile: str):
+        try:
+            await self.voice_manager.synthesize_speech(text, profile, audio_format=self.audio_format)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.failed += 1
+            logger.debug(f"Speculative synthesis failed: {e}")
+        finally:
+            self._tasks.pop(text, None)
+
+    def record_reply(self, text: str):
+        """Score outstanding speculation against the reply actually sent"""
+        if not self._pending:
+            return
+        if text in self._pending:
+            self.hits += 1
+            self.stats.hits += 1
+        wasted = len(self._pending - {text})
+        self.wasted += wasted
+        self.stats.wasted += wasted
+        self._pending.clear()
+
+    def close(self):
+        """Stop speculating for a call that ended; unused phrases are waste"""
+        self.record_reply("")
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "wasted": self.wasted, "budget_left": self.remaining}
@@ -0,0 +1,332 @@
+"""Speech Backends - Pluggable TTS/STT providers
+
+``VoiceManager`` talks to a ``SpeechBackend``; the backend methods are
+blocking and always run through the ``SpeechExecutor``. Two backends exist:
+
+* ``GoogleSpeechBackend`` - Google Cloud Text-to-Speech and Speech-to-Text
+* ``SimulatedSpeechBackend`` - a deterministic local stand-in with realistic
+  audio sizes, configurable latency and error rates, for load tests and
+  benchmarks that must run offline
+"""
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from config import settings
+from audio_codecs import (
+    AudioFormat, STT_ENCODINGS, TTS_ENCODINGS,
+    mulaw_decode, mulaw_encode, strip_wav_header
+)
+from speech_stream import StreamingRecognizer, TranscriptResult
+
+logger = logging.getLogger(__name__)
+
+class SpeechBackendError(RuntimeError):
+    """Raised when a backend request fails"""
+
+class VoiceParams(NamedTuple):
+    """Voice selection for one synthesis request"""
+    language: str
+    name: str
+    pitch: float
+    rate: float
+
+def voice_params(voice_profile: str) -> VoiceParams:
+    """Resolve a voice profile name to the voice it is synthesized with"""
+    profile = settings.VOICE_PROFILES.get(voice_profile, settings.VOICE_PROFILES["lifestyle"])
+    name = f"{settings.SPEECH_LANGUAGE}-Neural2-{'F' if profile['gender'] == 'FEMALE' else 'M'}"
+    return VoiceParams(settings.SPEECH_LANGUAGE, name, profile["pitch"], profile["rate"])
+
+class SpeechBackend:
+    """Interface every speech provider implements"""
+
+    name = "base"
+
+    def synthesize(self, text: str, voice: VoiceParams, audio_format: AudioFormat) -> bytes:
+        """Synthesize ``text``, returning raw frames for PCM codecs"""
+        raise NotImplementedError
+
+    def recognize(self, audio: bytes, audio_format: AudioFormat) -> Tuple[str, float]:
+        """Transcribe one utterance, returning (transcript, confidence)"""
+        raise NotImplementedError
+
+    def create_stream(self, audio_format: AudioFormat, interim_results: bool = True) -> StreamingRecognizer:
+        """Create an incremental recognizer for live call audio"""
+        raise NotImplementedError
+
+class GoogleSpeechBackend(SpeechBackend):
+    """Google Cloud Text-to-Speech and Speech-to-Text
+
+    Raises ImportError when the client libraries are not installed.
+    """
+
+    name = "google"
+
+    def __init__(self):
+        from google.cloud import texttospeech, speech_v1
+        import os
+
+        # Set credentials from environment
+        if os.path.exists(settings.GOOGLE_CLOUD_CREDENTIALS):
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.GOOGLE_CLOUD_CREDENTIALS
+
+        self.tts_client = texttospeech.TextToSpeechClient()
+        self.stt_client = speech_v1.SpeechClient()
+
+    def synthesize(self, text: str, voice: VoiceParams, audio_format: AudioFormat) -> bytes:
+        from google.cloud import texttospeech
+
+        response = self.tts_client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(
+                language_code=voice.language,
+                name=voice.name,
+            ),
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=getattr(texttospeech.AudioEncoding, TTS_ENCODINGS[audio_format.codec]),
+                sample_rate_hertz=audio_format.sample_rate or 0,
+                pitch=voice.pitch,
+                speaking_rate=voice.rate,
+            ),
+        )
+        audio = response.audio_content
+        if audio_format.codec in ("pcm16", "mulaw"):
+            # Frames are streamed raw, so drop the WAV container
+            audio = strip_wav_header(audio)
+        return audio
+
+    def recognize(self, audio: bytes, audio_format: AudioFormat) -> Tuple[str, float]:
+        from google.cloud import speech_v1
+
+        config = speech_v1.RecognitionConfig(
+            encoding=getattr(speech_v1.RecognitionConfig.AudioEncoding, STT_ENCODINGS[audio_format.codec]),
+            sample_rate_hertz=audio_format.sample_rate or settings.SAMPLE_RATE,
+            language_code=settings.SPEECH_LANGUAGE,
+            enable_automatic_punctuation=True,
+        )
+        response = self.stt_client.recognize(
+            config=config,
+            audio=speech_v1.RecognitionAudio(content=audio),
+        )
+        if response.results:
+            result = response.results[0]
+            if result.alternatives:
+                return result.alternatives[0].transcript, float(result.alternatives[0].confidence)
+        return "", 0.0
+
+    def create_stream(self, audio_format: AudioFormat, interim_results: bool = True) -> StreamingRecognizer:
+        return StreamingRecognizer(
+            stt_client=self.stt_client,
+            sample_rate=audio_format.sample_rate,
+            interim_results=interim_results,
+            encoding=STT_ENCODINGS[audio_format.codec],
+        )
+
+class LatencyDistribution:
+    """Request latency model parsed from a spec string
+
+    * ``fixed:MS``
+    * ``uniform:LOW_MS:HIGH_MS``
+    * ``lognormal:MEDIAN_MS:P95_MS`` - the usual long-tailed shape of
+      network service latency
+    """
+
+    def __init__(self, spec: str):
+        kind, *params = spec.strip().lower().split(":")
+        try:
+            values = [float(p) / 1000 for p in params]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds"""
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.values)
+        median, p95 = self.values
+        if median <= 0:
+            return 0.0
+        sigma = math.log(p95 / median) / 1.645 if p95 > median else 0.0
+        return rng.lognormvariate(math.log(median), sigma)
+
+# Caller utterances the simulator "hears", covering both conversation flows
+SIMULATED_UTTERANCES = (
+    "Ik heb de laatste tijd veel stress op mijn werk.",
+    "Ik slaap erg slecht, ik word elke nacht wakker.",
+    "Het gaat eigenlijk best goed met me.",
+    "Ik wil graag vaker gaan sporten.",
+    "Mijn naam is Jan de Vries.",
+    "Ja, dat klopt.",
+    "Ik wil graag een afspraak maken.",
+    "Kan ik een medewerker spreken?",
+    "Ik heb een vraag over mijn factuur.",
+    "Dank je wel, tot ziens.",
+)
+
+# Bytes per second of Google's compressed output
+COMPRESSED_BYTE_RATES = {"mp3": 4000, "opus": 3000}
+
+class SimulatedSpeechBackend(SpeechBackend):
+    """Deterministic offline speech backend
+
+    Synthesis returns audio of the size Google would return for the text at
+    the voice's speaking rate: a voiced PCM waveform for pcm16 and mulaw (so
+    VAD and recognition downstream behave as with real speech) and opaque
+    bytes at Google's bitrate for mp3 and opus. Recognition picks a Dutch
+    utterance from a fixed list by hashing the audio, and returns nothing
+    for silence. Output depends only on the input; latencies and failures
+    are drawn from an RNG seeded with ``seed``.
+
+    Calls sleep in the worker thread like a blocking client would, so the
+    speech pool's limits and timeouts see realistic load.
+    """
+
+    name = "simulator"
+
+    def __init__(
+        self,
+        tts_latency: str = None,
+        stt_latency: str = None,
+        tts_error_rate: float = None,
+        stt_error_rate: float = None,
+        seed: int = None,
+        chars_per_second: float = None,
+    ):
+        self.tts_latency = LatencyDistribution(tts_latency or settings.SIMULATOR_TTS_LATENCY)
+        self.stt_latency = LatencyDistribution(stt_latency or settings.SIMULATOR_STT_LATENCY)
+        self.tts_error_rate = settings.SIMULATOR_TTS_ERROR_RATE if tts_error_rate is None else tts_error_rate
+        self.stt_error_rate = settings.SIMULATOR_STT_ERROR_RATE if stt_error_rate is None else stt_error_rate
+        self.chars_per_second = chars_per_second or settings.SIMULATOR_CHARS_PER_SECOND
+        self._rng = random.Random(settings.SIMULATOR_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def _wait(self, latency: LatencyDistribution, error_rate: float, operation: str):
+        with self._lock:
+            delay = latency.sample(self._rng)
+            failed = self._rng.random() < error_rate
+        time.sleep(delay)
+        if failed:
+            raise SpeechBackendError(f"Simulated {operation} failure")
+
+    def synthesize(self, text: str, voice: VoiceParams, audio_format: AudioFormat) -> bytes:
+        self._wait(self.tts_latency, self.tts_error_rate, "TTS")
+        seconds = max(len(text) / (self.chars_per_second * (voice.rate or 1.0)), 0.3)
+        seed = zlib.crc32(text.encode("utf-8"))
+
+        if audio_format.codec in COMPRESSED_BYTE_RATES:
+            size = int(seconds * COMPRESSED_BYTE_RATES[audio_format.codec])
+            return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+        rate = audio_format.sample_rate or settings.SAMPLE_RATE
+        samples = self._voiced(seconds, rate, 110 + seed % 110)
+        if audio_format.codec == "mulaw":
+            return mulaw_encode(samples)
+        return samples.astype("<i2").tobytes()
+
+    @staticmethod
+    def _voiced(seconds: float, rate: int, pitch: float) -> np.ndarray:
+        """Harmonic tone with a syllable-rate envelope and short pauses"""
+        t = np.arange(int(seconds * rate)) / rate
+        tone = (np.sin(2 * np.pi * pitch * t)
+                + 0.5 * np.sin(4 * np.pi * pitch * t)
+                + 0.25 * np.sin(6 * np.pi * pitch * t))
+        envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0.2, 1.0)
+        return (5000 * tone * envelope).astype(np.int16)
+
+    def recognize(self, audio: bytes, audio_format: AudioFormat) -> Tuple[str, float]:
+        self._wait(self.stt_latency, self.stt_error_rate, "STT")
+        if not self._has_speech(audio, audio_format):
+            return "", 0.0
+        digest = zlib.crc32(audio)
+        text = SIMULATED_UTTERANCES[digest % len(SIMULATED_UTTERANCES)]
+        return text, 0.80 + (digest >> 16) % 19 / 100
+
+    @staticmethod
+    def _has_speech(audio: bytes, audio_format: AudioFormat) -> bool:
+        if audio_format.codec == "opus":
+            return len(audio) > 0
+        if audio_format.codec == "mulaw":
+            samples = mulaw_decode(audio)
+        else:
+            samples = np.frombuffer(audio, dtype="<i2", count=len(audio) // 2)
+        if len(samples) == 0:
+            return False
+        rms = np.sqrt(np.mean(samples.astype(np.float64) ** 2))
+        return rms >= settings.VAD_ENERGY_THRESHOLD
+
+    def create_stream(self, audio_format: AudioFormat, interim_results: bool = True) -> StreamingRecognizer:
+        return StreamingRecognizer(
+            stt_client=SimulatedStreamClient(self, audio_format),
+            sample_rate=audio_format.sample_rate,
+            interim_results=interim_results,
+            encoding=STT_ENCODINGS[audio_format.codec],
+        )
+
+class SimulatedStreamClient:
+    """Streaming recognition through a SimulatedSpeechBackend
+
+    Every half second of audio yields an interim result, and each utterance
+    a final one, from the backend's ``recognize``: each result takes its STT
+    latency, can fail at its error rate (ending the stream, as a dropped
+    Google stream would), and silence yields nothing.
+    """
+
+    INTERIM_SECONDS = 0.5
+
+    def __init__(self, backend: SimulatedSpeechBackend, audio_format: AudioFormat):
+        self.backend = backend
+        self.audio_format = audio_format
+        rate = audio_format.sample_rate or settings.SAMPLE_RATE
+        bytes_per_second = {"pcm16": 2 * rate, "mulaw": rate}.get(audio_format.codec, COMPRESSED_BYTE_RATES["opus"])
+        self.interim_bytes = max(1, int(bytes_per_second * self.INTERIM_SECONDS))
+
+    def transcripts(self, frames: Iterable[bytes], interim_results: bool) -> Iterator[TranscriptResult]:
+        """Results for one utterance's frames"""
+        audio = bytearray()
+        next_interim = self.interim_bytes
+        for frame in frames:
+            audio += frame
+            if interim_results and len(audio) >= next_interim:
+                next_interim += self.interim_bytes
+                text, confidence = self.backend.recognize(bytes(audio), self.audio_format)
+                if text:
+                    yield TranscriptResult(text, confidence, False)
+        if audio:
+            text, confidence = self.backend.recognize(bytes(audio), self.audio_format)
+            if text:
+                yield TranscriptResult(text, confidence, True)
+
+BACKENDS = {
+    "google": GoogleSpeechBackend,
+    "simulator": SimulatedSpeechBackend,
+}
+
+def create_backend(name: str = None) -> SpeechBackend:
+    """Create the backend named by SPEECH_BACKEND
+
+    ``auto`` uses Google when its client libraries are installed and the
+    simulator otherwise.
+    """
+    name = (name or settings.SPEECH_BACKEND).lower()
+    if name == "auto":
+        try:
+            return GoogleSpeechBackend()
+        except ImportError:
+            logger.warning("Google Cloud libraries not installed. Using the speech simulator.")
+            return SimulatedSpeechBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend: {name}")
+    return BACKENDS[name]()
@@ -0,0 +1,182 @@
+"""Speech Engine - Runs blocking TTS/STT client calls off the event loop"""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class SpeechTimeoutError(Exception):
+    """Raised when a speech operation exceeds its deadline"""
+
+class OperationStats:
+    """Counters for one kind of speech operation"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "average_latency": self.total_latency / finished if finished else 0.0,
+        }
+
+class SpeechExecutor:
+    """Bounded worker pool with per-operation concurrency limits and timeouts
+
+    The Google clients are synchronous, so every call is handed to a thread
+    pool. Each operation ("tts", "stt", ...) gets its own semaphore so a burst
+    of synthesis requests cannot starve recognition, and its own deadline.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        limits: Dict[str, int] = None,
+        timeouts: Dict[str, float] = None,
+    ):
+        self.max_workers = max_workers or settings.SPEECH_MAX_WORKERS
+        self.limits = limits if limits is not None else {
+            "tts": settings.TTS_MAX_CONCURRENCY,
+            "stt": settings.STT_MAX_CONCURRENCY,
+        }
+        self.timeouts = timeouts if timeouts is not None else {
+            "tts": settings.TTS_TIMEOUT,
+            "stt": settings.STT_TIMEOUT,
+        }
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="speech",
+        )
+        self._stats: Dict[str, OperationStats] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        """Get the semaphore for an operation on the running loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores bind to the loop they are first used on
+            self._loop = loop
+            self._semaphores = {}
+        if operation not in self._semaphores:
+            limit = self.limits.get(operation, self.max_workers)
+            self._semaphores[operation] = asyncio.Semaphore(limit)
+        return self._semaphores[operation]
+
+    def _operation_stats(self, operation: str) -> OperationStats:
+        if operation not in self._stats:
+            self._stats[operation] = OperationStats()
+        return self._stats[operation]
+
+    async def run(
+        self,
+        operation: str,
+        func: Callable[..., Any],
+        *args,
+        timeout: float = None,
+        **kwargs,
+    ) -> Any:
+        """Run a blocking callable in the pool under the operation's limits"""
+        loop = asyncio.get_running_loop()
+        stats = self._operation_stats(operation)
+        semaphore = self._semaphore(operation)
+        deadline = timeout if timeout is not None else self.timeouts.get(operation)
+        started = time.perf_counter()
+
+        stats.submitted += 1
+        stats.queued += 1
+        stats.max_queue_depth = max(stats.max_queue_depth, stats.queued)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            stats.failed += 1
+            raise SpeechTimeoutError(f"{operation} queued longer than {deadline}s")
+        finally:
+            stats.queued -= 1
+
+        stats.in_flight += 1
+        future = loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+
+        def _release(fut: asyncio.Future):
+            # The worker thread cannot be interrupted, so the slot is only
+            # freed once it actually returns, even after a timeout.
+            semaphore.release()
+            stats.in_flight -= 1
+            if not fut.cancelled():
+                fut.exception()
+
+        future.add_done_callback(_release)
+
+        remaining = None
+        if deadline is not None:
+            remaining = max(deadline - (time.perf_counter() - started), 0.0)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=remaining)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            stats.failed += 1
+            stats.total_latency += time.perf_counter() - started
+            raise SpeechTimeoutError(f"{operation} exceeded {deadline}s deadline")
+        except Exception:
+            stats.failed += 1
+            stats.total_latency += time.perf_counter() - started
+            raise
+
+        stats.completed += 1
+        stats.total_latency += time.perf_counter() - started
+        return result
+
+    def has_capacity(self, operation: str) -> bool:
+        """Whether a new call would start without queueing"""
+        return not self._semaphore(operation).locked()
+
+    def get_stats(self) -> dict:
+        """Get queue depth and latency metrics per operation"""
+        return {
+            "max_workers": self.max_workers,
+            "limits": dict(self.limits),
+            "operations": {
+                operation: stats.as_dict()
+                for operation, stats in self._stats.items()
+            },
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        self._pool.shutdown(wait=wait)
+
+_speech_executor: Optional[SpeechExecutor] = None
+
+def get_speech_executor() -> SpeechExecutor:
+    """Get or create speech executor instance"""
+    global _speech_executor
+    if _speech_executor is None:
+        _speech_executor = SpeechExecutor()
+    return _speech_executor
+
+def shutdown_speech_executor():
+    """Stop the speech executor so the next caller gets a fresh pool"""
+    global _speech_executor
+    if _speech_executor is not None:
+        _speech_executor.shutdown(wait=False)
+        _speech_executor = None
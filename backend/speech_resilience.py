@@ -0,0 +1,226 @@
+"""Speech Resilience - Latency budgets, hedged requests and circuit breaking
+
+Tail latency of a turn is set by its slowest speech request. Each operation
+gets a ``SpeechGuard`` that
+
+* bounds every request by a latency budget,
+* fires one duplicate request once the first has been running longer than
+  the operation's recent p95 (or straight away if the first fails) and
+  returns whichever answers first,
+* opens a circuit breaker after consecutive failures so callers fall back to
+  cached audio or a text-only reply instead of waiting on a sick backend.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from config import settings
+from speech_engine import SpeechExecutor, SpeechTimeoutError
+
+logger = logging.getLogger(__name__)
+
+class SpeechUnavailableError(Exception):
+    """Raised when a request is refused because the circuit is open"""
+
+class LatencyWindow:
+    """Latencies of the most recent successful requests"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency below which ``q`` percent of the window falls"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe
+
+    Closed: requests flow. Open: requests are refused until
+    ``reset_seconds`` have passed. Half-open: one probe request is let
+    through; success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = None, reset_seconds: float = None, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold or settings.BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.BREAKER_RESET_SECONDS
+        self.clock = clock
+        self.failures = 0
+        self.opens = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may go to the backend now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def abandon_probe(self):
+        """Let another request probe; the probe was cancelled without an answer"""
+        self._probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        if self._state != self.CLOSED:
+            logger.info("Speech circuit closed")
+        self._state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self.failures >= self.failure_threshold
+        ):
+            self._state = self.OPEN
+            self._opened_at = self.clock()
+            self.opens += 1
+            logger.warning(f"Speech circuit opened after {self.failures} consecutive failures")
+
+class SpeechGuard:
+    """Budget, hedging and circuit breaker for one speech operation"""
+
+    def __init__(
+        self,
+        operation: str,
+        budget: float = None,
+        hedge: bool = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.operation = operation
+        budgets = {"tts": settings.TTS_LATENCY_BUDGET, "stt": settings.STT_LATENCY_BUDGET}
+        self.budget = budget or budgets.get(operation, settings.TTS_LATENCY_BUDGET)
+        self.hedge = settings.HEDGE_ENABLED if hedge is None else hedge
+        self.breaker = breaker or CircuitBreaker()
+        self.window = LatencyWindow()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exceeded = 0
+        self.rejected = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long the first request runs before it is duplicated"""
+        if not self.hedge:
+            return None
+        if len(self.window) < settings.HEDGE_MIN_SAMPLES:
+            return self.budget / 2
+        return max(self.window.percentile(95), settings.HEDGE_MIN_DELAY)
+
+    async def call(self, executor: SpeechExecutor, func: Callable[..., Any], *args) -> Any:
+        """Run ``func`` in the executor under the guard
+
+        Raises SpeechUnavailableError while the circuit is open and
+        SpeechTimeoutError when no attempt answers within the budget.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise SpeechUnavailableError(f"{self.operation} backend unavailable (circuit open)")
+        self.calls += 1
+        try:
+            result = await self._hedged(executor, func, args)
+        except asyncio.CancelledError:
+            # The caller went away (barge-in, shutdown); that says nothing
+            # about the backend, but a probe must not stay claimed
+            self.breaker.abandon_probe()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _attempt(self, executor: SpeechExecutor, func: Callable[..., Any], args: tuple, timeout: float) -> Any:
+        started = time.perf_counter()
+        result = await executor.run(self.operation, func, *args, timeout=timeout)
+        self.window.record(time.perf_counter() - started)
+        return result
+
+    async def _hedged(self, executor: SpeechExecutor, func: Callable[..., Any], args: tuple) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget
+        delay = self.hedge_delay()
+        hedge_at = loop.time() + delay if delay is not None else None
+
+        first = asyncio.ensure_future(self._attempt(executor, func, args, self.budget))
+        pending = [first]
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wake = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(wake - loop.time(), 0.0), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    pending.remove(task)
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+
+                now = loop.time()
+                if now >= deadline:
+                    break
+                if hedge_at is not None and (now >= hedge_at or not pending):
+                    # Only one duplicate, and only if it would not queue
+                    # behind other callers' requests
+                    hedge_at = None
+                    if executor.has_capacity(self.operation):
+                        self.hedges += 1
+                        pending.append(asyncio.ensure_future(
+                            self._attempt(executor, func, args, deadline - now)
+                        ))
+        finally:
+            # Losing attempts are abandoned; their worker threads finish in
+            # the background and free their slots when they return
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if pending:
+            self.budget_exceeded += 1
+            raise SpeechTimeoutError(f"{self.operation} exceeded its {self.budget}s latency budget")
+        raise error
+
+    def get_stats(self) -> dict:
+        """Get hedging, budget and breaker counters"""
+        return {
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_exceeded": self.budget_exceeded,
+            "rejected": self.rejected,
+            "circuit_opens": self.breaker.opens,
+            "p50": self.window.percentile(50),
+            "p95": self.window.percentile(95),
+            "p99": self.window.percentile(99),
+        }
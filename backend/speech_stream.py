@@ -0,0 +1,181 @@
+"""Speech Stream - Incremental Dutch speech recognition for live audio"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_END_UTTERANCE = object()
+_CLOSE = object()
+
+class TranscriptResult(NamedTuple):
+    """One interim or final recognition result"""
+    text: str
+    confidence: float
+    is_final: bool
+
+class StreamingRecognizer:
+    """Feeds audio frames to a streaming recognizer and yields transcripts
+
+    With a client the frames are forwarded to it on a dedicated thread (a
+    stream lives as long as the call, so it must not hold a slot in the
+    shared speech worker pool): Google's ``streaming_recognize``, or a
+    client with ``transcripts(frames, interim_results)`` such as the
+    simulator's. The stream is reopened after each forced utterance end and
+    when the client closes it, e.g. at Google's per-stream duration limit.
+    Without a client, interim and final results are faked from the amount
+    of audio received.
+    """
+
+    MAX_STREAM_FAILURES = 3
+
+    def __init__(
+        self,
+        stt_client=None,
+        sample_rate: int = None,
+        interim_results: bool = True,
+        encoding: str = "LINEAR16",
+    ):
+        self.stt_client = stt_client
+        self.sample_rate = sample_rate or settings.SAMPLE_RATE
+        self.encoding = encoding
+        self.interim_results = interim_results
+        self._results: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frames: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Simulator state
+        self._utterance_bytes = 0
+        self._interim_step = self.sample_rate  # 0.5 s of 16-bit audio
+        self._next_interim = self._interim_step
+
+    async def start(self):
+        """Open the recognition stream"""
+        self._loop = asyncio.get_running_loop()
+        self._results = asyncio.Queue()
+        if self.stt_client is not None:
+            self._thread = threading.Thread(
+                target=self._run_stream,
+                name="stt-stream",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def feed(self, frame: bytes):
+        """Queue one audio frame for recognition"""
+        if self._closed or not frame:
+            return
+        if self.stt_client is not None:
+            self._frames.put(bytes(frame))
+            return
+
+        self._utterance_bytes += len(frame)
+        if self.interim_results and self._utterance_bytes >= self._next_interim:
+            self._next_interim += self._interim_step
+            self._emit(TranscriptResult("Simulated", 0.0, False))
+
+    def end_utterance(self):
+        """Force the current utterance to produce a final transcript"""
+        if self._closed:
+            return
+        if self.stt_client is not None:
+            self._frames.put(_END_UTTERANCE)
+            return
+
+        if self._utterance_bytes:
+            self._emit(TranscriptResult("Simulated transcription", 0.95, True))
+        self._utterance_bytes = 0
+        self._next_interim = self._interim_step
+
+    async def close(self):
+        """Flush pending audio and stop the stream"""
+        if self._closed:
+            return
+        if self.stt_client is not None:
+            self._closed = True
+            self._frames.put(_CLOSE)
+            if self._thread is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self._thread.join, 5.0)
+        else:
+            self.end_utterance()
+            self._closed = True
+            self._emit(None)
+
+    async def results(self) -> AsyncIterator[TranscriptResult]:
+        """Yield transcripts as they arrive until the stream is closed"""
+        while True:
+            result = await self._results.get()
+            if result is None:
+                return
+            yield result
+
+    def _emit(self, result: Optional[TranscriptResult]):
+        if self._results is not None:
+            self._results.put_nowait(result)
+
+    def _emit_threadsafe(self, result: Optional[TranscriptResult]):
+        self._loop.call_soon_threadsafe(self._emit, result)
+
+    def _request_frames(self):
+        """Yield frames for one stream until an utterance end or close"""
+        while True:
+            item = self._frames.get()
+            if item is _END_UTTERANCE:
+                return
+            if item is _CLOSE:
+                self._closed = True
+                return
+            yield item
+
+    def _google_transcripts(self, frames: Iterable[bytes], interim_results: bool) -> Iterator[TranscriptResult]:
+        """One Google streaming_recognize call over ``frames``"""
+        from google.cloud import speech_v1
+
+        config = speech_v1.RecognitionConfig(
+            encoding=getattr(speech_v1.RecognitionConfig.AudioEncoding, self.encoding),
+            sample_rate_hertz=self.sample_rate,
+            language_code=settings.SPEECH_LANGUAGE,
+            enable_automatic_punctuation=True,
+        )
+        streaming_config = speech_v1.StreamingRecognitionConfig(
+            config=config,
+            interim_results=interim_results,
+        )
+        responses = self.stt_client.streaming_recognize(
+            config=streaming_config,
+            requests=(speech_v1.StreamingRecognizeRequest(audio_content=frame) for frame in frames),
+        )
+        for response in responses:
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                yield TranscriptResult(
+                    alternative.transcript,
+                    float(alternative.confidence),
+                    bool(result.is_final),
+                )
+
+    def _run_stream(self):
+        transcripts = getattr(self.stt_client, "transcripts", None) or self._google_transcripts
+        failures = 0
+        try:
+            while not self._closed:
+                try:
+                    for result in transcripts(self._request_frames(), self.interim_results):
+                        self._emit_threadsafe(result)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    logger.warning(f"Streaming recognition interrupted: {e}")
+                    if failures >= self.MAX_STREAM_FAILURES:
+                        logger.error("Streaming recognition failed repeatedly, giving up")
+                        break
+        finally:
+            self._closed = True
+            self._emit_threadsafe(None)
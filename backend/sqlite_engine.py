@@ -0,0 +1,75 @@
+"""SQLite Engines - Pooled WAL-mode engines for SQLite database files
+
+A single shared connection (``StaticPool``) serializes every session, so a
+dashboard query waits for the writer's batch and the batch for the query.
+With WAL journaling readers see the last committed state while a writer
+commits, so a database file gets two engines:
+
+* a write engine with one connection - SQLite admits one writer at a time,
+  so writers queue for the connection in the pool instead of retrying on
+  ``SQLITE_BUSY``
+* a read engine with a pool of ``query_only`` connections that never wait
+  for the writer
+
+In-memory databases exist per connection and keep a single shared one.
+"""
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def is_file_database(url: str) -> bool:
+    """Whether a database URL names an SQLite file"""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return False
+    database = url.database or ""
+    in_memory = database in ("", ":memory:") or database.startswith("file::memory:") or url.query.get("mode") == "memory"
+    return not in_memory
+
+def pragmas(read_only: bool = False) -> List[str]:
+    """Connection settings from SQLITE_*; WAL itself is set once per file"""
+    statements = [
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        # Negative sizes are in KiB rather than pages
+        f"PRAGMA cache_size={-settings.SQLITE_CACHE_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if read_only:
+        statements.append("PRAGMA query_only=ON")
+    return statements
+
+def _apply_on_connect(engine: Engine, statements: List[str]):
+    @event.listens_for(engine, "connect")
+    def configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+def create_sqlite_engines(url: str, read_pool_size: int = None) -> Tuple[Engine, Engine]:
+    """(write engine, read engine) for an SQLite file in WAL mode"""
+    read_pool_size = read_pool_size or settings.SQLITE_READ_POOL_SIZE
+    connect_args = {"check_same_thread": False}
+    write_engine = create_engine(url, connect_args=connect_args, poolclass=QueuePool, pool_size=1, max_overflow=0)
+    read_engine = create_engine(
+        url, connect_args=connect_args, poolclass=QueuePool,
+        pool_size=read_pool_size, max_overflow=read_pool_size,
+    )
+    _apply_on_connect(write_engine, ["PRAGMA journal_mode=WAL", *pragmas()])
+    _apply_on_connect(read_engine, pragmas(read_only=True))
+    # Switch the file to WAL before any reader opens it
+    with write_engine.connect() as connection:
+        mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+    if mode != "wal":
+        logger.warning(f"SQLite database {url} stays in {mode} journal mode; readers may wait for writes")
+    return write_engine, read_engine
@@ -0,0 +1,94 @@
+"""Transcript - Compact append-only record of a call's turns
+
+A ``Transcript`` keeps each turn in parallel arrays: a role code per turn
+in a ``bytearray``, the text in a list, and confidence and time offset as
+doubles. Timestamps are seconds on the monotonic clock since the call
+started, converted to wall-clock time only when a turn is read. The plain
+text and JSON renderings are extended with the turns appended since the
+last read and otherwise returned from cache, so reading the transcript of
+a long call does not re-render it.
+"""
+import math
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Role codes are shared process-wide, each role name is stored once
+ROLES: List[str] = ["user", "assistant"]
+ROLE_CODES: Dict[str, int] = {role: code for code, role in enumerate(ROLES)}
+
+def role_code(role: str) -> int:
+    code = ROLE_CODES.get(role)
+    if code is None:
+        if len(ROLES) > 255:
+            raise ValueError(f"Too many transcript roles to add {role!r}")
+        code = ROLE_CODES[role] = len(ROLES)
+        ROLES.append(role)
+    return code
+
+class Transcript:
+    """Turns of one call"""
+
+    __slots__ = ("started_at", "_origin", "_roles", "_texts", "_confidences", "_offsets", "_text", "_text_turns", "_json")
+
+    def __init__(self, started_at: float = None):
+        self.started_at = time.time() if started_at is None else started_at
+        self._origin = time.monotonic()
+        self._roles = bytearray()
+        self._texts: List[str] = []
+        self._confidences = array("d")
+        self._offsets = array("d")
+        self._text = ""
+        self._text_turns = 0
+        self._json: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def append(self, role: str, text: str, confidence: Optional[float] = None, at: float = None) -> int:
+        """Add a turn, timed now or at wall-clock time ``at``; returns its index"""
+        self._roles.append(role_code(role))
+        self._texts.append(text)
+        self._confidences.append(math.nan if confidence is None else confidence)
+        self._offsets.append(time.monotonic() - self._origin if at is None else at - self.started_at)
+        return len(self._texts) - 1
+
+    def role(self, index: int) -> str:
+        return ROLES[self._roles[index]]
+
+    def utterance(self, index: int) -> str:
+        return self._texts[index]
+
+    def confidence(self, index: int) -> Optional[float]:
+        value = self._confidences[index]
+        return None if math.isnan(value) else value
+
+    def timestamp(self, index: int) -> datetime:
+        """Naive UTC time of a turn, as the database stores it"""
+        return datetime.fromtimestamp(self.started_at + self._offsets[index], timezone.utc).replace(tzinfo=None)
+
+    def turn(self, index: int) -> dict:
+        return {
+            "role": self.role(index),
+            "text": self._texts[index],
+            "confidence": self.confidence(index),
+            "timestamp": self.timestamp(index).isoformat(),
+        }
+
+    def text(self) -> str:
+        """One "role: text" line per turn"""
+        if self._text_turns < len(self._texts):
+            new = "\n".join(
+                f"{ROLES[self._roles[i]]}: {self._texts[i]}"
+                for i in range(self._text_turns, len(self._texts))
+            )
+            self._text = f"{self._text}\n{new}" if self._text else new
+            self._text_turns = len(self._texts)
+        return self._text
+
+    def as_json(self) -> List[dict]:
+        """Turns as dicts; the list is shared, callers must not modify it"""
+        for index in range(len(self._json), len(self._texts)):
+            self._json.append(self.turn(index))
+        return self._json
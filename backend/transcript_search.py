@@ -0,0 +1,259 @@
+"""Transcript Search - Full-text search over stored conversation turns
+
+Turns are indexed in an SQLite FTS5 table, ``turn_search``, under the rowid
+of their ``conversation_turns`` row. The built-in FTS5 tokenizers do not
+stem Dutch, so the index holds the text as ``dutch_stemmer`` stems without
+stop words, and queries are reduced the same way: "slaap" and "slapen"
+both become "slap" and find each other, and a quoted phrase matches turns
+with those words in that order. Negations are kept, so "slaap niet" is not
+just "slaap". Matches are ranked by BM25 among the newest
+``SEARCH_RANK_WINDOW`` of them. The table is contentless; results read the
+text from ``conversation_turns``, so the index only adds its postings.
+
+The write-behind writer (``persistence``) indexes turns in the transaction
+that inserts them, and ``catch_up`` indexes any stored turn the index does
+not hold yet, such as turns stored before the index existed. Databases without FTS5 fall back to an unranked LIKE query.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from config import settings
+from dutch_stemmer import stem
+from models import CallRecord, ConversationTurn
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r"\w+")
+# A quoted phrase or a single word
+TERM = re.compile(r'"([^"]*)"?|(\S+)')
+
+# Snowball's Dutch stop words, less the negations: dropping "niet" would
+# turn the phrase "slaap niet" into "slaap"
+STOP_WORDS = frozenset("""
+aan al alles als altijd andere ben bij daar dan dat de der deze die dit doch doen door dus een eens
+en er ge geweest haar had heb hebben heeft hem het hier hij hoe hun iemand iets ik in is ja je
+kan kon kunnen maar me meer men met mij mijn moet na naar nog nu of om omdat onder ons
+ook op over reeds te tegen toch toen tot u uit uw van veel voor want waren was wat werd wezen wie
+wil worden wordt zal ze zelf zich zij zijn zo zou
+""".split())
+
+SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS turn_search "
+    "USING fts5(stems, content='', tokenize='unicode61')"
+)
+INDEX_TURN = text(
+    "INSERT INTO turn_search (rowid, stems) "
+    "SELECT rowid, :stems FROM conversation_turns WHERE turn_id = :turn_id"
+)
+
+def stems(utterance: str) -> str:
+    """Stems of the words of ``utterance`` that are not stop words"""
+    return " ".join(stem(word) for word in WORD.findall(utterance.lower()) if word not in STOP_WORDS)
+
+def parse_query(query: str) -> List[str]:
+    """Words and quoted phrases of a query, as stemmed phrases"""
+    phrases = []
+    for phrase, word in TERM.findall(query):
+        stemmed = stems(phrase or word)
+        if stemmed:
+            phrases.append(stemmed)
+    return phrases
+
+def quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+def like_pattern(value: str) -> str:
+    """LIKE pattern matching ``value`` anywhere, with its wildcards escaped"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+class TranscriptSearch:
+    """FTS5 index of conversation turns and ranked queries over it"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        rank_window: int = None,
+        read_session_factory: Callable[[], Session] = None,
+    ):
+        self.session_factory = session_factory
+        # Queries may use read-only connections; indexing needs session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.rank_window = rank_window or settings.SEARCH_RANK_WINDOW
+        # None until checked: whether the database has FTS5
+        self.available: Optional[bool] = None
+
+    def prepare(self) -> bool:
+        """Create the index table if needed; False without FTS5"""
+        if self.available is not None:
+            return self.available
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name != "sqlite":
+                self.available = False
+                return False
+            db.execute(text(SCHEMA))
+            db.commit()
+            self.available = True
+        except OperationalError as e:
+            db.rollback()
+            logger.warning(f"Full-text transcript search unavailable, using LIKE queries: {e}")
+            self.available = False
+        finally:
+            db.close()
+        return self.available
+
+    def index_turns(self, db: Session, rows: List[dict]):
+        """Index newly inserted turns, in the caller's transaction"""
+        if rows and self.prepare():
+            db.execute(INDEX_TURN, [{"turn_id": row["turn_id"], "stems": stems(row["text"])} for row in rows])
+
+    def catch_up(self, batch_size: int = 1000) -> int:
+        """Index stored turns the index does not hold yet
+
+        Turns written without ``index_turns`` may sit anywhere among the
+        indexed ones, so every turn is checked against the index by rowid.
+        """
+        if not self.prepare():
+            return 0
+        db = self.session_factory()
+        indexed = 0
+        last = 0
+        try:
+            while True:
+                rows = db.execute(text(
+                    "SELECT turn.rowid, turn.text FROM conversation_turns AS turn "
+                    "WHERE turn.rowid > :last AND NOT EXISTS "
+                    "(SELECT 1 FROM turn_search WHERE turn_search.rowid = turn.rowid) "
+                    "ORDER BY turn.rowid LIMIT :limit"
+                ), {"last": last, "limit": batch_size}).all()
+                if not rows:
+                    break
+                db.execute(
+                    text("INSERT INTO turn_search (rowid, stems) VALUES (:rowid, :stems)"),
+                    [{"rowid": rowid, "stems": stems(utterance or "")} for rowid, utterance in rows],
+                )
+                db.commit()
+                indexed += len(rows)
+                last = rows[-1][0]
+        finally:
+            db.close()
+        if indexed:
+            logger.info(f"Indexed {indexed} stored turns for transcript search")
+        return indexed
+
+    def search(
+        self,
+        query: str,
+        voice_profile: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 20,
+    ) -> List[dict]:
+        """Turns matching every word and phrase of ``query``, best first
+
+        Only the newest ``rank_window`` matches are ranked, which bounds the
+        cost of words found in most turns. ``since`` and ``until`` bound the
+        turn time (naive UTC). Raises ValueError if the query has no
+        searchable words.
+        """
+        phrases = parse_query(query)
+        if not phrases:
+            raise ValueError(f"No searchable words in {query!r}")
+        if not self.prepare():
+            return self._search_like(query, voice_profile, since, until, limit)
+
+        params = {
+            "match": " AND ".join(quote(phrase) for phrase in phrases),
+            "window": self.rank_window,
+            "limit": limit,
+        }
+        conditions = ["turn_search MATCH :match"]
+        joins = []
+        if since is not None or until is not None or voice_profile is not None:
+            joins.append("CROSS JOIN conversation_turns AS turn ON turn.rowid = turn_search.rowid")
+        # Turns are not stored in time order (batch transcripts carry their
+        # recording's times), so the bounds are on the timestamp, not the rowid
+        for name, value, check in (
+            ("since", since, "turn.timestamp >= :since"),
+            ("until", until, "turn.timestamp < :until"),
+        ):
+            if value is not None:
+                conditions.append(check)
+                params[name] = value
+        if voice_profile is not None:
+            joins.append("CROSS JOIN calls AS call ON call.call_id = turn.call_id")
+            conditions.append("call.voice_profile = :voice_profile")
+            params["voice_profile"] = voice_profile
+        # Filters apply before the window of newest matches is cut; CROSS
+        # JOIN keeps the index as the outer loop
+        statement = text(
+            "SELECT t.turn_id, t.call_id, t.role, t.text, t.timestamp, c.voice_profile, hits.score "
+            "FROM ("
+            "SELECT turn_search.rowid AS turn_rowid, bm25(turn_search) AS score "
+            f"FROM turn_search {' '.join(joins)} "
+            f"WHERE {' AND '.join(conditions)} "
+            "ORDER BY turn_search.rowid DESC LIMIT :window"
+            ") AS hits "
+            "CROSS JOIN conversation_turns AS t ON t.rowid = hits.turn_rowid "
+            "CROSS JOIN calls AS c ON c.call_id = t.call_id "
+            "ORDER BY hits.score LIMIT :limit"
+        )
+        for name in ("since", "until"):
+            if name in params:
+                statement = statement.bindparams(bindparam(name, type_=DateTime))
+        statement = statement.columns(timestamp=DateTime)
+        db = self.read_session_factory()
+        try:
+            return [self._result(row, -row.score) for row in db.execute(statement, params)]
+        finally:
+            db.close()
+
+    def _search_like(self, query, voice_profile, since, until, limit) -> List[dict]:
+        """Newest turns containing every word and phrase as typed"""
+        db = self.read_session_factory()
+        try:
+            rows = db.query(
+                ConversationTurn.turn_id, ConversationTurn.call_id, ConversationTurn.role,
+                ConversationTurn.text, ConversationTurn.timestamp, CallRecord.voice_profile,
+            ).join(CallRecord, CallRecord.call_id == ConversationTurn.call_id)
+            for phrase, word in TERM.findall(query):
+                rows = rows.filter(ConversationTurn.text.ilike(like_pattern(phrase or word), escape="\\"))
+            if voice_profile is not None:
+                rows = rows.filter(CallRecord.voice_profile == voice_profile)
+            if since is not None:
+                rows = rows.filter(ConversationTurn.timestamp >= since)
+            if until is not None:
+                rows = rows.filter(ConversationTurn.timestamp < until)
+            rows = rows.order_by(ConversationTurn.timestamp.desc()).limit(limit)
+            return [self._result(row, None) for row in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _result(row, score: Optional[float]) -> dict:
+        return {
+            "turn_id": row.turn_id,
+            "call_id": row.call_id,
+            "role": row.role,
+            "text": row.text,
+            "timestamp": row.timestamp,
+            "voice_profile": row.voice_profile,
+            "score": score,
+        }
+
+_transcript_search: Optional[TranscriptSearch] = None
+
+def get_transcript_search() -> TranscriptSearch:
+    """Get or create the process transcript search"""
+    global _transcript_search
+    if _transcript_search is None:
+        from database import ReadSessionLocal, SessionLocal
+        _transcript_search = TranscriptSearch(SessionLocal, read_session_factory=ReadSessionLocal)
+    return _transcript_search
@@ -0,0 +1,222 @@
+"""TTS Cache - Content-addressed cache for synthesized speech audio"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".audio"
+
+def cache_key(
+    text: str,
+    language: str,
+    voice_name: str,
+    pitch: float,
+    rate: float,
+    encoding: str = "MP3",
+) -> str:
+    """Build the content address for one synthesis request"""
+    parts = [text, language, voice_name, f"{pitch:.3f}", f"{rate:.3f}", encoding]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """Two-tier audio cache: in-memory LRU bounded by bytes, plus a disk tier
+
+    Memory entries are evicted least-recently-used once their total size
+    exceeds ``max_bytes``. Every stored entry is also written to
+    ``directory`` so cached phrases survive a restart; a disk hit is
+    promoted back into memory. The disk tier is bounded by
+    ``max_disk_bytes`` the same way, with recency kept in the files'
+    modification times across restarts.
+
+    ``get`` and ``put`` are coroutines: file reads and writes run in a
+    worker thread so they never block the event loop. Which keys are on
+    disk is tracked in memory, so ``in`` never touches the disk.
+    """
+
+    def __init__(self, max_bytes: int = None, directory: Optional[str] = None, max_disk_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.TTS_CACHE_MEMORY_BYTES
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else settings.TTS_CACHE_DISK_BYTES
+        self.directory = directory
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        # Sizes of the files on disk, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self.current_bytes = 0
+        self.disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.bypasses = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{SUFFIX}")
+
+    def _scan(self):
+        """Index the files a previous process left, oldest first"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-len(SUFFIX)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Look up audio by key, checking memory then disk"""
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.memory_hits += 1
+            return audio
+
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                return audio
+            self._forget_disk(key)
+
+        self.misses += 1
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        """Whether audio is stored, without counting a hit or miss"""
+        return key in self._entries or key in self._disk
+
+    async def put(self, key: str, audio: bytes):
+        """Store audio in memory and on disk"""
+        if not audio:
+            return
+        self._remember(key, audio)
+        if self.directory and key not in self._disk and len(audio) <= self.max_disk_bytes:
+            if await asyncio.to_thread(self._write, key, audio):
+                if key not in self._disk:
+                    self._disk[key] = len(audio)
+                    self.disk_bytes += len(audio)
+                self._evict_disk()
+
+    def record_bypass(self):
+        """Count a request that was deliberately not cached"""
+        self.bypasses += 1
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= len(previous)
+        self._entries[key] = audio
+        self.current_bytes += len(audio)
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _forget_disk(self, key: str) -> bool:
+        size = self._disk.pop(key, None)
+        if size is None:
+            return False
+        self.disk_bytes -= size
+        return True
+
+    def _evict_disk(self):
+        """Delete the least recently used files beyond ``max_disk_bytes``"""
+        evicted = []
+        while self.disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self.disk_bytes -= size
+            evicted.append(key)
+        if evicted:
+            self.disk_evictions += len(evicted)
+            paths = [self._path(key) for key in evicted]
+            try:
+                asyncio.get_running_loop().run_in_executor(None, _remove_files, paths)
+            except RuntimeError:
+                _remove_files(paths)  # no event loop, e.g. at startup
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # Recency for the eviction order after a restart
+            os.utime(path)
+            return audio
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read cached audio {key}: {e}")
+            return None
+
+    def _write(self, key: str, audio: bytes) -> bool:
+        path = self._path(key)
+        try:
+            # Write to a temp file first so readers never see partial audio
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not persist cached audio {key}: {e}")
+            return False
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def get_stats(self) -> dict:
+        """Get hit/miss/eviction statistics"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self.disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "bypasses": self.bypasses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not evict cached audio {path}: {e}")
+
+_tts_cache: Optional[TTSCache] = None
+
+def get_tts_cache() -> TTSCache:
+    """Get or create TTS cache instance"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache(directory=settings.TTS_CACHE_DIR or None)
+    return _tts_cache
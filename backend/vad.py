@@ -0,0 +1,138 @@
+"""Voice Activity Detection - Segments LINEAR16 call audio into utterances"""
+import logging
+from typing import List, NamedTuple
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class VADEvent(NamedTuple):
+    """Utterance boundary at an absolute byte offset in the call audio"""
+    kind: str  # "start" or "end"
+    offset: int
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing VAD with hangover
+
+    Incoming bytes are viewed as int16 samples without copying and split
+    into fixed frames; RMS energy and zero-crossing rate are computed for
+    all complete frames of a chunk at once. A frame counts as speech when it
+    is loud enough and its zero-crossing rate is below the noise ceiling.
+    An utterance starts after ``min_speech_ms`` of consecutive speech and
+    ends once ``hangover_ms`` of non-speech follows it.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = None,
+        frame_ms: int = None,
+        energy_threshold: float = None,
+        zcr_max: float = None,
+        hangover_ms: int = None,
+        min_speech_ms: int = None,
+    ):
+        self.sample_rate = sample_rate or settings.SAMPLE_RATE
+        frame_ms = frame_ms or settings.VAD_FRAME_MS
+        self.frame_samples = self.sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.energy_threshold = energy_threshold if energy_threshold is not None else settings.VAD_ENERGY_THRESHOLD
+        self.zcr_max = zcr_max if zcr_max is not None else settings.VAD_ZCR_MAX
+        hangover_ms = hangover_ms if hangover_ms is not None else settings.VAD_HANGOVER_MS
+        min_speech_ms = min_speech_ms if min_speech_ms is not None else settings.VAD_MIN_SPEECH_MS
+        self.hangover_frames = max(1, -(-hangover_ms // frame_ms))
+        self.min_speech_frames = max(1, -(-min_speech_ms // frame_ms))
+
+        self.in_speech = False
+        self.offset = 0  # absolute offset of the next unprocessed byte
+        self._carry = b""
+        self._speech_run = 0
+        self._speech_run_start = 0
+        self._silence_run = 0
+        self._silence_start = 0
+        self.frames_processed = 0
+        self.speech_frames = 0
+
+    def features(self, samples: np.ndarray):
+        """RMS energy and zero-crossing rate per frame for an int16 array"""
+        frames = samples.reshape(-1, self.frame_samples).astype(np.float32)
+        energy = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_samples - 1)
+        return energy, zcr
+
+    def process(self, data) -> List[VADEvent]:
+        """Consume audio bytes and return the utterance boundaries they complete"""
+        view = memoryview(data).cast("B")
+        if self._carry:
+            # Complete the partial frame left over from the previous chunk
+            needed = self.frame_bytes - len(self._carry)
+            head = self._carry + bytes(view[:needed])
+            view = view[needed:]
+            if len(head) < self.frame_bytes:
+                self._carry = head
+                return []
+            self._carry = b""
+            events = self._process_frames(np.frombuffer(head, dtype="<i2"))
+        else:
+            events = []
+
+        whole = len(view) - len(view) % self.frame_bytes
+        if whole:
+            events.extend(self._process_frames(np.frombuffer(view[:whole], dtype="<i2")))
+        if whole < len(view):
+            self._carry = bytes(view[whole:])
+        return events
+
+    def _process_frames(self, samples: np.ndarray) -> List[VADEvent]:
+        energy, zcr = self.features(samples)
+        is_speech = (energy >= self.energy_threshold) & (zcr <= self.zcr_max)
+        self.frames_processed += len(is_speech)
+        self.speech_frames += int(np.count_nonzero(is_speech))
+
+        events = []
+        base = self.offset
+        # Walk runs of equal decisions rather than individual frames
+        changes = np.flatnonzero(np.diff(is_speech.astype(np.int8))) + 1
+        bounds = np.concatenate(([0], changes, [len(is_speech)]))
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            run = int(last - first)
+            run_offset = base + int(first) * self.frame_bytes
+            if is_speech[first]:
+                self._on_speech(run, run_offset, events)
+            else:
+                self._on_silence(run, run_offset, events)
+        self.offset = base + len(is_speech) * self.frame_bytes
+        return events
+
+    def _on_speech(self, run: int, run_offset: int, events: List[VADEvent]):
+        self._silence_run = 0
+        if self.in_speech:
+            return
+        if self._speech_run == 0:
+            self._speech_run_start = run_offset
+        self._speech_run += run
+        if self._speech_run >= self.min_speech_frames:
+            self.in_speech = True
+            events.append(VADEvent("start", self._speech_run_start))
+
+    def _on_silence(self, run: int, run_offset: int, events: List[VADEvent]):
+        self._speech_run = 0
+        if not self.in_speech:
+            return
+        if self._silence_run == 0:
+            self._silence_start = run_offset
+        self._silence_run += run
+        if self._silence_run >= self.hangover_frames:
+            self.in_speech = False
+            self._silence_run = 0
+            events.append(VADEvent("end", self._silence_start))
+
+    def get_stats(self) -> dict:
+        """Get frame counts and the share of audio classified as speech"""
+        return {
+            "frames_processed": self.frames_processed,
+            "speech_frames": self.speech_frames,
+            "speech_ratio": self.speech_frames / self.frames_processed if self.frames_processed else 0.0,
+        }
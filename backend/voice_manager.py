@@ -1,109 +1,197 @@
-"""Voice Manager Module - Handles Dutch TTS/STT using Google Cloud"""
+"""Voice Manager Module - Handles Dutch TTS/STT through a pluggable speech backend"""
+import asyncio
 import logging
-import json
-from typing import Optional, Tuple
-from datetime import datetime
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from config import settings
+from speech_engine import SpeechExecutor, get_speech_executor
+from tts_cache import TTSCache, cache_key, get_tts_cache
+from speech_stream import StreamingRecognizer
+from audio_codecs import AudioFormat, DEFAULT_INPUT_FORMAT, DEFAULT_OUTPUT_FORMAT
+from speech_backends import SpeechBackend, create_backend, voice_params
+from speech_resilience import SpeechGuard
 
 logger = logging.getLogger(__name__)
 
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> List[str]:
+    """Split a reply into sentences for incremental synthesis"""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
 class VoiceManager:
     """Manager for Text-to-Speech and Speech-to-Text operations"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        executor: Optional[SpeechExecutor] = None,
+        cache: Optional[TTSCache] = None,
+        backend: Optional[SpeechBackend] = None
+    ):
         """Initialize Voice Manager"""
+        self._executor = executor
+        self.cache = cache
+        self.guards = {"tts": SpeechGuard("tts"), "stt": SpeechGuard("stt")}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.streams_started = 0
+        self.first_audio_total = 0.0
+        self.first_audio_count = 0
         try:
-            # Import Google Cloud clients
-            from google.cloud import texttospeech, speech_v1
-            from config import settings
-            import os
-            
-            # Set credentials from environment
-            if os.path.exists(settings.GOOGLE_CLOUD_CREDENTIALS):
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = settings.GOOGLE_CLOUD_CREDENTIALS
-            
-            self.tts_client = texttospeech.TextToSpeechClient()
-            self.stt_client = speech_v1.SpeechClient()
-            self.settings = settings
-            logger.info("Voice Manager initialized successfully")
-        except ImportError:
-            logger.warning("Google Cloud libraries not installed. Using mock mode for testing.")
-            self.tts_client = None
-            self.stt_client = None
-            self.settings = None
+            self.backend = backend or create_backend()
+            if self.cache is None and settings.TTS_CACHE_ENABLED:
+                self.cache = get_tts_cache()
+            logger.info(f"Voice Manager initialized with the {self.backend.name} backend")
         except Exception as e:
             logger.error(f"Failed to initialize Voice Manager: {e}")
             raise
     
-    async def synthesize_speech(self, text: str, voice_profile: str = "lifestyle") -> bytes:
-        """Convert text to speech in Dutch"""
+    @property
+    def executor(self) -> SpeechExecutor:
+        """The speech pool, looked up per call so a restarted app gets the new one"""
+        return self._executor or get_speech_executor()
+    
+    async def synthesize_speech(
+        self,
+        text: str,
+        voice_profile: str = "lifestyle",
+        cacheable: bool = True,
+        audio_format: Optional[AudioFormat] = None
+    ) -> bytes:
+        """Convert text to speech in Dutch
+
+        Requests go through the "tts" guard: cached audio is still served
+        while its circuit is open, anything else raises
+        SpeechUnavailableError.
+
+        Set ``cacheable=False`` for text that embeds caller input so one-off
+        phrases do not push the canned prompts out of the audio cache.
+        ``audio_format`` selects the call's negotiated output codec; the
+        backend encodes it directly so no conversion happens here.
+        """
+        audio_format = audio_format or DEFAULT_OUTPUT_FORMAT
         try:
-            if not self.tts_client or not self.settings:
-                logger.warning("TTS client not available, returning empty bytes")
-                return b''
-            
-            profile = self.settings.VOICE_PROFILES.get(voice_profile, self.settings.VOICE_PROFILES["lifestyle"])
-            
-            from google.cloud import texttospeech
-            
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=self.settings.SPEECH_LANGUAGE,
-                name=f"{self.settings.SPEECH_LANGUAGE}-Neural2-{'F' if profile['gender'] == 'FEMALE' else 'M'}",
-            )
-            
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                pitch=profile["pitch"],
-                speaking_rate=profile["rate"],
-            )
-            
-            response = self.tts_client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-            
-            logger.info(f"Speech synthesized: {len(response.audio_content)} bytes")
-            return response.audio_content
+            voice = voice_params(voice_profile)
+            
+            key = None
+            if self.cache is not None:
+                if cacheable:
+                    key = self._cache_key(text, voice, audio_format)
+                    cached = await self.cache.get(key)
+                    if cached is not None:
+                        return cached
+                    pending = self._inflight.get(key)
+                    if pending is not None:
+                        # Already being synthesized (prewarm, speculation or
+                        # another call), share that request
+                        return await asyncio.shield(pending)
+                else:
+                    self.cache.record_bypass()
+            
+            if key is None:
+                return await self._synthesize(text, voice, audio_format)
+            
+            task = asyncio.ensure_future(self._synthesize(text, voice, audio_format, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+            # Shielded so a waiter giving up does not throw away audio the
+            # cache and other waiters still want
+            return await asyncio.shield(task)
             
         except Exception as e:
             logger.error(f"Error synthesizing speech: {e}")
             raise
     
-    async def transcribe_audio(self, audio_data: bytes) -> Tuple[str, float]:
+    async def _synthesize(self, text: str, voice, audio_format: AudioFormat, key: Optional[str] = None) -> bytes:
+        audio = await self.guards["tts"].call(self.executor, self.backend.synthesize, text, voice, audio_format)
+        logger.info(f"Speech synthesized: {len(audio)} bytes ({audio_format})")
+        if key is not None:
+            await self.cache.put(key, audio)
+        return audio
+    
+    def _finish_inflight(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here when every waiter gave up
+    
+    @staticmethod
+    def _cache_key(text: str, voice, audio_format: AudioFormat) -> str:
+        return cache_key(
+            text, voice.language, voice.name,
+            voice.pitch, voice.rate, str(audio_format).upper()
+        )
+    
+    def is_cached(self, text: str, voice_profile: str = "lifestyle", audio_format: Optional[AudioFormat] = None) -> bool:
+        """Whether audio for ``text`` is cached or already being synthesized"""
+        if self.cache is None:
+            return False
+        key = self._cache_key(text, voice_params(voice_profile), audio_format or DEFAULT_OUTPUT_FORMAT)
+        return key in self._inflight or key in self.cache
+    
+    async def transcribe_audio(self, audio_data: bytes, audio_format: Optional[AudioFormat] = None) -> Tuple[str, float]:
         """Convert audio to text using Dutch STT"""
+        audio_format = audio_format or DEFAULT_INPUT_FORMAT
         try:
-            if not self.stt_client or not self.settings:
-                logger.warning("STT client not available")
-                return "Simulated transcription", 0.95
-            
-            from google.cloud import speech_v1
-            
-            audio = speech_v1.RecognitionAudio(content=audio_data)
-            
-            config = speech_v1.RecognitionConfig(
-                encoding=speech_v1.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=self.settings.SAMPLE_RATE,
-                language_code=self.settings.SPEECH_LANGUAGE,
-                enable_automatic_punctuation=True,
+            transcript, confidence = await self.guards["stt"].call(
+                self.executor, self.backend.recognize, audio_data, audio_format
             )
-            
-            response = self.stt_client.recognize(config=config, audio=audio)
-            
-            if response.results:
-                result = response.results[0]
-                if result.alternatives:
-                    transcript = result.alternatives[0].transcript
-                    confidence = result.alternatives[0].confidence
-                    logger.info(f"Audio transcribed: '{transcript}' (confidence: {confidence})")
-                    return transcript, float(confidence)
-            
-            return "", 0.0
+            if transcript:
+                logger.info(f"Audio transcribed: '{transcript}' (confidence: {confidence})")
+            return transcript, confidence
             
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
             raise
+    
+    async def synthesize_stream(
+        self,
+        text: str,
+        voice_profile: str = "lifestyle",
+        cacheable: bool = True,
+        audio_format: Optional[AudioFormat] = None
+    ) -> AsyncIterator[bytes]:
+        """Synthesize a reply sentence by sentence, yielding audio in order
+
+        All sentences are submitted at once so later ones are generated while
+        the first is already playing. Closing the iterator early cancels the
+        synthesis that has not finished yet.
+        """
+        started = time.perf_counter()
+        self.streams_started += 1
+        tasks = [
+            asyncio.create_task(self.synthesize_speech(
+                sentence, voice_profile, cacheable, audio_format=audio_format
+            ))
+            for sentence in split_sentences(text)
+        ]
+        try:
+            for index, task in enumerate(tasks):
+                audio = await task
+                if index == 0:
+                    self.first_audio_total += time.perf_counter() - started
+                    self.first_audio_count += 1
+                yield audio
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def get_stream_stats(self) -> dict:
+        """Get streaming synthesis counters"""
+        return {
+            "streams_started": self.streams_started,
+            "average_time_to_first_audio": (
+                self.first_audio_total / self.first_audio_count if self.first_audio_count else 0.0
+            ),
+        }
+    
+    def get_guard_stats(self) -> dict:
+        """Get hedging and circuit breaker metrics per operation"""
+        return {operation: guard.get_stats() for operation, guard in self.guards.items()}
+    
+    def create_stream(self, interim_results: bool = True, audio_format: Optional[AudioFormat] = None) -> StreamingRecognizer:
+        """Create an incremental recognizer for live call audio"""
+        return self.backend.create_stream(audio_format or DEFAULT_INPUT_FORMAT, interim_results)
 
 voice_manager: Optional[VoiceManager] = None
 
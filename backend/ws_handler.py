@@ -2,18 +2,51 @@
 import logging
 import json
 import asyncio
-from typing import Set, Dict
+import time
+from typing import Set, Dict, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from conversation_flows import ConversationFlowManager, VoiceProfile
+from voice_manager import get_voice_manager
+from audio_buffer import AudioRingBuffer
+from vad import VADEvent, VoiceActivityDetector
+from audio_codecs import AudioFormatError, CallAudioFormat, InboundConverter, negotiate
+from config import settings
+from speculation import Speculator
+from speech_resilience import LatencyWindow
+from call_registry import get_call_registry
+from call_manager import get_call_manager
+from call_stats import get_call_stats
 
 logger = logging.getLogger(__name__)
 
+# How long a closing audio stream waits for the reply to its last utterance
+REPLY_DRAIN_SECONDS = 10.0
+
+class BargeInStats:
+    """How often callers interrupt and how fast replies are stopped"""
+    
+    def __init__(self):
+        self.interruptions = 0
+        self.cancel_latency = LatencyWindow()
+    
+    def as_dict(self) -> dict:
+        return {
+            "interruptions": self.interruptions,
+            "cancel_latency_p50": self.cancel_latency.percentile(50),
+            "cancel_latency_p95": self.cancel_latency.percentile(95),
+            "cancel_latency_max": self.cancel_latency.percentile(100),
+        }
+
+barge_in_stats = BargeInStats()
+
 class ConnectionManager:
     """Manages WebSocket connections"""
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.call_flows: Dict[str, ConversationFlowManager] = {}
+        self.call_formats: Dict[str, CallAudioFormat] = {}
+        self.speculators: Dict[str, Speculator] = {}
+        self.reply_tasks: Dict[str, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket, call_id: str):
         """Accept WebSocket connection"""
@@ -21,21 +54,86 @@ class ConnectionManager:
         self.active_connections[call_id] = websocket
         logger.info(f"WebSocket connected: {call_id}")
     
-    def disconnect(self, call_id: str):
+    async def disconnect(self, call_id: str):
         """Remove WebSocket connection"""
         if call_id in self.active_connections:
             del self.active_connections[call_id]
-        if call_id in self.call_flows:
-            del self.call_flows[call_id]
+        self.call_formats.pop(call_id, None)
+        speculator = self.speculators.pop(call_id, None)
+        if speculator is not None:
+            speculator.close()
+        reply_task = self.reply_tasks.pop(call_id, None)
+        if reply_task is not None:
+            reply_task.cancel()
+        # The conversation ends with its socket
+        await get_call_registry().complete(call_id)
         logger.info(f"WebSocket disconnected: {call_id}")
     
     async def send_message(self, call_id: str, message: dict):
-        """Send JSON message to client"""
+        """Send JSON message to client
+
+        A call whose socket is connected to another worker gets the message
+        through that worker.
+        """
         if call_id in self.active_connections:
             try:
                 await self.active_connections[call_id].send_json(message)
             except Exception as e:
                 logger.error(f"Error sending message to {call_id}: {e}")
+        else:
+            await get_call_registry().route(call_id, {"type": "send", "call_id": call_id, "message": message})
+    
+    async def send_audio(self, call_id: str, audio: bytes):
+        """Send binary audio frame to client"""
+        if call_id in self.active_connections:
+            try:
+                await self.active_connections[call_id].send_bytes(audio)
+            except Exception as e:
+                logger.error(f"Error sending audio to {call_id}: {e}")
+    
+    def start_reply(self, call_id: str, reply) -> asyncio.Task:
+        """Run a reply coroutine as the call's interruptible reply"""
+        task = asyncio.create_task(reply)
+        self.reply_tasks[call_id] = task
+        task.add_done_callback(lambda done: self._reply_done(call_id, done))
+        return task
+    
+    def _reply_done(self, call_id: str, task: asyncio.Task):
+        if self.reply_tasks.get(call_id) is task:
+            del self.reply_tasks[call_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Reply failed for {call_id}: {task.exception()}")
+    
+    async def barge_in(self, call_id: str) -> Optional[float]:
+        """Stop the reply in progress because the caller started talking
+
+        Cancels the reply task, which cancels its pending sentence
+        synthesis and drops the audio frames not yet sent, then tells the
+        client to flush what it has queued for playback. Returns the
+        cancellation latency, or None if no reply was playing.
+        """
+        task = self.reply_tasks.get(call_id)
+        if task is None or task.done():
+            return None
+        started = time.perf_counter()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass  # logged by _reply_done
+        latency = time.perf_counter() - started
+        barge_in_stats.interruptions += 1
+        barge_in_stats.cancel_latency.record(latency)
+        await self.send_message(call_id, {
+            "type": "stop_playback",
+            "reason": "barge_in",
+            "cancel_latency": latency,
+            "call_id": call_id
+        })
+        logger.info(f"Barge-in on {call_id}, reply cancelled in {latency * 1000:.1f}ms")
+        return latency
     
     async def broadcast(self, message: dict):
         """Broadcast message to all connections"""
@@ -48,30 +146,175 @@ class ConnectionManager:
             try:
                 return await self.active_connections[call_id].receive_text()
             except WebSocketDisconnect:
-                self.disconnect(call_id)
+                await self.disconnect(call_id)
                 return ""
         return ""
 
 manager = ConnectionManager()
 
-async def handle_websocket_call(websocket: WebSocket, call_id: str, voice_profile: str):
+async def handle_routed_message(message: dict):
+    """Deliver a message another worker sent to a socket held here"""
+    if message["type"] == "send" and message["call_id"] in manager.active_connections:
+        await manager.send_message(message["call_id"], message["message"])
+
+def negotiate_call_format(call_id: str, input_format: Optional[str], output_format: Optional[str]) -> CallAudioFormat:
+    """Negotiate and remember the audio formats for a call's socket
+
+    Both arguments are comma-separated offers in preference order, e.g.
+    "opus/48000,mulaw/8000,pcm16/16000".
+    """
+    audio_format = negotiate(
+        input_format.split(",") if input_format else None,
+        output_format.split(",") if output_format else None
+    )
+    manager.call_formats[call_id] = audio_format
+    return audio_format
+
+async def open_call(call_id: str, voice_profile: str, audio_format: CallAudioFormat) -> ConversationFlowManager:
+    """Conversation flow of the call a socket belongs to
+
+    A call created through the REST API keeps its flow and profile, and
+    is taken over from the worker that created it if that is another
+    one; any other call id is registered as a new call.
+    """
+    registry = get_call_registry()
+    call = await registry.get(call_id)
+    if call is not None and call["status"] == "active" and call.get("owner") != registry.worker_id:
+        call = await registry.adopt(call_id)
+    if call is None or call["status"] != "active":
+        call = await registry.register(None, voice_profile, call_id=call_id)
+    if call["flow_manager"] is None:
+        call["flow_manager"] = ConversationFlowManager(profile=VoiceProfile(call["voice_profile"]))
+        # Continue where the conversation stood on the worker it came from
+        if call.get("flow_state") is not None:
+            call["flow_manager"].restore(call["flow_state"])
+    call["audio_format"] = audio_format
+    return call["flow_manager"]
+
+async def record_turn(call_id: str, role: str, text: str, confidence: Optional[float] = 1.0):
+    """Add a turn to the call's transcript"""
+    try:
+        await get_call_manager().add_conversation_turn(call_id, role, text, confidence)
+    except ValueError:
+        pass  # already logged; the socket outlived its call
+
+def start_speculation(call_id: str, flow: ConversationFlowManager, audio_format: CallAudioFormat):
+    """Attach a speculator to the call if speculation can pay off"""
+    voice_manager = get_voice_manager()
+    if settings.SPECULATION_ENABLED and voice_manager.cache is not None:
+        manager.speculators[call_id] = Speculator(voice_manager, flow, audio_format.output)
+
+async def stream_reply(
+    call_id: str,
+    text: str,
+    voice_profile: str,
+    cacheable: bool = True,
+    started: float = None,
+    speculate: bool = True
+) -> dict:
+    """Stream reply audio as binary frames, then report time-to-first-audio
+
+    If synthesis fails or the TTS circuit is open the summary is marked
+    ``degraded`` and the client shows the reply text it already received.
+    Once the reply is out, the likely next replies are synthesized
+    speculatively unless ``speculate`` is False.
+    """
+    started = started or time.perf_counter()
+    speculator = manager.speculators.get(call_id)
+    if speculator is not None:
+        speculator.record_reply(text)
+    time_to_first_audio = None
+    segments = 0
+    audio_format = manager.call_formats.get(call_id, CallAudioFormat())
+    stream = get_voice_manager().synthesize_stream(
+        text, voice_profile, cacheable, audio_format=audio_format.output
+    )
+    degraded = False
+    try:
+        async for audio in stream:
+            if not audio:
+                continue
+            if time_to_first_audio is None:
+                time_to_first_audio = time.perf_counter() - started
+            await manager.send_audio(call_id, audio)
+            segments += 1
+    except Exception as e:
+        # The reply text has already been sent; degrade to text-only rather
+        # than failing the turn
+        logger.warning(f"Reply audio unavailable for {call_id}, sending text only: {e}")
+        degraded = True
+    finally:
+        # On barge-in this cancels the sentences still being synthesized
+        await stream.aclose()
+    
+    if time_to_first_audio is not None:
+        get_call_stats().record("turn_latency", voice_profile, time_to_first_audio)
+    
+    summary = {
+        "type": "audio_end",
+        "segments": segments,
+        "time_to_first_audio": time_to_first_audio,
+        "degraded": degraded,
+        "call_id": call_id
+    }
+    await manager.send_message(call_id, summary)
+    if speculate and speculator is not None:
+        speculator.speculate()
+    return summary
+
+async def answer(
+    call_id: str,
+    flow: ConversationFlowManager,
+    user_input: str,
+    started: float,
+    confidence: Optional[float] = None
+):
+    """Respond to one caller turn and stream the reply audio"""
+    await get_call_registry().wait_for_capacity()
+    await record_turn(call_id, "user", user_input, confidence)
+    response = await flow.respond(user_input)
+    await record_turn(call_id, "assistant", response)
+    await manager.send_message(call_id, {
+        "type": "response",
+        "message": response,
+        "user_input": user_input,
+        "call_id": call_id
+    })
+    await stream_reply(
+        call_id, response, flow.profile.value,
+        cacheable=flow.last_response_cacheable,
+        started=started
+    )
+
+async def handle_websocket_call(
+    websocket: WebSocket,
+    call_id: str,
+    voice_profile: str,
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None
+):
     """
     Handle WebSocket connection for a call
     """
     try:
         await manager.connect(websocket, call_id)
+        audio_format = negotiate_call_format(call_id, input_format, output_format)
         
         # Initialize conversation flow
-        flow = ConversationFlowManager(profile=VoiceProfile(voice_profile))
-        manager.call_flows[call_id] = flow
+        flow = await open_call(call_id, voice_profile, audio_format)
+        voice_profile = flow.profile.value
+        start_speculation(call_id, flow, audio_format)
         
         # Send greeting
         greeting = await flow.start_conversation()
+        await record_turn(call_id, "assistant", greeting)
         await manager.send_message(call_id, {
             "type": "greeting",
             "message": greeting,
+            "audio_format": audio_format.as_dict(),
             "call_id": call_id
         })
+        await stream_reply(call_id, greeting, voice_profile)
         
         # Handle incoming messages
         while call_id in manager.active_connections:
@@ -84,6 +327,7 @@ async def handle_websocket_call(websocket: WebSocket, call_id: str, voice_profil
                 
                 if not data:
                     continue
+                received_at = time.perf_counter()
                 
                 # Parse JSON message
                 try:
@@ -91,26 +335,28 @@ async def handle_websocket_call(websocket: WebSocket, call_id: str, voice_profil
                 except json.JSONDecodeError:
                     message = {"text": data}
                 
+                # The caller talking over the reply (client-side VAD) or
+                # sending a new turn makes the reply in progress stale
+                await manager.barge_in(call_id)
+                if message.get("type") == "speech_start":
+                    continue
+                
                 user_input = message.get("text", "")
                 
                 if user_input.lower() in ["exit", "quit", "bye"]:
+                    await record_turn(call_id, "user", user_input, None)
                     closing = await flow.close_conversation()
+                    await record_turn(call_id, "assistant", closing)
                     await manager.send_message(call_id, {
                         "type": "closing",
                         "message": closing,
                         "call_id": call_id
                     })
+                    await stream_reply(call_id, closing, voice_profile, started=received_at, speculate=False)
                     break
                 
-                # Generate response
-                response = await flow.respond(user_input)
-                
-                await manager.send_message(call_id, {
-                    "type": "response",
-                    "message": response,
-                    "user_input": user_input,
-                    "call_id": call_id
-                })
+                # Reply in the background so the next message can interrupt it
+                manager.start_reply(call_id, answer(call_id, flow, user_input, received_at))
                 
             except asyncio.TimeoutError:
                 await manager.send_message(call_id, {
@@ -128,47 +374,173 @@ async def handle_websocket_call(websocket: WebSocket, call_id: str, voice_profil
                 })
                 break
     
+    except AudioFormatError as e:
+        await manager.send_message(call_id, {
+            "type": "error",
+            "message": str(e),
+            "call_id": call_id
+        })
     except Exception as e:
         logger.error(f"WebSocket connection error for {call_id}: {e}")
     
     finally:
-        manager.disconnect(call_id)
+        await manager.disconnect(call_id)
         logger.info(f"WebSocket handler finished for {call_id}")
 
-async def handle_audio_stream(websocket: WebSocket, call_id: str):
+class AudioPipeline:
+    """Buffers call audio and gates what reaches the recognizer
+
+    With VAD enabled only audio inside detected utterances is fed to STT,
+    and each detected utterance end finalizes the transcript. Without VAD
+    every frame is forwarded and the client signals utterance ends.
+    """
+    
+    def __init__(
+        self,
+        recognizer,
+        vad: Optional[VoiceActivityDetector] = None,
+        converter: Optional[InboundConverter] = None
+    ):
+        self.recognizer = recognizer
+        self.converter = converter or InboundConverter()
+        # Audio the server cannot decode (Opus) goes straight to STT
+        self.vad = vad if self.converter.decodes_pcm else None
+        self.buffer = AudioRingBuffer()
+        self.stt_cursor = 0
+        self.bytes_to_stt = 0
+    
+    def _feed_until(self, end: int):
+        for view in self.buffer.views(self.stt_cursor, end):
+            self.recognizer.feed(view)
+            self.bytes_to_stt += len(view)
+        self.stt_cursor = max(self.stt_cursor, end)
+    
+    def push(self, data: bytes) -> List[VADEvent]:
+        """Buffer a frame and forward speech to the recognizer"""
+        data = self.converter.convert(data)
+        self.buffer.write(data)
+        if self.vad is None:
+            self._feed_until(self.buffer.end)
+            return []
+        
+        events = self.vad.process(data)
+        for event in events:
+            if event.kind == "start":
+                # Rewind to the utterance start; VAD confirms speech only
+                # after min_speech_ms, which the buffer still holds
+                self.stt_cursor = event.offset
+            else:
+                self._feed_until(event.offset)
+                self.recognizer.end_utterance()
+        if self.vad.in_speech:
+            self._feed_until(self.buffer.end)
+        else:
+            self.stt_cursor = self.buffer.end
+        return events
+
+async def forward_transcripts(call_id: str, recognizer, flow: ConversationFlowManager):
+    """Push transcripts to the client and answer each final utterance"""
+    async for result in recognizer.results():
+        await manager.send_message(call_id, {
+            "type": "transcript",
+            "text": result.text,
+            "confidence": result.confidence,
+            "is_final": result.is_final,
+            "call_id": call_id
+        })
+        
+        if result.is_final and result.text.strip():
+            final_at = time.perf_counter()
+            await manager.barge_in(call_id)
+            manager.start_reply(call_id, answer(call_id, flow, result.text, final_at, result.confidence))
+
+async def handle_audio_stream(
+    websocket: WebSocket,
+    call_id: str,
+    voice_profile: str = "lifestyle",
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None
+):
     """
     Handle audio streaming for real-time transcription
+    
+    Binary frames are LINEAR16 audio; server-side VAD forwards only the
+    speech to a streaming recognizer and ends utterances on silence. Text
+    frames carry control messages; {"type": "end_of_utterance"} forces a
+    final transcript for the audio received so far. Speech starting while a
+    reply is playing (detected by VAD, or {"type": "speech_start"} from the
+    client) cancels the reply and sends "stop_playback".
     """
+    recognizer = None
+    transcript_task = None
     try:
         await manager.connect(websocket, call_id)
+        audio_format = negotiate_call_format(call_id, input_format, output_format)
+        
+        flow = await open_call(call_id, voice_profile, audio_format)
+        start_speculation(call_id, flow, audio_format)
+        
+        converter = InboundConverter(audio_format.input)
+        recognizer = get_voice_manager().create_stream(audio_format=converter.stt_format)
+        await recognizer.start()
+        transcript_task = asyncio.create_task(forward_transcripts(call_id, recognizer, flow))
         
         await manager.send_message(call_id, {
             "type": "audio_stream_ready",
             "message": "Audio stream handler ready",
+            "audio_format": audio_format.as_dict(),
             "call_id": call_id
         })
         
-        audio_buffer = b""
+        pipeline = AudioPipeline(
+            recognizer,
+            VoiceActivityDetector(sample_rate=converter.output_rate) if settings.VAD_ENABLED else None,
+            converter
+        )
         
         while call_id in manager.active_connections:
             try:
-                # Receive audio data
-                data = await asyncio.wait_for(
-                    websocket.receive_bytes(),
+                # Receive audio data or a control message
+                message = await asyncio.wait_for(
+                    websocket.receive(),
                     timeout=30.0
                 )
                 
+                if message["type"] == "websocket.disconnect":
+                    break
+                
+                data = message.get("bytes")
+                if data is None:
+                    try:
+                        control = json.loads(message.get("text") or "{}")
+                    except json.JSONDecodeError:
+                        continue
+                    if control.get("type") == "end_of_utterance":
+                        recognizer.end_utterance()
+                    elif control.get("type") == "speech_start":
+                        # Client-side VAD, e.g. for Opus where the server has none
+                        await manager.barge_in(call_id)
+                    continue
+                
                 if not data:
                     continue
                 
-                audio_buffer += data
+                events = pipeline.push(data)
                 
                 # Send acknowledgment
                 await manager.send_message(call_id, {
                     "type": "audio_received",
                     "bytes_received": len(data),
-                    "buffer_size": len(audio_buffer)
+                    "buffer_size": len(pipeline.buffer)
                 })
+                for event in events:
+                    if event.kind == "start":
+                        await manager.barge_in(call_id)
+                    await manager.send_message(call_id, {
+                        "type": f"speech_{event.kind}",
+                        "offset": event.offset,
+                        "call_id": call_id
+                    })
                 
             except asyncio.TimeoutError:
                 break
@@ -177,9 +549,35 @@ async def handle_audio_stream(websocket: WebSocket, call_id: str):
             except Exception as e:
                 logger.error(f"Error in audio stream: {e}")
                 break
+        
+        logger.info(
+            f"Audio stream {call_id}: {pipeline.bytes_to_stt}/{pipeline.buffer.total_written} "
+            f"bytes sent to STT"
+        )
+        
+        # Let the last utterance be answered before the socket goes away;
+        # disconnecting cancels a reply still running
+        await recognizer.close()
+        await asyncio.wait_for(transcript_task, timeout=5.0)
+        reply_task = manager.reply_tasks.get(call_id)
+        if reply_task is not None:
+            try:
+                await asyncio.wait_for(reply_task, timeout=REPLY_DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Last reply of {call_id} not finished within {REPLY_DRAIN_SECONDS}s")
     
+    except AudioFormatError as e:
+        await manager.send_message(call_id, {
+            "type": "error",
+            "message": str(e),
+            "call_id": call_id
+        })
     except Exception as e:
         logger.error(f"Audio stream error for {call_id}: {e}")
     
     finally:
-        manager.disconnect(call_id)
+        if recognizer is not None:
+            await recognizer.close()
+        if transcript_task is not None and not transcript_task.done():
+            transcript_task.cancel()
+        await manager.disconnect(call_id)
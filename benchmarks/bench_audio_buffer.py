@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Per-frame cost of buffering call audio
+
+Compares the old ``audio_buffer += data`` bytes concatenation with
+AudioRingBuffer.write once 1, 10 and 60 minutes of 16 kHz LINEAR16 audio
+are already buffered. Frames are 20 ms (640 bytes).
+
+    python benchmarks/bench_audio_buffer.py [--frames 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from audio_buffer import AudioRingBuffer
+
+SAMPLE_RATE = 16000
+FRAME = b"\x01\x00" * (SAMPLE_RATE // 50)  # 20 ms
+
+def bytes_concat_cost(buffered: int, frames: int) -> float:
+    audio_buffer = b"\x00" * buffered
+    started = time.perf_counter()
+    for _ in range(frames):
+        audio_buffer += FRAME
+    return (time.perf_counter() - started) / frames
+
+def ring_buffer_cost(buffered: int, frames: int) -> float:
+    ring = AudioRingBuffer(capacity=3600 * SAMPLE_RATE * 2)
+    second = b"\x00" * (SAMPLE_RATE * 2)
+    for _ in range(buffered // len(second)):
+        ring.write(second)
+    started = time.perf_counter()
+    for _ in range(frames):
+        ring.write(FRAME)
+    return (time.perf_counter() - started) / frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'audio':>8} {'bytes +=':>14} {'ring write':>14} {'speedup':>10}")
+    for minutes in (1, 10, 60):
+        buffered = minutes * 60 * SAMPLE_RATE * 2
+        concat = bytes_concat_cost(buffered, args.frames)
+        ring = ring_buffer_cost(buffered, args.frames * 100)
+        print(
+            f"{minutes:>6} m {concat * 1e6:>11.1f} us {ring * 1e6:>11.2f} us "
+            f"{concat / ring:>9.0f}x"
+        )
+
+if __name__ == "__main__":
+    main()
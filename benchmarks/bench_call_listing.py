@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Cost of one page of GET /calls as retained calls grow
+
+Fills a CallRegistry with calls spread over users, profiles and statuses,
+then times one 50-call page (unfiltered, by profile, by user) against
+building the full list as the endpoint did before.
+
+    python benchmarks/bench_call_listing.py [--sizes 1000,10000,100000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from call_index import CallFilter
+from call_registry import CallRegistry
+
+async def fill(size: int) -> CallRegistry:
+    registry = CallRegistry()
+    for i in range(size):
+        call = await registry.register(f"user_{i % 1000}", "business" if i % 2 else "lifestyle")
+        if i % 3:
+            await registry.complete(call["call_id"])
+    return registry
+
+async def best_of(func, runs: int = 20) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+async def full_list(registry: CallRegistry) -> list:
+    return [{"call_id": call_id, "status": call["status"]} for call_id, call in registry.calls.items()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    cases = (
+        ("full list", None),
+        ("page", CallFilter()),
+        ("page by profile", CallFilter(voice_profile="business")),
+        ("page by user", CallFilter(user_id="user_7")),
+        ("page active+user", CallFilter(status="active", user_id="user_9")),
+    )
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'calls':>10}" + "".join(f"{name:>18}" for name, _ in cases) + "   (ms)")
+    for size in sizes:
+        registry = asyncio.run(fill(size))
+        row = f"{size:>10,}"
+        for name, filters in cases:
+            if filters is None:
+                seconds = asyncio.run(best_of(lambda: full_list(registry), runs=5))
+            else:
+                seconds = asyncio.run(best_of(lambda: registry.list_calls(filters, 50)))
+            row += f"{seconds * 1000:>18.3f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Event-loop latency under concurrent speech calls
+
+Runs 100 concurrent synthesize calls against a local fake TTS client whose
+round-trip is a blocking sleep, once called inline (the old behaviour) and
+once through SpeechExecutor, while a ticker measures how late the loop wakes.
+
+    python benchmarks/bench_event_loop.py [--calls 100] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from speech_engine import SpeechExecutor
+
+TICK = 0.005
+
+class FakeTTSClient:
+    """Blocking stand-in for texttospeech.TextToSpeechClient"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def synthesize_speech(self, **kwargs) -> bytes:
+        time.sleep(self.latency)
+        return b"\x00" * 4096
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    """Record how late each TICK-second sleep wakes up"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(time.perf_counter() - started - TICK)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_mode(mode: str, calls: int, latency: float) -> dict:
+    client = FakeTTSClient(latency)
+    executor = SpeechExecutor(
+        max_workers=calls,
+        limits={"tts": calls},
+        timeouts={"tts": 60.0},
+    )
+
+    async def inline_call():
+        return client.synthesize_speech(text="Hallo")
+
+    async def pooled_call():
+        return await executor.run("tts", client.synthesize_speech, text="Hallo")
+
+    call = inline_call if mode == "inline" else pooled_call
+    stop = asyncio.Event()
+    samples = []
+    ticker = asyncio.create_task(measure_lag(stop, samples))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    wall = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    executor.shutdown()
+    samples = samples or [0.0]
+    return {
+        "mode": mode,
+        "wall": wall,
+        "lag_p50_ms": percentile(samples, 50) * 1000,
+        "lag_p99_ms": percentile(samples, 99) * 1000,
+        "lag_max_ms": max(samples) * 1000,
+        "lag_mean_ms": statistics.mean(samples) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.calls} concurrent calls, fake backend latency {args.latency * 1000:.0f} ms")
+    print(f"{'mode':<8} {'wall s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("inline", "executor"):
+        result = asyncio.run(run_mode(mode, args.calls, args.latency))
+        print(
+            f"{result['mode']:<8} {result['wall']:>8.2f} {result['lag_p50_ms']:>8.2f} "
+            f"{result['lag_p99_ms']:>8.2f} {result['lag_max_ms']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
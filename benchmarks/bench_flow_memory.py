@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Per-call memory footprint of conversation flow state
+
+Creates many ConversationFlowManagers, drives each through a number of
+turns with unique transcripts (as real calls produce), and measures the
+allocated bytes per call with tracemalloc. Runs once with the bounded
+FLOW_HISTORY_TURNS history and once with history effectively unbounded,
+as it was before.
+
+    python benchmarks/bench_flow_memory.py [--calls 2000] [--turns 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from config import settings
+from conversation_flows import ConversationFlowManager, VoiceProfile
+
+async def footprint(calls: int, turns: int, history_turns: int) -> float:
+    """Average bytes held per call after ``turns`` exchanges"""
+    settings.FLOW_HISTORY_TURNS = history_turns
+    profiles = (VoiceProfile.LIFESTYLE, VoiceProfile.BUSINESS)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    managers = [ConversationFlowManager(profiles[i % 2]) for i in range(calls)]
+    for turn in range(turns):
+        for i, manager in enumerate(managers):
+            await manager.respond(f"Beller {i} zegt in beurt {turn}: ik ben een beetje moe van het werk")
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del managers
+    return held / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    bounded = settings.FLOW_HISTORY_TURNS
+    rows = (
+        (f"history <= {bounded}", bounded),
+        ("history unbounded", 2 * args.turns + 1),
+    )
+    print(f"{args.calls} calls, {args.turns} turns each")
+    print(f"{'state':<20}{'per call':>12}{'calls per GB':>16}")
+    for name, history_turns in rows:
+        per_call = asyncio.run(footprint(args.calls, args.turns, history_turns))
+        print(f"{name:<20}{per_call / 1024:>10.1f}KB{int(2**30 / per_call):>16,}")
+
+if __name__ == "__main__":
+    main()
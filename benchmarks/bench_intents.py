@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Per-turn cost of intent routing
+
+Compares the old per-branch ``any(word in user_lower for word in [...])``
+substring scans with the compiled IntentMatcher over a corpus of realistic
+caller transcripts, and counts the turns where the substring scan fires on
+a keyword hidden inside another word.
+
+    python benchmarks/bench_intents.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flow_definitions import get_flow_registry
+
+CORPUS = (
+    "Ik heb de laatste tijd veel stress op mijn werk.",
+    "Ik slaap erg slecht, ik word elke nacht wakker.",
+    "Het gaat eigenlijk best goed met me.",
+    "Ik wil graag vaker gaan sporten.",
+    "Mijn moeder is ziek en dat vind ik moeilijk.",
+    "Ik ben benieuwd wat je me kunt aanraden.",
+    "Gisteren heb ik drie kilometer gerend en daarna yoga gedaan.",
+    "Eerlijk gezegd voel ik me een beetje moe en uitgeput.",
+    "Ik maak me zorgen over mijn gezondheid.",
+    "Nou, het weekend was fantastisch, we zijn naar zee geweest.",
+    "Ik weet het niet zo goed, alles is een beetje veel.",
+    "Mijn collega's zijn heel gezellig maar de deadlines zijn zwaar.",
+    "Ik eet vaak laat en snack veel 's avonds.",
+    "Kun je me helpen met een schema voor de sportschool?",
+    "Ik heb geen tijd om te bewegen door mijn drukke baan.",
+    "Dank je wel, dit was een prettig gesprek.",
+    "Ja, dat klopt, ik drink ook te weinig water.",
+    "Sinds kort fiets ik elke dag naar mijn werk.",
+    "Ik ben wat angstig voor de presentatie van morgen.",
+    "Het regent al de hele week, daar word ik somber van.",
+)
+
+KEYWORDS = (
+    ("stress", ["stress", "gestrest", "angstig", "zorgen"]),
+    ("sleep", ["moe", "vermoeid", "uitgeput", "slaperig"]),
+    ("positive", ["goed", "super", "fantastisch", "prima", "prima"]),
+    ("exercise", ["beweeg", "sport", "gym", "rennen", "yoga", "fitness"]),
+)
+
+def substring_route(text: str) -> str:
+    user_lower = text.lower()
+    for intent, words in KEYWORDS:
+        if any(word in user_lower for word in words):
+            return intent
+    return "default"
+
+def substring_all(text: str) -> set:
+    user_lower = text.lower()
+    return {intent for intent, words in KEYWORDS if any(word in user_lower for word in words)}
+
+LIFESTYLE = get_flow_registry().get("lifestyle").matcher
+
+def compiled_route(text: str) -> str:
+    intents = LIFESTYLE.match(text)
+    for intent, _ in KEYWORDS:
+        if intent in intents:
+            return intent
+    return "default"
+
+def per_turn(route, rounds: int, repeats: int = 5) -> float:
+    """Best of ``repeats`` timings, to damp scheduler noise"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in CORPUS:
+                route(text)
+        best = min(best, (time.perf_counter() - started) / (rounds * len(CORPUS)))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = (
+        ("substring, first branch", substring_route),
+        ("substring, all intents", substring_all),
+        ("compiled, all intents", LIFESTYLE.match),
+    )
+    print(f"{'router':<26}{'per turn':>10}")
+    for name, route in rows:
+        print(f"{name:<26}{per_turn(route, args.rounds) * 1e6:>8.2f}us")
+
+    differing = [(t, substring_route(t), compiled_route(t)) for t in CORPUS if substring_route(t) != compiled_route(t)]
+    print(f"\n{len(differing)} of {len(CORPUS)} turns routed differently:")
+    for text, old, new in differing:
+        print(f"  {old:>9} -> {new:<9} {text}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Dashboard reads and turn writes at the same time on an SQLite file
+
+Runs a writer thread committing a batch of turns every --interval ms (as the
+write-behind writer does under load) next to --readers threads that page
+through stored calls and load single calls (as the dashboard does), first
+on one shared connection (StaticPool, SQLITE_MODE=shared) and then on the
+pooled WAL engines (SQLITE_MODE=pooled), and reports throughput and
+latency of both sides.
+
+    python benchmarks/bench_sqlite_pool.py [--calls 5000] [--readers 8] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from call_archive import CallArchive
+from call_index import CallFilter, Cursor
+from models import Base, CallRecord, ConversationTurn
+from sqlite_engine import create_sqlite_engines
+
+def shared_engines(url: str):
+    engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    return engine, engine
+
+def fill(session_factory, calls: int, turns_per_call: int = 20):
+    now = datetime.utcnow()
+    db = session_factory()
+    for first in range(0, calls, 1000):
+        batch = range(first, min(first + 1000, calls))
+        db.execute(insert(CallRecord), [{
+            "call_id": f"call-{i}", "user_id": f"user_{i % 97}", "status": "completed",
+            "voice_profile": "business" if i % 2 else "lifestyle",
+            "start_time": now - timedelta(seconds=(calls - i) * 60), "duration": 60.0,
+        } for i in batch])
+        db.execute(insert(ConversationTurn), [{
+            "call_id": f"call-{i}", "role": "user" if turn % 2 else "assistant",
+            "text": f"Beurt {turn} van beller {i}", "confidence": 0.9,
+            "timestamp": now - timedelta(seconds=(calls - i) * 60 - turn),
+        } for i in batch for turn in range(turns_per_call)])
+        db.commit()
+    db.close()
+
+def percentile(timings, q: float) -> float:
+    return statistics.quantiles(timings, n=100)[q - 1] * 1000 if len(timings) > 1 else float("nan")
+
+def run(write_engine, read_engine, calls: int, readers: int, seconds: float, interval: float, batch: int) -> dict:
+    writes, reads = sessionmaker(bind=write_engine), sessionmaker(bind=read_engine)
+    archive = CallArchive(reads)
+    stop = threading.Event()
+    write_timings, read_timings, errors = [], [], []
+
+    def writer():
+        call_id = f"live-{uuid.uuid4().hex[:8]}"
+        db = writes()
+        db.add(CallRecord(call_id=call_id, user_id="user_live", status="active"))
+        db.commit()
+        db.close()
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = writes()
+            try:
+                db.execute(insert(ConversationTurn), [{
+                    "call_id": call_id, "role": "user", "text": "Ik wil een afspraak verzetten",
+                    "confidence": 0.9, "timestamp": datetime.utcnow(),
+                } for _ in range(batch)])
+                db.commit()
+                write_timings.append(time.perf_counter() - started)
+            except Exception as e:
+                db.rollback()
+                errors.append(e)
+            finally:
+                db.close()
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                archive.page(CallFilter(voice_profile=rng.choice(["business", "lifestyle", None])), 20, Cursor(0, datetime.max, ""))
+                archive.load(f"call-{rng.randrange(calls)}")
+                read_timings.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "turns/s": len(write_timings) * batch / seconds,
+        "write p50": percentile(write_timings, 50),
+        "write p99": percentile(write_timings, 99),
+        "reads/s": len(read_timings) / seconds,
+        "read p50": percentile(read_timings, 50),
+        "read p99": percentile(read_timings, 99),
+        "errors": len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=10.0, help="ms between write batches")
+    parser.add_argument("--batch", type=int, default=50, help="turns per write batch")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'turns/s':>10}{'write p50 ms':>14}{'write p99 ms':>14}{'reads/s':>10}{'read p50 ms':>13}{'read p99 ms':>13}{'errors':>8}")
+    for mode, engines in (("shared", shared_engines), ("pooled", create_sqlite_engines)):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            write_engine, read_engine = engines(url)
+            Base.metadata.create_all(bind=write_engine)
+            fill(sessionmaker(bind=write_engine), args.calls)
+            result = run(write_engine, read_engine, args.calls, args.readers, args.seconds, args.interval / 1000, args.batch)
+            write_engine.dispose()
+            read_engine.dispose()
+        print(
+            f"{mode:<8}{result['turns/s']:>10,.0f}{result['write p50']:>14.1f}{result['write p99']:>14.1f}"
+            f"{result['reads/s']:>10,.0f}{result['read p50']:>13.1f}{result['read p99']:>13.1f}{result['errors']:>8}"
+        )
+
+if __name__ == "__main__":
+    main()
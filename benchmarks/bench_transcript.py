@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Transcript memory per turn and read cost for long calls
+
+Compares the compact Transcript with the previous layout, where every turn
+was stored as a dict (uuid4 id, isoformat timestamp) plus a formatted
+string, and every read re-joined the whole transcript.
+
+    python benchmarks/bench_transcript.py [--turns 2000] [--reads 500]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from transcript import Transcript
+
+class DictTranscript:
+    """The previous per-call turns and transcript lists"""
+
+    def __init__(self):
+        self.turns = []
+        self.lines = []
+
+    def append(self, role, text, confidence=None):
+        self.turns.append({
+            "turn_id": str(uuid.uuid4()),
+            "role": role,
+            "text": text,
+            "confidence": confidence if role == "user" else 1.0,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+        self.lines.append(f"{role}: {text}")
+
+    def text(self):
+        return "\n".join(self.lines)
+
+def build(cls, turns: int):
+    transcript = cls()
+    for turn in range(turns):
+        role = "user" if turn % 2 else "assistant"
+        transcript.append(role, f"Beurt {turn}: ik slaap de laatste tijd erg slecht", 0.9)
+    return transcript
+
+def measure(cls, turns: int, reads: int):
+    tracemalloc.start()
+    transcript = build(cls, turns)
+    per_turn = tracemalloc.get_traced_memory()[0] / turns
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for _ in range(reads):
+        transcript.text()
+    per_read = (time.perf_counter() - started) / reads
+    return per_turn, per_read
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns, {args.reads} reads")
+    print(f"{'layout':<14}{'bytes/turn':>12}{'us/read':>12}")
+    for name, cls in (("dicts + join", DictTranscript), ("Transcript", Transcript)):
+        per_turn, per_read = measure(cls, args.turns, args.reads)
+        print(f"{name:<14}{per_turn:>12.0f}{per_read * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
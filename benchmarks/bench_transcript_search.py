@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Transcript search latency over a large turn table
+
+Stores generated Dutch turns (words drawn from a vocabulary with a Zipf-like
+frequency, so some words are in most turns and some in few) in a temporary
+SQLite file, indexes them with TranscriptSearch.catch_up, and times ranked
+queries against a LIKE scan of the same table.
+
+    python benchmarks/bench_transcript_search.py [--turns 1000000] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, CallRecord, ConversationTurn
+from transcript_search import TranscriptSearch
+
+VOCABULARY = """
+ik je u de het een en niet dat is wil graag maar ook nog wel heel erg even
+slaap slapen sliep moe vermoeid energie stress rust werk werken baan collega
+afspraak afspraken verzetten annuleren morgen vandaag volgende week maandag
+factuur facturen betaling betalen rekening bedrag korting abonnement opzeggen
+hoofdpijn rugpijn pijn dokter huisarts ziekenhuis medicijnen behandeling
+sport sporten hardlopen fietsen zwemmen wandelen gezond eten ontbijt koffie
+levering bestelling pakket bezorgd retour klacht klantenservice wachten
+vakantie reis reizen hotel vlucht boeken familie kinderen partner vrienden
+""".split()
+
+QUERIES = (
+    ("common word", "erg", {}),
+    ("rare word", "zwemmen", {}),
+    ("two words", "factuur korting", {}),
+    ("phrase", '"afspraak verzetten"', {}),
+    ("word + profile", "stress", {"voice_profile": "business"}),
+    ("word + last day", "hoofdpijn", {"since": "day"}),
+)
+
+def fill(session_factory, turns: int, per_call: int = 20):
+    rng = random.Random(7)
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    now = datetime.utcnow()
+    db = session_factory()
+    for first in range(0, turns, 10000):
+        calls, rows = [], []
+        for i in range(first, min(first + 10000, turns)):
+            call_id = f"call-{i // per_call}"
+            at = now - timedelta(seconds=(turns - i) * 30)
+            if i % per_call == 0:
+                calls.append({
+                    "call_id": call_id, "user_id": f"user_{i % 997}", "status": "completed",
+                    "voice_profile": "business" if (i // per_call) % 2 else "lifestyle", "start_time": at,
+                })
+            words = rng.choices(VOCABULARY, weights, k=rng.randint(5, 14))
+            rows.append({
+                "turn_id": f"turn-{i}", "call_id": call_id, "role": "user" if i % 2 else "assistant",
+                "text": " ".join(words).capitalize(), "confidence": 0.9, "timestamp": at,
+            })
+        if calls:
+            db.execute(insert(CallRecord), calls)
+        db.execute(insert(ConversationTurn), rows)
+        db.commit()
+    db.close()
+
+def timed(func, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings), len(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        started = time.perf_counter()
+        fill(session_factory, args.turns)
+        print(f"stored {args.turns:,} turns in {time.perf_counter() - started:.1f}s")
+
+        search = TranscriptSearch(session_factory)
+        started = time.perf_counter()
+        search.catch_up(batch_size=10000)
+        seconds = time.perf_counter() - started
+        print(f"indexed in {seconds:.1f}s ({args.turns / seconds:,.0f} turns/s)")
+
+        fallback = TranscriptSearch(session_factory)
+        fallback.available = False
+        print(f"{'query':<18}{'fts p50 ms':>12}{'fts max ms':>12}{'like p50 ms':>13}{'hits':>6}")
+        for name, query, options in QUERIES:
+            if options.get("since") == "day":
+                options = {"since": datetime.utcnow() - timedelta(days=1)}
+            fts = timed(lambda: search.search(query, limit=20, **options), args.runs)
+            like = timed(lambda: fallback.search(query, limit=20, **options), min(args.runs, 3))
+            print(f"{name:<18}{fts[0]:>12.1f}{fts[1]:>12.1f}{like[0]:>13.1f}{fts[2]:>6}")
+
+if __name__ == "__main__":
+    main()
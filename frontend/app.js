@@ -4,6 +4,13 @@ const API_BASE = window.APP_CONFIG.API_BASE;
 // Track backend availability
 let backendAvailable = false;
 
+// Calls are listed a page at a time; the cursor fetches the next page
+const CALLS_PAGE_SIZE = 50;
+let callsCursor = null;
+let callsPages = 0;
+// Listed calls by ID, newest first; a refresh updates them in place
+let loadedCalls = new Map();
+
 // Demo/mock data for when backend is not available
 const DEMO_STATS = {
     total_calls: 0,
@@ -65,8 +72,20 @@ async function refreshStats() {
     }
 }
 
-async function loadCalls() {
+function renderCall(call) {
+    return `
+            <div class="call-item">
+                <div class="call-id">ID: ${call.call_id}</div>
+                <div>User: ${call.user_id}</div>
+                <div>Profile: ${call.voice_profile}</div>
+                <span class="call-status ${call.status === 'active' ? 'active' : 'completed'}">${call.status}</span>
+            </div>
+        `;
+}
+
+async function loadCalls(more = false) {
     const list = document.getElementById('calls-list');
+    const loadMore = document.getElementById('load-more-calls');
     
     // If backend is not available, show appropriate message
     if (!backendAvailable) {
@@ -75,36 +94,63 @@ async function loadCalls() {
     }
     
     try {
-        const data = await safeFetch(`${API_BASE}/calls`);
+        let url = `${API_BASE}/calls?limit=${CALLS_PAGE_SIZE}`;
+        if (more && callsCursor) {
+            url += `&cursor=${encodeURIComponent(callsCursor)}`;
+        }
+        const data = await safeFetch(url);
+        const calls = data.calls || [];
+        
+        if (more) {
+            calls.forEach(call => loadedCalls.set(call.call_id, call));
+            callsCursor = data.next_cursor || null;
+            callsPages += 1;
+        } else {
+            // Refresh the first page and keep the pages loaded below it
+            const merged = new Map(calls.map(call => [call.call_id, call]));
+            loadedCalls.forEach((call, callId) => {
+                if (!merged.has(callId)) {
+                    merged.set(callId, call);
+                }
+            });
+            loadedCalls = merged;
+            if (callsPages <= 1) {
+                callsCursor = data.next_cursor || null;
+                callsPages = 1;
+            }
+        }
+        loadMore.style.display = callsCursor ? '' : 'none';
         
-        if (!data.calls || data.calls.length === 0) {
+        if (loadedCalls.size === 0) {
             list.innerHTML = '<p class="empty-state">No active calls</p>';
             return;
         }
         
-        list.innerHTML = data.calls.map(call => `
-            <div class="call-item">
-                <div class="call-id">ID: ${call.call_id}</div>
-                <div>User: ${call.user_id}</div>
-                <div>Profile: ${call.voice_profile}</div>
-                <span class="call-status ${call.status === 'active' ? 'active' : 'completed'}">${call.status}</span>
-            </div>
-        `).join('');
+        list.innerHTML = Array.from(loadedCalls.values()).map(renderCall).join('');
     } catch (e) {
         console.error('Error loading calls:', e.message);
         list.innerHTML = `<p class="error-message" style="color: #dc3545; padding: 10px; background: #f8d7da; border-radius: 5px;">Error loading calls: ${e.message}</p>`;
     }
 }
 
+const CALL_ID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
 async function searchTranscript() {
-    const callId = document.getElementById('search-call').value;
+    const query = document.getElementById('search-call').value.trim();
     const display = document.getElementById('transcript-display');
     
-    if (!callId) {
-        display.innerHTML = '<p class="error-message" style="color: #dc3545; padding: 10px; background: #f8d7da; border-radius: 5px;">Please enter a call ID</p>';
+    if (!query) {
+        display.innerHTML = '<p class="error-message" style="color: #dc3545; padding: 10px; background: #f8d7da; border-radius: 5px;">Please enter a call ID or search words</p>';
         return;
     }
     
+    // A call ID shows that call's transcript, anything else searches all calls
+    if (!CALL_ID_PATTERN.test(query)) {
+        await searchAllTranscripts(query);
+        return;
+    }
+    const callId = query;
+    
     // If backend is not available, show appropriate message
     if (!backendAvailable) {
         display.innerHTML = '<p class="empty-state">Backend not connected. Please configure your backend server to search transcripts.</p>';
@@ -137,6 +183,52 @@ async function searchTranscript() {
     }
 }
 
+async function searchAllTranscripts(query) {
+    const display = document.getElementById('transcript-display');
+    
+    if (!backendAvailable) {
+        display.innerHTML = '<p class="empty-state">Backend not connected. Please configure your backend server to search transcripts.</p>';
+        return;
+    }
+    
+    try {
+        const data = await safeFetch(`${API_BASE}/transcripts/search?q=${encodeURIComponent(query)}`);
+        
+        if (!data.results || data.results.length === 0) {
+            display.innerHTML = '<p class="empty-state">No matching turns found</p>';
+            return;
+        }
+        
+        // Search hits are caller speech, so build the rows as DOM nodes
+        // rather than interpolating them into innerHTML.
+        display.innerHTML = '';
+        data.results.forEach(result => {
+            const row = document.createElement('div');
+            row.className = `transcript-turn ${result.role === 'user' ? 'user' : 'assistant'}`;
+            row.style.cursor = 'pointer';
+            row.addEventListener('click', () => showTranscript(result.call_id));
+
+            const label = document.createElement('div');
+            label.className = 'transcript-label';
+            label.textContent = `${result.role === 'user' ? 'You' : 'Assistant'} · ${String(result.call_id).substring(0, 8)}...`;
+
+            const text = document.createElement('div');
+            text.textContent = result.text;
+
+            row.append(label, text);
+            display.appendChild(row);
+        });
+    } catch (e) {
+        console.error('Error searching transcripts:', e.message);
+        display.innerHTML = `<p class="error-message" style="color: #dc3545; padding: 10px; background: #f8d7da; border-radius: 5px;">Error searching transcripts: ${e.message}</p>`;
+    }
+}
+
+function showTranscript(callId) {
+    document.getElementById('search-call').value = callId;
+    searchTranscript();
+}
+
 async function createCall() {
     const userId = document.getElementById('user-id').value;
     const profile = document.getElementById('voice-profile').value;
@@ -38,6 +38,17 @@ def test_list_calls():
     assert "active_calls" in data
     assert "calls" in data
 
+def test_list_calls_paginated():
+    """Test listing by page with a cursor and filters"""
+    for i in range(3):
+        client.post("/calls", json={"user_id": "pager", "voice_profile": "business"})
+    first = client.get("/calls?user_id=pager&limit=2").json()
+    assert len(first["calls"]) == 2 and first["next_cursor"]
+    second = client.get(f"/calls?user_id=pager&limit=2&cursor={first['next_cursor']}").json()
+    ids = [c["call_id"] for c in first["calls"] + second["calls"]]
+    assert len(set(ids)) == len(ids) >= 3
+    assert client.get("/calls?cursor=not-a-cursor").status_code == 400
+
 def test_get_stats():
     """Test statistics endpoint"""
     response = client.get("/stats")
@@ -48,6 +59,42 @@ def test_get_stats():
     assert "completed_calls" in data
     assert "average_duration" in data
 
+def test_stats_track_call_lifecycle():
+    """Test creating and ending a call moves the dashboard counters"""
+    before = client.get("/stats").json()
+    call_id = client.post("/calls", json={"user_id": "user2", "voice_profile": "lifestyle"}).json()["call_id"]
+    assert client.get("/stats").json()["active_calls"] == before["active_calls"] + 1
+    assert client.delete(f"/calls/{call_id}").status_code == 200
+    after = client.get("/stats").json()
+    assert after["active_calls"] == before["active_calls"]
+    assert after["completed_calls"] == before["completed_calls"] + 1
+    assert after["total_calls"] == before["total_calls"] + 1
+
+def test_stat_distributions():
+    """Test the percentile endpoint and its window bounds"""
+    data = client.get("/stats/distributions?window=300").json()
+    assert data["window"] == 300
+    assert set(data["metrics"]["call_duration"]["all"]) >= {"count", "p50", "p90", "p99"}
+    assert client.get("/stats/distributions?window=99999999").status_code == 400
+
+def test_websocket_call_is_registered():
+    """Test a call opened over the socket shows up in the call API"""
+    with client.websocket_connect("/ws/call/registry-test?voice_profile=business") as ws:
+        assert ws.receive_json()["type"] == "greeting"
+        call = client.get("/calls/registry-test").json()
+        assert call["status"] == "active"
+        assert call["transcript_turns"] == 1
+    transcript = client.get("/calls/registry-test/transcript").json()["transcript"]
+    assert transcript[0]["role"] == "assistant"
+    assert transcript[0]["text"]
+
+def test_transcript_search():
+    """Test the search endpoint answers and rejects queries of only stop words"""
+    response = client.get("/transcripts/search?q=afspraak&limit=5")
+    assert response.status_code == 200
+    assert response.json()["query"] == "afspraak"
+    assert client.get("/transcripts/search?q=de%20het").status_code == 400
+
 def test_invalid_call_id():
     """Test error handling for invalid call ID"""
     response = client.get("/calls/invalid_id")
@@ -57,6 +104,11 @@ if __name__ == "__main__":
     test_health_check()
     test_create_call()
     test_list_calls()
+    test_list_calls_paginated()
     test_get_stats()
+    test_stats_track_call_lifecycle()
+    test_stat_distributions()
+    test_websocket_call_is_registered()
+    test_transcript_search()
     test_invalid_call_id()
     print("All API tests passed!")
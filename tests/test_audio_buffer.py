@@ -0,0 +1,55 @@
+"""Test audio ring buffer"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from audio_buffer import AudioRingBuffer, max_call_audio_bytes
+from config import settings
+
+def test_default_capacity_from_settings():
+    """Test cap covers the longest allowed call"""
+    buffer = AudioRingBuffer(chunk_size=32000)
+    assert buffer.capacity >= settings.MAX_CALL_DURATION * settings.SAMPLE_RATE * 2
+    assert buffer.capacity == max_call_audio_bytes()
+    assert len(buffer) == 0
+
+def test_write_and_read_across_chunks():
+    """Test frames spanning chunk boundaries read back intact"""
+    buffer = AudioRingBuffer(capacity=64, chunk_size=16)
+    buffer.write(b"abcdefghij")
+    buffer.write(b"klmnopqrst")
+    assert len(buffer) == 20
+    assert buffer.read() == b"abcdefghijklmnopqrst"
+    assert buffer.read(5, 15) == b"fghijklmno"
+    assert [len(v) for v in buffer.views(5, 20)] == [11, 4]
+
+def test_views_are_zero_copy():
+    """Test views share memory with the buffer"""
+    buffer = AudioRingBuffer(capacity=32, chunk_size=16)
+    buffer.write(b"\x00" * 8)
+    view = buffer.views()[0]
+    buffer._chunks[0][0] = 0x7f
+    assert view[0] == 0x7f
+
+def test_wraps_and_drops_oldest_audio():
+    """Test buffer stays bounded and keeps the newest audio"""
+    buffer = AudioRingBuffer(capacity=16, chunk_size=8)
+    for i in range(10):
+        buffer.write(bytes([i]) * 4)
+    assert len(buffer) == 16
+    assert buffer.total_written == 40
+    assert buffer.start == 24
+    assert buffer.read() == bytes([6] * 4 + [7] * 4 + [8] * 4 + [9] * 4)
+    assert buffer.read(0, 28) == bytes([6] * 4)
+
+def test_frame_larger_than_capacity():
+    """Test an oversized frame keeps only its tail"""
+    buffer = AudioRingBuffer(capacity=8, chunk_size=4)
+    buffer.write(bytes(range(12)))
+    assert buffer.read() == bytes(range(4, 12))
+    assert buffer.total_written == 12
+
+def test_chunks_allocated_lazily():
+    """Test memory grows with audio received, not with the cap"""
+    buffer = AudioRingBuffer(capacity=1024, chunk_size=64)
+    buffer.write(b"\x01" * 100)
+    assert sum(chunk is not None for chunk in buffer._chunks) == 2
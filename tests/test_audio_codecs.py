@@ -0,0 +1,99 @@
+"""Test audio format negotiation and conversion"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from audio_codecs import (
+    AudioFormat, AudioFormatError, InboundConverter, mulaw_decode,
+    mulaw_encode, negotiate, resample, strip_wav_header
+)
+
+def test_negotiate_picks_first_supported_offer():
+    """Test offers are taken in the caller's preference order"""
+    audio_format = negotiate(["speex/8000", "mulaw/8000", "pcm16/16000"], ["opus", "mp3"])
+    assert audio_format.input == AudioFormat("mulaw", 8000)
+    assert audio_format.output == AudioFormat("opus", 48000)
+    assert audio_format.as_dict() == {"input": "mulaw/8000", "output": "opus/48000"}
+
+def test_negotiate_defaults_and_rejects():
+    """Test defaults without offers and errors for unsupported ones"""
+    audio_format = negotiate()
+    assert audio_format.input == AudioFormat("pcm16", 16000)
+    assert audio_format.output == AudioFormat("mp3")
+    with pytest.raises(AudioFormatError):
+        negotiate(["mulaw/16000"])
+
+def test_mulaw_roundtrip():
+    """Test mu-law companding stays within G.711 quantization error"""
+    samples = np.linspace(-32000, 32000, 4001).astype(np.int16)
+    encoded = mulaw_encode(samples)
+    assert len(encoded) == len(samples)
+    decoded = mulaw_decode(encoded)
+    error = np.abs(decoded.astype(np.int32) - samples)
+    assert np.all(error <= np.maximum(np.abs(samples.astype(np.int32)) // 16, 8))
+
+def test_resample_preserves_tone():
+    """Test 48 kHz to 16 kHz keeps the length ratio and signal"""
+    t = np.arange(48000) / 48000
+    samples = (8000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+    out = resample(samples, 48000, 16000)
+    assert len(out) == 16000
+    # Each output sample averages three inputs, so it sits on the middle one
+    expected = 8000 * np.sin(2 * np.pi * 200 * (3 * np.arange(16000) + 1) / 48000)
+    assert np.max(np.abs(out - expected)) < 200
+
+def test_converter_passthrough_when_formats_match():
+    """Test matching PCM16 frames are returned without conversion"""
+    converter = InboundConverter(AudioFormat("pcm16", 16000))
+    frame = b"\x01\x02" * 160
+    assert converter.convert(frame) is frame
+    assert converter.stt_format == AudioFormat("pcm16", 16000)
+
+def test_converter_mulaw_and_odd_frames():
+    """Test mu-law expands to PCM16 and 48 kHz frames downsample seamlessly"""
+    mulaw = InboundConverter(AudioFormat("mulaw", 8000))
+    assert len(mulaw.convert(b"\xff" * 160)) == 320
+    assert mulaw.output_rate == 8000
+
+    wide = InboundConverter(AudioFormat("pcm16", 48000))
+    audio = np.zeros(4800, dtype="<i2").tobytes()
+    out = b"".join(wide.convert(audio[i:i + 1001]) for i in range(0, len(audio), 1001))
+    assert len(out) == 1600 * 2
+
+def test_converter_uneven_ratio_is_seamless():
+    """Test 44.1 kHz frames resample to the same audio as the whole buffer"""
+    t = np.arange(44100) / 44100
+    audio = (8000 * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+    whole = InboundConverter(AudioFormat("pcm16", 44100)).convert(audio)
+
+    chunked = InboundConverter(AudioFormat("pcm16", 44100))
+    out = b"".join(chunked.convert(audio[i:i + 883]) for i in range(0, len(audio), 883))
+    assert out == whole
+    assert abs(len(out) // 2 - 16000) <= 1
+
+def test_strip_wav_header():
+    """Test RIFF container is removed from raw PCM output"""
+    data = b"\x01\x02\x03\x04"
+    wav = (b"RIFF" + (36 + len(data)).to_bytes(4, "little") + b"WAVE"
+           + b"fmt " + (16).to_bytes(4, "little") + b"\x00" * 16
+           + b"data" + len(data).to_bytes(4, "little") + data)
+    assert strip_wav_header(wav) == data
+    assert strip_wav_header(b"ID3mp3") == b"ID3mp3"
+
+def test_create_call_stores_negotiated_format():
+    """Test POST /calls negotiates and stores the call's formats"""
+    from main import app
+    client = TestClient(app)
+    response = client.post("/calls", json={
+        "user_id": "tel", "voice_profile": "business",
+        "input_formats": ["mulaw/8000"], "output_formats": ["mulaw/8000"],
+    })
+    assert response.status_code == 200
+    call_id = response.json()["call_id"]
+    assert response.json()["audio_format"] == {"input": "mulaw/8000", "output": "mulaw/8000"}
+    assert client.get(f"/calls/{call_id}").json()["audio_format"]["input"] == "mulaw/8000"
+
+    rejected = client.post("/calls", json={"user_id": "tel", "input_formats": ["speex"]})
+    assert rejected.status_code == 400
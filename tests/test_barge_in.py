@@ -0,0 +1,87 @@
+"""Test barge-in cancels the reply in progress"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import pytest
+import ws_handler
+from ws_handler import ConnectionManager, barge_in_stats
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+        self.audio = []
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+    async def send_bytes(self, audio):
+        self.audio.append(audio)
+
+class SlowVoiceManager:
+    """Streams one sentence right away and the rest slowly"""
+
+    def __init__(self):
+        self.cancelled = 0
+
+    async def synthesize_stream(self, text, voice_profile="lifestyle", cacheable=True, audio_format=None):
+        yield b"first"
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        yield b"second"
+
+def connected_manager(call_id: str) -> ConnectionManager:
+    manager = ConnectionManager()
+    manager.active_connections[call_id] = FakeWebSocket()
+    return manager
+
+@pytest.mark.asyncio
+async def test_barge_in_cancels_reply_and_stops_playback():
+    """Test interrupting stops synthesis and tells the client to flush audio"""
+    manager = connected_manager("barge")
+    interruptions = barge_in_stats.interruptions
+
+    async def reply():
+        await asyncio.sleep(5)
+
+    task = manager.start_reply("barge", reply())
+    await asyncio.sleep(0)
+    latency = await manager.barge_in("barge")
+    assert task.cancelled()
+    assert latency is not None and latency < 0.1
+    assert "barge" not in manager.reply_tasks
+    assert manager.active_connections["barge"].messages == [{
+        "type": "stop_playback", "reason": "barge_in",
+        "cancel_latency": latency, "call_id": "barge",
+    }]
+    assert barge_in_stats.interruptions == interruptions + 1
+    assert barge_in_stats.as_dict()["cancel_latency_max"] is not None
+
+@pytest.mark.asyncio
+async def test_barge_in_without_reply_is_noop():
+    """Test speech while the assistant is silent sends nothing"""
+    manager = connected_manager("quiet")
+    manager.start_reply("quiet", asyncio.sleep(0))
+    await asyncio.sleep(0.01)
+    assert await manager.barge_in("quiet") is None
+    assert manager.active_connections["quiet"].messages == []
+
+@pytest.mark.asyncio
+async def test_barge_in_drops_unsent_reply_audio(monkeypatch):
+    """Test the streamed reply stops mid-way and its pending synthesis is cancelled"""
+    manager = connected_manager("stream")
+    voice_manager = SlowVoiceManager()
+    monkeypatch.setattr(ws_handler, "manager", manager)
+    monkeypatch.setattr(ws_handler, "get_voice_manager", lambda: voice_manager)
+
+    manager.start_reply("stream", ws_handler.stream_reply("stream", "Een. Twee.", "lifestyle"))
+    await asyncio.sleep(0.01)
+    await manager.barge_in("stream")
+
+    websocket = manager.active_connections["stream"]
+    assert websocket.audio == [b"first"]
+    assert voice_manager.cancelled == 1
+    assert [m["type"] for m in websocket.messages] == ["stop_playback"]
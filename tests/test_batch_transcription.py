@@ -0,0 +1,133 @@
+"""Test batch transcription of recorded calls"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import io
+import wave
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from audio_codecs import AudioFormat
+from batch_transcription import BatchTranscriber, prepare_recording, save_results, split_on_silence
+from models import CallRecord, ConversationTurn
+from transcript_search import TranscriptSearch
+
+RATE = 16000
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(RATE * seconds), dtype="<i2")
+
+def recording(*parts) -> bytes:
+    return np.concatenate(parts).astype("<i2").tobytes()
+
+def to_wav(pcm: bytes, rate: int = RATE) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return out.getvalue()
+
+class FakeRecognizer:
+    """Local stand-in for the STT backend with fixed latency"""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def transcribe_audio(self, audio_data, audio_format=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        self.running -= 1
+        return f"zin van {len(audio_data)} bytes", 0.9
+
+def test_split_on_silence():
+    """Test utterances separated by silence become separate chunks"""
+    pcm = recording(silence(0.5), tone(1.0), silence(1.0), tone(0.5), silence(1.0), tone(0.8))
+    chunks = split_on_silence(pcm, RATE, min_silence_ms=300)
+    assert len(chunks) == 3
+    starts = [start / (2 * RATE) for start, _ in chunks]
+    assert starts == pytest.approx([0.5, 2.5, 4.0], abs=0.03)
+
+def test_long_utterance_cut_to_max_length():
+    """Test speech longer than the chunk limit is split"""
+    pcm = recording(tone(10.0))
+    chunks = split_on_silence(pcm, RATE, max_chunk_seconds=3.0)
+    assert all(end - start <= 3 * RATE * 2 for start, end in chunks)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(pcm)
+
+def test_prepare_wav_recording():
+    """Test WAV header supplies the format and duration"""
+    stt_format, chunks, seconds = prepare_recording(to_wav(recording(tone(1.0), silence(1.0))))
+    assert stt_format == AudioFormat("pcm16", RATE)
+    assert seconds == pytest.approx(2.0)
+    assert len(chunks) == 1
+
+@pytest.mark.asyncio
+async def test_batch_runs_chunks_in_parallel():
+    """Test chunks of many files share a bounded worker pool"""
+    recognizer = FakeRecognizer()
+    pcm = recording(tone(0.5), silence(1.0), tone(0.5), silence(1.0))
+    transcriber = BatchTranscriber(recognizer, concurrency=4)
+    results = await transcriber.transcribe_recordings([(f"call{i}.raw", pcm) for i in range(6)])
+
+    assert [len(r.transcripts) for r in results] == [2] * 6
+    assert recognizer.calls == 12
+    assert recognizer.peak == 4
+    assert transcriber.audio_seconds == pytest.approx(6 * 3.0)
+    assert transcriber.throughput > 1.0
+
+def test_save_results_writes_turns(session_factory):
+    """Test transcripts are stored as ConversationTurn rows"""
+    db = session_factory()
+    pcm = recording(tone(0.5), silence(1.0), tone(0.5))
+    results = asyncio.run(BatchTranscriber(FakeRecognizer(0)).transcribe_recordings([("a.raw", pcm)]))
+
+    save_results(db, results, "business")
+    call = db.query(CallRecord).one()
+    assert call.status == "transcribed"
+    assert call.voice_profile == "business"
+    assert db.query(ConversationTurn).filter_by(call_id=call.call_id).count() == 2
+    db.close()
+
+def test_saved_results_searchable(session_factory):
+    """Test stored transcripts are indexed for transcript search"""
+    search = TranscriptSearch(session_factory)
+    pcm = recording(tone(0.5), silence(1.0), tone(0.5))
+    results = asyncio.run(BatchTranscriber(FakeRecognizer(0)).transcribe_recordings([("a.raw", pcm)]))
+
+    db = session_factory()
+    save_results(db, results, "business", search)
+    db.close()
+    assert {result["call_id"] for result in search.search("zin")} == {results[0].call_id}
+    assert len(search.search("zin")) == 2
+    assert search.catch_up() == 0
+
+def test_batch_endpoint():
+    """Test uploading recordings to the batch endpoint"""
+    from main import app
+    client = TestClient(app)
+    wav = to_wav(recording(tone(0.5), silence(1.0), tone(0.5)))
+    response = client.post(
+        "/transcriptions/batch",
+        files=[("files", ("a.wav", wav, "audio/wav")), ("files", ("b.wav", wav, "audio/wav"))],
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["chunks"] for r in data["recordings"]] == [2, 2]
+    assert data["audio_seconds"] == pytest.approx(4.0)
+    assert data["throughput"] > 0
+
+    bad = client.post("/transcriptions/batch", files=[("files", ("a.raw", b"", "audio/raw"))],
+                      data={"input_format": "speex"})
+    assert bad.status_code == 400
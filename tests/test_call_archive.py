@@ -0,0 +1,94 @@
+"""Test eviction of completed calls and reads from the database"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import threading
+from datetime import datetime
+import pytest
+from call_archive import CallArchive
+from call_index import CallFilter, Cursor
+from call_manager import CallManager
+from call_registry import CallRegistry
+from persistence import WriteBehindWriter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FailingWriter:
+    def call_changed(self, call):
+        pass
+
+    async def flush(self):
+        return False
+
+class ThreadRecordingArchive:
+    """Archive without calls that records the threads reading it"""
+
+    def __init__(self):
+        self.threads = []
+
+    def load(self, call_id):
+        self.threads.append(threading.get_ident())
+        return None
+
+    def page(self, filters, limit, cursor):
+        self.threads.append(threading.get_ident())
+        return [], False
+
+@pytest.mark.asyncio
+async def test_completed_calls_evicted_after_retention(session_factory):
+    """Test only calls past their retention leave memory, and reads fall through"""
+    clock = FakeClock()
+    registry = CallRegistry(
+        archive=CallArchive(session_factory),
+        writer=WriteBehindWriter(session_factory),
+        retention=60,
+        clock=clock,
+    )
+    manager = CallManager(registry)
+    first = await manager.create_call("user_1", "business")
+    await manager.add_conversation_turn(first, "user", "Mijn naam is Jan", 0.9)
+    await manager.end_call(first)
+    clock.now = 30
+    second = await manager.create_call("user_2", "lifestyle")
+    await manager.end_call(second)
+    active = await manager.create_call("user_3", "lifestyle")
+
+    clock.now = 61
+    assert await registry.evict_due() == 1
+    assert first not in registry.calls and second in registry.calls
+    assert active in registry.active
+
+    archived = await registry.get(first)
+    assert archived["status"] == "completed"
+    assert archived["transcript"].text() == "user: Mijn naam is Jan"
+    assert archived["transcript"].confidence(0) == 0.9
+    assert (await manager.get_call_summary(first))["turns_count"] == 1
+    assert (await registry.get_stats())["completed_calls"] == 2
+
+    assert await registry.evict_all() == 1
+    assert (await registry.get(second))["user_id"] == "user_2"
+
+@pytest.mark.asyncio
+async def test_unwritten_calls_stay_in_memory():
+    """Test expired calls are kept until the writer has stored them"""
+    clock = FakeClock()
+    registry = CallRegistry(writer=FailingWriter(), retention=0, clock=clock)
+    call_id = (await registry.register("user_1", "lifestyle"))["call_id"]
+    await registry.complete(call_id)
+    assert await registry.evict_due() == 0
+    assert call_id in registry.calls
+    assert registry.flush_failures == 1
+
+@pytest.mark.asyncio
+async def test_archive_read_off_event_loop():
+    """Test database reads run in a worker thread, not on the event loop"""
+    archive = ThreadRecordingArchive()
+    registry = CallRegistry(archive=archive)
+    assert await registry.get("unknown") is None
+    assert await registry.list_calls(CallFilter(), 10, Cursor(0, datetime.max, "")) == ([], None)
+    assert len(archive.threads) == 2 and threading.get_ident() not in archive.threads
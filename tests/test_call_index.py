@@ -0,0 +1,93 @@
+"""Test filtered, cursor-paginated call listing"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from datetime import timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from call_archive import CallArchive
+from call_index import CallFilter, Cursor
+from call_registry import CallRegistry
+from models import Base
+from persistence import WriteBehindWriter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+async def list_all(registry, filters=CallFilter(), limit=3):
+    """Every page of a listing, following the cursors"""
+    calls, cursor = await registry.list_calls(filters, limit)
+    pages = 1
+    while cursor is not None:
+        page, cursor = await registry.list_calls(filters, limit, Cursor.decode(cursor.encode()))
+        calls.extend(page)
+        pages += 1
+    return [call["call_id"] for call in calls], pages
+
+async def populate(registry, count=10):
+    ids = []
+    for i in range(count):
+        call = await registry.register(f"user_{i % 3}", "business" if i % 2 else "lifestyle")
+        ids.append(call["call_id"])
+        if i % 4 == 0:
+            await registry.complete(call["call_id"])
+    return ids
+
+@pytest.mark.asyncio
+async def test_pages_in_memory_newest_first():
+    """Test cursors walk every call once, newest first"""
+    registry = CallRegistry()
+    ids = await populate(registry)
+    listed, pages = await list_all(registry)
+    assert listed == ids[::-1]
+    assert pages == 4
+
+@pytest.mark.asyncio
+async def test_filters_use_indexes():
+    """Test equality filters, combined filters and status changes"""
+    registry = CallRegistry()
+    ids = await populate(registry)
+    assert (await list_all(registry, CallFilter(voice_profile="business")))[0] == ids[1::2][::-1]
+    assert (await list_all(registry, CallFilter(status="completed")))[0] == [ids[8], ids[4], ids[0]]
+    assert (await list_all(registry, CallFilter(user_id="user_1", voice_profile="business")))[0] == [ids[7], ids[1]]
+    await registry.complete(ids[9])
+    assert ids[9] not in (await list_all(registry, CallFilter(status="active")))[0]
+    assert len(registry.index.fields[("status", "completed")]) == 4
+
+@pytest.mark.asyncio
+async def test_time_range():
+    """Test since and until bound the start time"""
+    registry = CallRegistry()
+    ids = await populate(registry)
+    calls = [await registry.get(call_id) for call_id in ids]
+    for i, call in enumerate(calls):
+        call["start_time"] = calls[0]["start_time"] + timedelta(minutes=i)
+        registry.index.starts[i] = call["start_time"]
+    window = CallFilter(since=calls[2]["start_time"], until=calls[5]["start_time"])
+    assert (await list_all(registry, window))[0] == [ids[4], ids[3], ids[2]]
+
+@pytest.mark.asyncio
+async def test_listing_continues_into_archive():
+    """Test evicted calls are listed from the database after those in memory"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    clock = FakeClock()
+    registry = CallRegistry(
+        archive=CallArchive(factory), writer=WriteBehindWriter(factory), retention=10, clock=clock
+    )
+    ids = await populate(registry)  # calls 0, 4 and 8 completed
+    clock.now = 11
+    assert await registry.evict_due() == 3
+    assert registry.index.horizon == 9
+
+    listed, _ = await list_all(registry)
+    assert listed == ids[::-1]
+    assert (await list_all(registry, CallFilter(status="completed"), limit=1))[0] == [ids[8], ids[4], ids[0]]
+    assert (await list_all(registry, CallFilter(user_id="user_0"), limit=2))[0] == [ids[9], ids[6], ids[3], ids[0]]
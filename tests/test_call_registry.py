@@ -0,0 +1,46 @@
+"""Test the shared call registry"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pytest
+from call_manager import CallManager
+from call_registry import CallRegistry
+
+@pytest.mark.asyncio
+async def test_counters_follow_transitions():
+    """Test counters change on register and complete, not on reads"""
+    registry = CallRegistry()
+    first = (await registry.register("user_1", "lifestyle"))["call_id"]
+    await registry.register("user_2", "business")
+    assert (await registry.get_stats())["active_calls"] == 2
+
+    call = await registry.complete(first)
+    assert call["status"] == "completed"
+    assert await registry.complete(first) is call  # idempotent
+    assert await registry.complete("unknown") is None
+    stats = await registry.get_stats()
+    assert (stats["total_calls"], stats["active_calls"], stats["completed_calls"]) == (2, 1, 1)
+    assert stats["total_duration"] == call["duration"]
+
+@pytest.mark.asyncio
+async def test_reused_id_starts_new_call():
+    """Test a completed call's id can be registered again, an active one cannot"""
+    registry = CallRegistry()
+    await registry.register(None, "lifestyle", call_id="socket-1")
+    with pytest.raises(ValueError):
+        await registry.register(None, "lifestyle", call_id="socket-1")
+    await registry.complete("socket-1")
+    assert (await registry.register(None, "business", call_id="socket-1"))["status"] == "active"
+    assert (await registry.get_stats())["total_calls"] == 2
+
+@pytest.mark.asyncio
+async def test_call_manager_shares_registry():
+    """Test calls made through CallManager are visible in the registry"""
+    registry = CallRegistry()
+    manager = CallManager(registry)
+    call_id = await manager.create_call("user_3", "business")
+    await manager.add_conversation_turn(call_id, "user", "Hallo")
+    assert (await registry.get(call_id))["transcript"].text() == "user: Hallo"
+    await manager.end_call(call_id)
+    assert (await manager.get_call_summary(call_id))["status"] == "completed"
+    assert (await registry.get_stats())["completed_calls"] == 1
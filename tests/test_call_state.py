@@ -0,0 +1,197 @@
+"""Test call state shared between worker processes"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import threading
+import uuid
+import pytest
+from call_index import CallFilter
+from call_registry import CallRegistry
+from call_state import InProcessCallState, RedisCallState, create_call_state
+from conversation_flows import ConversationFlowManager, VoiceProfile
+from redis_standin import RedisStandIn
+from resp_client import RespConnection, RespError
+
+@pytest.fixture(scope="module")
+def server_url():
+    """A Redis stand-in on its own loop, as a separate server would be"""
+    loop = asyncio.new_event_loop()
+    standin = RedisStandIn()
+    port = loop.run_until_complete(standin.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{port}/0"
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(standin.close())
+    loop.close()
+
+@pytest.fixture
+def workers(server_url):
+    """Two registries sharing state, as two worker processes would"""
+    prefix = f"test-{uuid.uuid4().hex[:8]}:"
+    return (
+        CallRegistry(state=RedisCallState(server_url, prefix=prefix), worker_id="worker-a"),
+        CallRegistry(state=RedisCallState(server_url, prefix=prefix), worker_id="worker-b"),
+    )
+
+async def until(condition, timeout: float = 2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+async def listening(registry: CallRegistry, on_message=None) -> asyncio.Task:
+    ready = asyncio.Event()
+    task = asyncio.create_task(registry.listen(on_message, ready))
+    await asyncio.wait_for(ready.wait(), timeout=2.0)
+    return task
+
+def test_resp_connection(server_url):
+    """Test pipelined replies, error replies and SET NX"""
+    connection = RespConnection(server_url)
+    key = f"test-{uuid.uuid4().hex}"
+    assert connection.pipeline([("SET", key, "1", "NX"), ("SET", key, "2", "NX"), ("GET", key)]) == ["OK", None, "1"]
+    assert isinstance(connection.pipeline([("NOSUCHCOMMAND",)])[0], RespError)
+    with pytest.raises(RespError):
+        connection.execute("NOSUCHCOMMAND")
+    connection.close()
+    assert connection.execute("DEL", key) == 1  # reconnects
+
+@pytest.mark.asyncio
+async def test_calls_visible_across_workers(workers):
+    """Test a call and its turns registered on one worker are read on another"""
+    a, b = workers
+    call_id = (await a.register("user_1", "business"))["call_id"]
+    await a.add_turn(await a.get(call_id), "user", "Ik wil een afspraak verzetten", 0.9)
+
+    call = await b.get(call_id)
+    assert (call["owner"], call["status"], call["user_id"]) == ("worker-a", "active", "user_1")
+    assert call["transcript"].text() == "user: Ik wil een afspraak verzetten"
+    assert call["transcript"].confidence(0) == 0.9
+    assert call_id not in b
+    assert (await b.get_stats())["active_calls"] == 1
+    assert await b.get("unknown") is None
+
+@pytest.mark.asyncio
+async def test_completion_routed_to_owner(workers):
+    """Test a call ended through another worker completes once, on its owner too"""
+    a, b = workers
+    listener = await listening(a)
+    try:
+        call_id = (await a.register("user_1", "lifestyle"))["call_id"]
+        ended = await b.complete(call_id)
+        assert ended["status"] == "completed"
+        await until(lambda: a.calls[call_id]["status"] == "completed")
+        assert call_id not in a.active
+        assert (await a.get(call_id))["duration"] == ended["duration"]
+        assert (await b.complete(call_id))["duration"] == ended["duration"]
+        stats = await a.get_stats()
+        assert (stats["total_calls"], stats["active_calls"], stats["completed_calls"]) == (1, 0, 1)
+        assert stats["total_duration"] == pytest.approx(ended["duration"])
+    finally:
+        listener.cancel()
+
+@pytest.mark.asyncio
+async def test_adopted_call_released_by_creator(workers):
+    """Test the worker a call's socket reaches takes the call over"""
+    a, b = workers
+    listener = await listening(a)
+    try:
+        call_id = (await a.register("user_1", "business"))["call_id"]
+        await a.add_turn(await a.get(call_id), "assistant", "Goedemiddag")
+        own = (await b.register("user_2", "lifestyle"))["call_id"]
+        call = await b.adopt(call_id)
+        assert call["owner"] == "worker-b" and call_id in b.active
+        assert len(call["transcript"]) == 1
+        # Started before b's own call, so kept out of b's start-ordered index
+        assert b.index.starts == sorted(b.index.starts)
+        assert [listed["call_id"] for listed in (await b.list_calls(CallFilter(), 10))[0]] == [own]
+        await until(lambda: call_id not in a)
+        assert (await a.get(call_id))["owner"] == "worker-b"
+
+        await b.add_turn(call, "user", "Hallo")
+        await b.complete(call_id)
+        await b.complete(own)
+        stats = await a.get_stats()
+        assert (stats["total_calls"], stats["active_calls"], stats["completed_calls"]) == (2, 0, 2)
+        assert b.index.fields[("status", "completed")] == [(await b.get(own))["seq"]]
+        assert (await a.get(call_id))["transcript"].text() == "assistant: Goedemiddag\nuser: Hallo"
+        assert await b.adopt(call_id) is None  # completed
+    finally:
+        listener.cancel()
+
+@pytest.mark.asyncio
+async def test_adopted_call_resumes_flow(workers):
+    """Test the worker taking a call over continues its conversation flow"""
+    a, b = workers
+    flow = ConversationFlowManager(profile=VoiceProfile.BUSINESS)
+    call = await a.register("user_1", "business", flow_manager=flow)
+    await flow.respond("Mijn naam is Jan")
+    await a.add_turn(call, "user", "Mijn naam is Jan", 0.9)
+
+    adopted = await b.adopt(call["call_id"])
+    assert adopted["flow_state"] == flow.snapshot()
+    resumed = ConversationFlowManager(profile=VoiceProfile.BUSINESS)
+    resumed.restore(adopted["flow_state"])
+    assert (resumed.flow.step, resumed.flow.name) == (flow.flow.step, "Mijn naam is Jan")
+    assert list(resumed.flow.history) == list(flow.flow.history)
+    assert resumed.likely_responses() == flow.likely_responses()
+
+@pytest.mark.asyncio
+async def test_messages_routed_to_owner(workers):
+    """Test messages for a call reach the worker that owns it"""
+    a, b = workers
+    received = []
+
+    async def on_message(message):
+        received.append(message)
+
+    listener = await listening(a, on_message)
+    try:
+        call_id = (await a.register(None, "lifestyle"))["call_id"]
+        assert await b.route(call_id, {"type": "send", "call_id": call_id, "message": {"type": "call_ended"}})
+        assert not await a.route(call_id, {"type": "send"})  # owned here
+        assert not await b.route("unknown", {"type": "send"})
+        await until(lambda: received)
+        assert received == [{"type": "send", "call_id": call_id, "message": {"type": "call_ended"}}]
+    finally:
+        listener.cancel()
+
+@pytest.mark.asyncio
+async def test_evicted_calls_discarded(workers):
+    """Test the owner removes a call from the shared state when evicting it"""
+    a, b = workers
+    call_id = (await a.register(None, "lifestyle"))["call_id"]
+    await a.complete(call_id)
+    assert await b.get(call_id) is not None
+    assert await a.evict_all() == 1
+    assert await b.get(call_id) is None
+    assert (await a.get_stats())["completed_calls"] == 1
+
+@pytest.mark.asyncio
+async def test_rejected_call_not_registered(workers):
+    """Test an error reply while publishing a call fails registration"""
+    a, b = workers
+    a.state.connection.execute("HSET", f"{a.state.prefix}stats", "total_calls", "broken")
+    with pytest.raises(RespError):
+        await a.register(None, "lifestyle", call_id="rejected")
+    assert "rejected" not in a
+    assert "rejected" not in a.active
+
+@pytest.mark.asyncio
+async def test_in_process_backend():
+    """Test the default backend keeps counters and routes nothing"""
+    registry = CallRegistry(worker_id="worker-a")
+    assert isinstance(registry.state, InProcessCallState)
+    call_id = (await registry.register(None, "lifestyle"))["call_id"]
+    assert (await registry.get(call_id))["owner"] == "worker-a"
+    assert not await registry.route(call_id, {"type": "send"})
+    assert await registry.adopt("unknown") is None
+    await registry.complete(call_id)
+    assert (await registry.state.counters())["completed_calls"] == 1
+    assert isinstance(create_call_state("memory"), InProcessCallState)
+    with pytest.raises(ValueError):
+        create_call_state("memcached")
@@ -0,0 +1,64 @@
+"""Test streaming call statistics"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import random
+import pytest
+from call_registry import CallRegistry
+from call_stats import CallStats, SlidingSketch, Sketch
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_sketch_percentiles_within_accuracy():
+    """Test percentiles stay within the configured relative error"""
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(3, 1) for _ in range(20000))
+    sketch = Sketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    for q in (50, 90, 99):
+        exact = values[int(q / 100 * (len(values) - 1))]
+        assert abs(sketch.percentile(q) - exact) / exact < 0.02
+    assert len(sketch.counts) < 1000
+
+def test_sketches_merge():
+    """Test merging two sketches equals sketching all values together"""
+    left, right, both = Sketch(), Sketch(), Sketch()
+    for value in range(1, 101):
+        (left if value % 2 else right).add(value)
+        both.add(value)
+    left.merge(right)
+    assert left.as_dict() == both.as_dict()
+
+def test_sliding_window_drops_old_slots():
+    """Test values older than the window are not counted"""
+    clock = FakeClock()
+    sliding = SlidingSketch(slot_seconds=60, slots=10, clock=clock)
+    sliding.add(100.0)
+    clock.now += 300
+    sliding.add(1.0)
+    assert sliding.window(120).count == 1
+    assert sliding.window(600).count == 2
+    clock.now += 600
+    assert sliding.window(600).count == 0
+
+@pytest.mark.asyncio
+async def test_summary_by_profile():
+    """Test completed calls and turns are summarized per profile and overall"""
+    stats = CallStats()
+    registry = CallRegistry(stats)
+    call_id = (await registry.register("user_1", "business"))["call_id"]
+    await registry.add_turn(await registry.get(call_id), "user", "Hallo", 0.8)
+    await registry.complete(call_id)
+    stats.record("stt_confidence", "lifestyle", 0.9)
+
+    summary = stats.summary(3600)
+    assert summary["turns_per_call"]["business"]["p50"] == 1
+    assert summary["call_duration"]["all"]["count"] == 1
+    assert summary["stt_confidence"]["lifestyle"]["p99"] == 0.9
+    assert summary["turn_latency"]["all"]["count"] == 0
@@ -0,0 +1,114 @@
+"""Test declarative flow definitions and hot reload"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import json
+import shutil
+import pytest
+from config import settings
+from conversation_flows import BusinessCallFlow, LifestyleCoachFlow
+from flow_definitions import FlowDefinitionError, FlowRegistry, compile_flow
+
+def minimal(**overrides) -> dict:
+    definition = {
+        "profile": "test",
+        "initial": "start",
+        "greetings": ["Hallo!"],
+        "closings": ["Dag!"],
+        "intents": {"yes": ["ja", "prima"]},
+        "responses": {"ok": ["Goed zo."], "echo": ["U zei: {input}"]},
+        "states": {
+            "start": {
+                "routes": [{"intent": "yes", "say": "ok", "next": "done"}],
+                "default": {"say": "echo"},
+            },
+            "done": {"default": {"say": "ok"}},
+        },
+    }
+    definition.update(overrides)
+    return definition
+
+def test_any_intent_name():
+    """Test intent names are not restricted to identifiers"""
+    definition = minimal(intents={"follow-up": ["ja"], "2nd try": ["nee"]})
+    definition["states"]["start"]["routes"] = [{"intent": "follow-up", "say": "ok", "next": "done"}]
+    flow = compile_flow(definition)
+    assert flow.matcher.match("Ja, en nee") == {"follow-up", "2nd try"}
+    assert flow.dispatch(0, "ja").next_state == 1
+
+@pytest.fixture
+def flows_dir(tmp_path):
+    shutil.copytree(settings.FLOW_DEFINITIONS_DIR, tmp_path / "flows")
+    return tmp_path / "flows"
+
+def test_compiles_to_state_table():
+    """Test states get ids with the initial state first"""
+    flow = compile_flow(minimal(), "v1")
+    assert flow.state_names == ("start", "done")
+    action = flow.dispatch(0, "Ja hoor")
+    assert action.next_state == 1 and action.cacheable
+    echo = flow.dispatch(0, "Misschien")
+    assert not echo.cacheable
+    assert flow.render(echo, "Misschien") == "U zei: Misschien"
+    assert set(flow.static_phrases) == {"Hallo!", "Dag!", "Goed zo."}
+
+@pytest.mark.parametrize("change, message", [
+    ({"initial": "nowhere"}, "initial state"),
+    ({"states": {"start": {"default": {"say": "missing"}}}}, "unknown response set"),
+    ({"states": {"start": {"default": {"say": "ok", "next": "nowhere"}}}}, "unknown state"),
+    ({"states": {"start": {"routes": [{"intent": "no", "say": "ok"}], "default": {"say": "ok"}}}}, "unknown intent"),
+    ({"states": {"start": {}}}, "no default"),
+    ({"intents": {"yes": []}}, "non-empty"),
+    ({"intents": {"yes": ["ja", "*"]}}, "without a word"),
+])
+def test_rejects_invalid_definitions(change, message):
+    """Test malformed definitions are refused with a clear error"""
+    with pytest.raises(FlowDefinitionError, match=message):
+        compile_flow(minimal(**change))
+
+@pytest.mark.asyncio
+async def test_business_flow_from_definition():
+    """Test the shipped business flow walks name, issue and wrap-up"""
+    flow = BusinessCallFlow()
+    assert "Ik heet Anna" in await flow.get_response("Ik heet Anna")
+    assert flow.name == "Ik heet Anna"
+    assert not flow.last_response_cacheable
+    await flow.get_response("Mijn factuur klopt niet")
+    assert flow.issue == "Mijn factuur klopt niet"
+    assert await flow.get_response("Dank u") in flow.definition.responses["confirm"]
+    assert flow.last_response_cacheable
+
+@pytest.mark.asyncio
+async def test_reload_is_atomic_and_spares_active_calls(flows_dir):
+    """Test a changed file reaches new calls while running calls keep theirs"""
+    registry = FlowRegistry(str(flows_dir))
+    running = LifestyleCoachFlow(registry.get("lifestyle"))
+    assert not registry.reload_if_changed()
+
+    path = flows_dir / "lifestyle.json"
+    definition = json.loads(path.read_text(encoding="utf-8"))
+    definition["greetings"] = ["Hoi, nieuwe versie!"]
+    path.write_text(json.dumps(definition), encoding="utf-8")
+    assert registry.reload_if_changed()
+
+    assert await LifestyleCoachFlow(registry.get("lifestyle")).get_greeting() == "Hoi, nieuwe versie!"
+    assert await running.get_greeting() != "Hoi, nieuwe versie!"
+    assert "Hoi, nieuwe versie!" in registry.get("lifestyle").static_phrases
+
+    path.write_text("{not json", encoding="utf-8")
+    assert not registry.reload_if_changed()
+    assert registry.get("lifestyle").greetings == ("Hoi, nieuwe versie!",)
+    assert registry.get_stats()["failed_reloads"] == 1
+
+    definition["intents"]["empty"] = []
+    path.write_text(json.dumps(definition), encoding="utf-8")
+    assert not registry.reload_if_changed()
+    assert registry.get_stats()["failed_reloads"] == 2
+
+def test_flows_endpoint():
+    """Test loaded flow versions are reported"""
+    from fastapi.testclient import TestClient
+    from main import app
+    response = TestClient(app).get("/flows")
+    assert response.status_code == 200
+    assert {f["profile"] for f in response.json()["flows"]} == {"lifestyle", "business"}
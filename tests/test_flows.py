@@ -82,6 +82,23 @@ async def test_flow_manager_business():
     closing = await manager.close_conversation()
     assert closing is not None
 
+@pytest.mark.asyncio
+async def test_history_is_bounded():
+    """Test per-call history keeps only the most recent turns"""
+    flow = BusinessCallFlow()
+    for i in range(50):
+        await flow.get_response(f"Bericht {i}")
+    assert len(flow.history) == flow.history.maxlen
+    assert flow.history[-1][0] == "assistant"
+    assert flow.history[-2] == ("user", "Bericht 49")
+
+def test_call_state_is_slotted():
+    """Test per-call objects carry no instance dict"""
+    manager = ConversationFlowManager(VoiceProfile.LIFESTYLE)
+    assert not hasattr(manager, "__dict__")
+    assert not hasattr(manager.flow, "__dict__")
+    assert LifestyleCoachFlow().definition is manager.flow.definition
+
 async def main():
     await test_lifestyle_greeting()
     await test_lifestyle_response()
@@ -0,0 +1,45 @@
+"""Test compiled intent matching"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pytest
+from intents import IntentMatcher
+from conversation_flows import BusinessCallFlow, LifestyleCoachFlow
+
+MATCHER = IntentMatcher({
+    "sleep": ("moe", "slaap*"),
+    "exercise": ("sport*",),
+    "name": ("mijn naam", "m'n naam", "ben"),
+})
+
+def test_whole_words_only():
+    """Test keywords do not match inside unrelated words"""
+    assert MATCHER.match("Ik ben benieuwd") == {"name"}
+    assert MATCHER.match("Ik ben erg benieuwd") == {"name"}
+    assert MATCHER.match("Mijn moeder vindt het moeilijk") == set()
+    assert MATCHER.match("Ik ben zo moe.") == {"name", "sleep"}
+
+def test_stems_and_phrases():
+    """Test stems match inflections and phrases span whitespace"""
+    assert MATCHER.match("Ik ga sporten na het slapen") == {"exercise"}
+    assert MATCHER.match("Slaapproblemen en de sportschool") == {"sleep", "exercise"}
+    assert MATCHER.match("MIJN   NAAM is Jan") == {"name"}
+    assert MATCHER.match("M'n naam is Jan") == {"name"}
+
+def test_every_intent_in_one_pass():
+    """Test all mentioned intents are returned together"""
+    assert MATCHER.match("Moe van het sporten, mijn naam is Eva") == {"sleep", "exercise", "name"}
+    assert MATCHER.match("") == set()
+
+@pytest.mark.asyncio
+async def test_flows_route_on_whole_words():
+    """Test flow routing no longer triggers on substrings"""
+    flow = BusinessCallFlow()
+    await flow.get_response("Ik ben benieuwd naar de prijzen")
+    assert flow.step == 1
+    flow = BusinessCallFlow()
+    assert await flow.get_response("Benieuwd naar de prijzen") in flow.definition.responses["ask_name"]
+
+    flow = LifestyleCoachFlow()
+    assert await flow.get_response("Mijn moeder belde") in flow.definition.responses["default"]
+    assert await flow.get_response("Ik wil vaker sporten") in flow.definition.responses["exercise"]
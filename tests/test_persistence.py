@@ -0,0 +1,80 @@
+"""Test write-behind persistence of calls and turns"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import pytest
+from call_manager import CallManager
+from call_registry import CallRegistry
+from models import CallRecord, ConversationTurn
+from persistence import WriteBehindWriter
+
+def counts(session_factory):
+    db = session_factory()
+    try:
+        return db.query(CallRecord).count(), db.query(ConversationTurn).count()
+    finally:
+        db.close()
+
+@pytest.mark.asyncio
+async def test_events_written_in_batches(session_factory):
+    """Test nothing is written on the request path and a flush writes batches"""
+    writer = WriteBehindWriter(session_factory, batch_size=50)
+    manager = CallManager(CallRegistry(writer=writer))
+    for i in range(10):
+        call_id = await manager.create_call(f"user_{i}", "business")
+        for turn in range(9):
+            await manager.add_conversation_turn(call_id, "user", f"Beurt {turn}", 0.9)
+        await manager.end_call(call_id)
+    assert counts(session_factory) == (0, 0)
+
+    assert await writer.flush()
+    assert counts(session_factory) == (10, 90)
+    stats = writer.get_stats()
+    assert stats["batches"] == 3  # 110 events, 50 per batch
+    db = session_factory()
+    record = db.get(CallRecord, call_id)
+    assert record.status == "completed"
+    assert record.transcript.count("\n") == 8
+    db.close()
+
+@pytest.mark.asyncio
+async def test_background_writer_flushes_and_close_drains(session_factory):
+    """Test the size trigger wakes the writer and close writes the rest"""
+    writer = WriteBehindWriter(session_factory, batch_size=5, flush_interval=10)
+    registry = CallRegistry(writer=writer)
+    writer.start()
+    for i in range(6):
+        await registry.register(f"user_{i}", "lifestyle")
+    await asyncio.sleep(0.2)
+    assert counts(session_factory)[0] >= 5
+    await registry.register("user_last", "lifestyle")
+    await writer.close()
+    assert counts(session_factory) == (7, 0)
+    assert writer.get_stats()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_backpressure_holds_producers(session_factory):
+    """Test producers wait while the queue is over its limit"""
+    writer = WriteBehindWriter(session_factory, batch_size=4, flush_interval=0.05, max_queue=8)
+    registry = CallRegistry(writer=writer)
+    for i in range(8):
+        await registry.register(f"user_{i}", "lifestyle")
+    writer.start()
+    await asyncio.wait_for(registry.wait_for_capacity(), timeout=2)
+    assert len(writer) <= 4
+    assert writer.backpressure_waits == 1
+    await writer.close()
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_in_order(session_factory):
+    """Test a failing batch goes back on the queue and is dropped after the retry limit"""
+    writer = WriteBehindWriter(session_factory, max_retries=2)
+    registry = CallRegistry(writer=writer)
+    call = await registry.register("user_1", "lifestyle")
+    # A turn of an unknown call violates the foreign key
+    writer.turn_added("missing", call["transcript"], call["transcript"].append("user", "Hallo"))
+    assert not await writer.flush()
+    assert len(writer) == 2
+    assert await writer.flush()
+    assert writer.get_stats()["dropped_events"] == 2
@@ -0,0 +1,84 @@
+"""Test prompt prewarm at startup"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from conversation_flows import VoiceProfile, get_static_prompts
+from audio_codecs import AudioFormat
+from prewarm import PrewarmState, list_prompts, prewarm_formats, prewarm_prompts
+
+class FakeVoiceManager:
+    """Records synthesis calls and tracks peak concurrency"""
+
+    def __init__(self, fail_on: str = None):
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self.fail_on = fail_on
+
+    async def synthesize_speech(self, text, voice_profile="lifestyle", cacheable=True, audio_format=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+        if self.fail_on in (text, "*"):
+            raise RuntimeError("TTS unavailable")
+        self.calls.append((voice_profile, text, audio_format))
+        return b"audio"
+
+def test_static_prompts_cover_both_profiles():
+    """Test prompt listing covers greetings and closings of each flow"""
+    business = get_static_prompts(VoiceProfile.BUSINESS)
+    assert "Mag ik eerst uw naam vragen alstublieft?" in business
+    assert not any("{" in text for text in business)
+    profiles = {profile for profile, _ in list_prompts()}
+    assert profiles == {"lifestyle", "business"}
+
+@pytest.mark.asyncio
+async def test_prewarm_synthesizes_every_prompt():
+    """Test every prompt is synthesized under the concurrency cap"""
+    voice_manager = FakeVoiceManager()
+    state = PrewarmState()
+    formats = [AudioFormat("mp3"), AudioFormat("mulaw", 8000)]
+    await prewarm_prompts(voice_manager, state, concurrency=3, formats=formats)
+    assert state.ready
+    assert state.completed == state.total == 2 * len(list_prompts())
+    assert sorted(voice_manager.calls) == sorted(
+        (profile, text, audio_format) for audio_format in formats for profile, text in list_prompts()
+    )
+    assert voice_manager.peak <= 3
+
+def test_prewarm_formats_as_negotiated():
+    """Test configured formats resolve to what calls negotiate"""
+    assert prewarm_formats("mp3, pcm16,mulaw/8000,opus,mp3") == [
+        AudioFormat("mp3"), AudioFormat("pcm16"), AudioFormat("mulaw", 8000), AudioFormat("opus", 48000),
+    ]
+
+@pytest.mark.asyncio
+async def test_prewarm_tolerates_failures():
+    """Test a failing prompt does not block readiness"""
+    failing = get_static_prompts(VoiceProfile.BUSINESS)[0]
+    state = PrewarmState()
+    await prewarm_prompts(FakeVoiceManager(fail_on=failing), state, concurrency=2, formats=[AudioFormat("mp3")])
+    assert state.ready
+    assert state.failed == 1
+
+@pytest.mark.asyncio
+async def test_prewarm_failures_block_readiness():
+    """Test the service is not ready when most prompts failed"""
+    state = PrewarmState()
+    await prewarm_prompts(FakeVoiceManager(fail_on="*"), state, formats=[AudioFormat("mp3")])
+    assert state.completed == state.failed == state.total
+    assert not state.ready
+
+def test_ready_endpoint_after_startup(monkeypatch):
+    """Test readiness endpoint once lifespan has run"""
+    from config import settings
+    from main import app
+    monkeypatch.setattr(settings, "TTS_PREWARM_MODE", "blocking")
+    with TestClient(app) as client:
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
@@ -0,0 +1,88 @@
+"""Test speculative synthesis of likely next replies"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import time
+import pytest
+from conversation_flows import ConversationFlowManager, VoiceProfile
+from speculation import SpeculationStats, Speculator
+from speech_backends import SimulatedSpeechBackend
+from speech_engine import SpeechExecutor
+from tts_cache import TTSCache
+from voice_manager import VoiceManager
+
+ASK_NAME = "Mag ik eerst uw naam vragen alstublieft?"
+
+class FakeVoiceManager:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.synthesized = []
+
+    def is_cached(self, text, voice_profile="lifestyle", audio_format=None):
+        return text in self.cached
+
+    async def synthesize_speech(self, text, voice_profile="lifestyle", cacheable=True, audio_format=None):
+        self.synthesized.append(text)
+        self.cached.add(text)
+        return b"audio"
+
+def business_speculator(voice_manager, **kwargs) -> Speculator:
+    flow = ConversationFlowManager(VoiceProfile.BUSINESS)
+    return Speculator(voice_manager, flow, stats=SpeculationStats(), **kwargs)
+
+@pytest.mark.asyncio
+async def test_speculates_deterministic_prompt_and_scores_hit():
+    """Test the step-determined prompt is synthesized and counted as a hit"""
+    voice_manager = FakeVoiceManager()
+    speculator = business_speculator(voice_manager)
+    assert speculator.speculate() == [ASK_NAME]
+    await asyncio.sleep(0)
+    assert voice_manager.synthesized == [ASK_NAME]
+    assert speculator.speculate() == []  # pending or cached, not repeated
+    speculator.record_reply(ASK_NAME)
+    assert speculator.get_stats()["hits"] == 1
+    assert speculator.stats.as_dict()["hit_rate"] == 1.0
+
+@pytest.mark.asyncio
+async def test_unused_speculation_is_waste():
+    """Test phrases that were not the next reply count as waste"""
+    speculator = business_speculator(FakeVoiceManager())
+    speculator.flow.flow.step = 2  # wrap-up: confirm or escalate
+    assert len(speculator.speculate()) == 2
+    speculator.record_reply(speculator.flow.likely_responses()[0])
+    assert (speculator.hits, speculator.wasted) == (1, 1)
+    speculator.close()
+
+@pytest.mark.asyncio
+async def test_skips_cached_phrases_and_enforces_budget():
+    """Test cached phrases are skipped and the per-call budget is enforced"""
+    speculator = business_speculator(FakeVoiceManager(cached=[ASK_NAME]), budget=1)
+    assert speculator.speculate() == []
+    assert speculator.stats.already_cached == 1
+
+    speculator.flow.flow.step = 2
+    assert len(speculator.speculate()) == 1
+    assert speculator.stats.budget_exhausted == 1
+    assert speculator.remaining == 0
+
+@pytest.mark.asyncio
+async def test_reply_joins_speculative_synthesis(tmp_path):
+    """Test a reply arriving mid-speculation waits for it instead of re-synthesizing"""
+    executor = SpeechExecutor(max_workers=4, limits={"tts": 4})
+    voice_manager = VoiceManager(
+        executor=executor,
+        cache=TTSCache(max_bytes=1024 * 1024, directory=str(tmp_path)),
+        backend=SimulatedSpeechBackend(tts_latency="fixed:200"),
+    )
+    speculator = business_speculator(voice_manager)
+    speculator.speculate()
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    audio = await voice_manager.synthesize_speech(ASK_NAME, "business")
+    assert audio
+    assert time.perf_counter() - started < 0.2
+    assert executor.get_stats()["operations"]["tts"]["submitted"] == 1
+    assert await voice_manager.synthesize_speech(ASK_NAME, "business") == audio
+    executor.shutdown()
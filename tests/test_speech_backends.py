@@ -0,0 +1,131 @@
+"""Test pluggable speech backends and the local simulator"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import random
+import time
+import pytest
+from audio_codecs import AudioFormat
+from speech_backends import (
+    LatencyDistribution, SIMULATED_UTTERANCES, SimulatedSpeechBackend,
+    SpeechBackendError, create_backend, voice_params
+)
+from speech_engine import SpeechExecutor
+from voice_manager import VoiceManager
+from vad import VoiceActivityDetector
+
+TEXT = "Goedemorgen! Hoe gaat het met je vandaag?"
+
+def test_latency_distributions():
+    """Test latency specs parse and sample within their shape"""
+    rng = random.Random(1)
+    assert LatencyDistribution("fixed:250").sample(rng) == 0.25
+    assert all(0.1 <= LatencyDistribution("uniform:100:200").sample(rng) <= 0.2 for _ in range(100))
+    samples = sorted(LatencyDistribution("lognormal:100:400").sample(rng) for _ in range(2000))
+    assert 0.08 < samples[1000] < 0.12
+    assert 0.3 < samples[1900] < 0.5
+    with pytest.raises(ValueError):
+        LatencyDistribution("gamma:1")
+
+def test_synthesized_audio_is_realistically_sized():
+    """Test audio length follows text length and codec"""
+    backend = SimulatedSpeechBackend()
+    voice = voice_params("business")  # rate 1.0
+    seconds = len(TEXT) / 15
+    pcm = backend.synthesize(TEXT, voice, AudioFormat("pcm16", 16000))
+    assert len(pcm) == int(seconds * 16000) * 2
+    assert len(backend.synthesize(TEXT, voice, AudioFormat("mulaw", 8000))) == int(seconds * 8000)
+    assert len(backend.synthesize(TEXT, voice, AudioFormat("mp3"))) == int(seconds * 4000)
+    slower = backend.synthesize(TEXT, voice_params("lifestyle"), AudioFormat("pcm16", 16000))
+    assert len(slower) > len(pcm)
+
+def test_synthesized_pcm_is_detected_as_speech():
+    """Test the simulated waveform passes VAD like a real voice"""
+    pcm = SimulatedSpeechBackend().synthesize(TEXT, voice_params("lifestyle"), AudioFormat("pcm16", 16000))
+    events = VoiceActivityDetector(sample_rate=16000).process(pcm + b"\x00\x00" * 16000)
+    assert [e.kind for e in events][:1] == ["start"]
+
+def test_recognition_is_deterministic():
+    """Test transcripts depend only on the audio and silence is empty"""
+    backend = SimulatedSpeechBackend()
+    fmt = AudioFormat("pcm16", 16000)
+    pcm = backend.synthesize(TEXT, voice_params("lifestyle"), fmt)
+    text, confidence = backend.recognize(pcm, fmt)
+    assert text in SIMULATED_UTTERANCES
+    assert 0.8 <= confidence < 1.0
+    assert SimulatedSpeechBackend(seed=7).recognize(pcm, fmt) == (text, confidence)
+    assert backend.recognize(b"\x00\x00" * 16000, fmt) == ("", 0.0)
+
+def test_error_rate_and_seeded_failures():
+    """Test failures follow the error rate and repeat with the same seed"""
+    def outcomes(seed):
+        backend = SimulatedSpeechBackend(tts_error_rate=0.3, seed=seed)
+        result = []
+        for _ in range(200):
+            try:
+                backend.synthesize("Hallo", voice_params("lifestyle"), AudioFormat("mp3"))
+                result.append(True)
+            except SpeechBackendError:
+                result.append(False)
+        return result
+    first = outcomes(42)
+    assert first == outcomes(42)
+    assert 30 < first.count(False) < 90
+
+@pytest.mark.asyncio
+async def test_simulated_latency_occupies_speech_workers():
+    """Test simulated calls hold pool slots like a blocking client"""
+    executor = SpeechExecutor(max_workers=4, limits={"tts": 2})
+    backend = SimulatedSpeechBackend(tts_latency="fixed:50")
+    manager = VoiceManager(executor=executor, backend=backend)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        manager.synthesize_speech(f"Zin {i}.", cacheable=False) for i in range(4)
+    ))
+    assert time.perf_counter() - started >= 0.1
+    assert executor.get_stats()["operations"]["tts"]["completed"] == 4
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_simulated_stream_uses_backend_model():
+    """Test live recognition takes the simulator's latency and utterances"""
+    backend = SimulatedSpeechBackend(stt_latency="fixed:20")
+    fmt = AudioFormat("pcm16", 16000)
+    pcm = backend.synthesize(TEXT, voice_params("lifestyle"), fmt)
+    recognizer = backend.create_stream(fmt)
+    await recognizer.start()
+    started = time.perf_counter()
+    for offset in range(0, len(pcm), 640):
+        recognizer.feed(pcm[offset:offset + 640])
+    recognizer.end_utterance()
+    recognizer.feed(b"\x00\x00" * 16000)  # silence is not transcribed
+    await recognizer.close()
+    results = [result async for result in recognizer.results()]
+
+    interims = [result for result in results if not result.is_final]
+    assert len(interims) == len(pcm) // 16000
+    assert results[-1].is_final
+    assert (results[-1].text, results[-1].confidence) == backend.recognize(pcm, fmt)
+    assert [result.is_final for result in results].count(True) == 1
+    assert time.perf_counter() - started >= 0.02 * len(results)
+
+@pytest.mark.asyncio
+async def test_simulated_stream_failures_end_stream():
+    """Test recognition errors interrupt the stream like a dropped connection"""
+    backend = SimulatedSpeechBackend(stt_error_rate=1.0)
+    fmt = AudioFormat("pcm16", 16000)
+    recognizer = backend.create_stream(fmt, interim_results=False)
+    await recognizer.start()
+    pcm = backend.synthesize(TEXT, voice_params("lifestyle"), fmt)
+    for _ in range(recognizer.MAX_STREAM_FAILURES):
+        recognizer.feed(pcm)
+        recognizer.end_utterance()
+    assert [result async for result in recognizer.results()] == []
+
+def test_create_backend_by_name():
+    """Test backend selection and rejection of unknown names"""
+    assert create_backend("simulator").name == "simulator"
+    assert create_backend("auto").name in ("google", "simulator")
+    with pytest.raises(ValueError):
+        create_backend("azure")
@@ -0,0 +1,89 @@
+"""Test speech execution engine"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import threading
+import time
+import pytest
+from speech_engine import SpeechExecutor, SpeechTimeoutError, get_speech_executor
+
+@pytest.mark.asyncio
+async def test_run_returns_result_from_worker_thread():
+    """Test blocking call runs off the event loop thread"""
+    executor = SpeechExecutor(max_workers=2, limits={"tts": 2}, timeouts={"tts": 1.0})
+    result = await executor.run("tts", threading.get_ident)
+    assert result != threading.get_ident()
+    stats = executor.get_stats()["operations"]["tts"]
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_event_loop_not_blocked():
+    """Test loop keeps ticking while a slow speech call runs"""
+    executor = SpeechExecutor(max_workers=2, limits={"tts": 2}, timeouts={"tts": 2.0})
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await executor.run("tts", time.sleep, 0.2)
+    task.cancel()
+    assert ticks >= 5
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    """Test per-operation limit caps concurrent worker calls"""
+    executor = SpeechExecutor(max_workers=8, limits={"stt": 2}, timeouts={"stt": 5.0})
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    await asyncio.gather(*(executor.run("stt", work) for _ in range(6)))
+    assert peak <= 2
+    stats = executor.get_stats()["operations"]["stt"]
+    assert stats["completed"] == 6
+    assert stats["max_queue_depth"] >= 4
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_timeout():
+    """Test slow call raises SpeechTimeoutError"""
+    executor = SpeechExecutor(max_workers=1, limits={"tts": 1}, timeouts={"tts": 0.05})
+    with pytest.raises(SpeechTimeoutError):
+        await executor.run("tts", time.sleep, 0.3)
+    stats = executor.get_stats()["operations"]["tts"]
+    assert stats["timed_out"] == 1
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_errors_propagate():
+    """Test worker exceptions reach the caller"""
+    executor = SpeechExecutor(max_workers=1)
+
+    def fail():
+        raise RuntimeError("backend down")
+
+    with pytest.raises(RuntimeError):
+        await executor.run("tts", fail)
+    assert executor.get_stats()["operations"]["tts"]["failed"] == 1
+    executor.shutdown()
+
+def test_singleton():
+    """Test speech executor singleton"""
+    assert get_speech_executor() is get_speech_executor()
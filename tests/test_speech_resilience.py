@@ -0,0 +1,163 @@
+"""Test latency budgets, hedged requests and circuit breaking"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import threading
+import time
+import pytest
+from speech_backends import SimulatedSpeechBackend
+from speech_engine import SpeechExecutor, SpeechTimeoutError
+from speech_resilience import CircuitBreaker, LatencyWindow, SpeechGuard, SpeechUnavailableError
+from voice_manager import VoiceManager
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class ScriptedBackend:
+    """Blocking call whose n-th invocation sleeps or fails as scripted"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            step = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        time.sleep(step)
+        return value
+
+def make_executor() -> SpeechExecutor:
+    return SpeechExecutor(max_workers=4, limits={"tts": 4}, timeouts={"tts": 5.0})
+
+def test_latency_window_percentiles():
+    """Test percentiles over the retained window"""
+    window = LatencyWindow(size=100)
+    assert window.percentile(95) is None
+    for i in range(200):
+        window.record(i / 1000)
+    assert len(window) == 100
+    assert window.percentile(50) == 0.15
+    assert window.percentile(95) == 0.195
+
+def test_circuit_breaker_opens_and_probes():
+    """Test breaker opens on consecutive failures and half-opens after reset"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opens == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_frees_half_open_circuit():
+    """Test a probe cancelled by its caller lets the next request probe"""
+    executor = make_executor()
+    clock = FakeClock()
+    guard = SpeechGuard("tts", budget=2.0, hedge=False, breaker=CircuitBreaker(1, 10, clock=clock))
+    guard.breaker.record_failure()
+    clock.now = 10
+    probe = asyncio.create_task(guard.call(executor, ScriptedBackend(0.5, 0.01), "audio"))
+    await asyncio.sleep(0.05)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    assert await guard.call(executor, ScriptedBackend(0.01), "audio") == "audio"
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+    executor.shutdown(wait=False)
+
+@pytest.mark.asyncio
+async def test_hedge_wins_over_slow_primary():
+    """Test a duplicate fired after the hedge delay answers first"""
+    executor = make_executor()
+    guard = SpeechGuard("tts", budget=1.0, hedge=True)
+    func = ScriptedBackend(0.8, 0.01)
+    started = time.perf_counter()
+    assert await guard.call(executor, func, "audio") == "audio"
+    assert time.perf_counter() - started < 0.7  # hedge fired at budget / 2
+    assert guard.hedges == 1
+    assert guard.hedge_wins == 1
+    executor.shutdown(wait=False)
+
+@pytest.mark.asyncio
+async def test_hedge_delay_follows_p95():
+    """Test the hedge delay tracks recent latency once warmed up"""
+    guard = SpeechGuard("tts", budget=2.0, hedge=True)
+    assert guard.hedge_delay() == 1.0
+    for _ in range(50):
+        guard.window.record(0.2)
+    assert guard.hedge_delay() == pytest.approx(0.2)
+    assert SpeechGuard("tts", hedge=False).hedge_delay() is None
+
+@pytest.mark.asyncio
+async def test_fast_failure_is_retried():
+    """Test a failed first attempt is replaced immediately within budget"""
+    executor = make_executor()
+    guard = SpeechGuard("tts", budget=2.0, hedge=True)
+    func = ScriptedBackend(RuntimeError("503"), 0.01)
+    started = time.perf_counter()
+    assert await guard.call(executor, func, "audio") == "audio"
+    assert time.perf_counter() - started < 0.5
+    assert guard.breaker.failures == 0
+    executor.shutdown(wait=False)
+
+@pytest.mark.asyncio
+async def test_budget_exceeded_raises_timeout():
+    """Test the call gives up at the budget even when every attempt hangs"""
+    executor = make_executor()
+    guard = SpeechGuard("tts", budget=0.2, hedge=True)
+    started = time.perf_counter()
+    with pytest.raises(SpeechTimeoutError):
+        await guard.call(executor, ScriptedBackend(1.0), "audio")
+    assert time.perf_counter() - started < 0.5
+    assert guard.budget_exceeded == 1
+    assert guard.hedges == 1
+    executor.shutdown(wait=False)
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_cached_audio_only(tmp_path):
+    """Test cached prompts still play while uncached text is refused"""
+    from tts_cache import TTSCache
+    backend = SimulatedSpeechBackend()
+    manager = VoiceManager(
+        executor=make_executor(),
+        cache=TTSCache(max_bytes=1024 * 1024, directory=str(tmp_path)),
+        backend=backend,
+    )
+    manager.guards["tts"].breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    cached = await manager.synthesize_speech("Hallo!")
+
+    backend.tts_error_rate = 1.0
+    with pytest.raises(Exception):
+        await manager.synthesize_speech("Nieuwe zin.", cacheable=False)
+    assert manager.guards["tts"].breaker.state == CircuitBreaker.OPEN
+
+    assert await manager.synthesize_speech("Hallo!") == cached
+    with pytest.raises(SpeechUnavailableError):
+        await manager.synthesize_speech("Nog een zin.")
+    assert manager.get_guard_stats()["tts"]["rejected"] == 1
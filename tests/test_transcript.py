@@ -0,0 +1,37 @@
+"""Test the compact transcript store"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import time
+from transcript import ROLES, Transcript
+
+def test_append_and_read_turns():
+    """Test turns keep role, text, confidence and a wall-clock timestamp"""
+    transcript = Transcript()
+    assert transcript.append("assistant", "Goedemiddag!") == 0
+    transcript.append("user", "Ik ben moe", 0.87)
+    assert len(transcript) == 2
+    turn = transcript.turn(1)
+    assert (turn["role"], turn["text"], turn["confidence"]) == ("user", "Ik ben moe", 0.87)
+    assert transcript.confidence(0) is None
+    assert abs(transcript.timestamp(1).timestamp() - time.time()) < 60 * 60 * 24
+
+def test_renderings_cached_until_append():
+    """Test text and JSON are reused between appends and extended after"""
+    transcript = Transcript()
+    transcript.append("assistant", "Hallo")
+    text = transcript.text()
+    turns = transcript.as_json()
+    assert transcript.text() is text
+    assert transcript.as_json() is turns and len(turns) == 1
+    transcript.append("user", "Dag")
+    assert transcript.text() == "assistant: Hallo\nuser: Dag"
+    assert [turn["role"] for turn in transcript.as_json()] == ["assistant", "user"]
+
+def test_explicit_times_and_new_roles():
+    """Test turns loaded from storage keep their time; unknown roles get a code"""
+    transcript = Transcript(started_at=1_700_000_000.0)
+    transcript.append("system", "Opname gestart", at=1_700_000_005.0)
+    assert "system" in ROLES
+    assert transcript.timestamp(0).isoformat() == "2023-11-14T22:13:25"
+    assert transcript.text() == "system: Opname gestart"
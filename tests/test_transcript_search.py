@@ -0,0 +1,139 @@
+"""Test Dutch stemming and full-text search over stored turns"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from datetime import datetime, timedelta
+import pytest
+from call_manager import CallManager
+from call_registry import CallRegistry
+from dutch_stemmer import stem
+from models import CallRecord, ConversationTurn
+from persistence import WriteBehindWriter
+from transcript_search import TranscriptSearch, parse_query
+
+async def store_calls(session_factory, search, calls):
+    """Write (voice_profile, [user turns]) calls through the writer"""
+    writer = WriteBehindWriter(session_factory, search=search)
+    manager = CallManager(CallRegistry(writer=writer))
+    call_ids = []
+    for voice_profile, turns in calls:
+        call_id = await manager.create_call("user_1", voice_profile)
+        for turn in turns:
+            await manager.add_conversation_turn(call_id, "user", turn, 0.9)
+        await manager.end_call(call_id)
+        call_ids.append(call_id)
+    assert await writer.flush()
+    return call_ids
+
+def test_stemming_conflates_inflections():
+    """Test Snowball stems of inflected Dutch words"""
+    assert stem("slapen") == stem("slaap") == "slap"
+    assert stem("afspraken") == stem("afspraak") == "afsprak"
+    assert stem("behandelingen") == stem("behandeling") == "behandel"
+    assert stem("mogelijkheden") == "mogelijk"
+    assert stem("lichamelijke") == "licham"
+    assert stem("café") == "caf"
+
+def test_query_parsing():
+    """Test words and phrases are stemmed and stop words dropped"""
+    assert parse_query('ik "slecht slapen" afspraken') == ["slecht slap", "afsprak"]
+    assert parse_query("de het een") == []
+    assert parse_query('"slaap niet" geen') == ["slap niet", "gen"]
+
+@pytest.mark.asyncio
+async def test_turns_indexed_as_written(session_factory):
+    """Test the writer indexes turns and searches match inflections and phrases"""
+    search = TranscriptSearch(session_factory)
+    sleepless, appointment = await store_calls(session_factory, search, [
+        ("lifestyle", ["Ik slaap de laatste tijd erg slecht", "Koffie helpt niet"]),
+        ("business", ["Ik wil een afspraak verzetten", "Slapen lukt prima, maar de afspraken niet"]),
+    ])
+
+    results = search.search("slapen")
+    assert {result["call_id"] for result in results} == {sleepless, appointment}
+    assert all(result["score"] > 0 for result in results)
+    assert {result["text"] for result in search.search("afspraken")} == {
+        "Ik wil een afspraak verzetten", "Slapen lukt prima, maar de afspraken niet",
+    }
+
+    phrase = search.search('"de tijd erg slecht"')
+    assert [result["call_id"] for result in phrase] == [sleepless]
+    assert search.search('"slecht erg"') == []
+    assert [result["call_id"] for result in search.search('"helpt niet"')] == [sleepless]
+    assert search.search('"slapen niet"') == []
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_filters(session_factory):
+    """Test ranking by relevance and the profile and time filters"""
+    search = TranscriptSearch(session_factory)
+    await store_calls(session_factory, search, [
+        ("lifestyle", ["Stress op het werk, veel stress en weinig rust"]),
+        ("lifestyle", ["Mijn vakantie was fijn, alleen op de terugweg wat stress in de lange file naar huis"]),
+        ("business", ["De factuur geeft stress"]),
+    ])
+
+    ranked = search.search("stress")
+    assert len(ranked) == 3
+    assert ranked[0]["text"].startswith("Stress op het werk")
+    assert [result["score"] for result in ranked] == sorted((result["score"] for result in ranked), reverse=True)
+
+    business = search.search("stress", voice_profile="business")
+    assert [result["voice_profile"] for result in business] == ["business"]
+    assert search.search("stress", since=datetime.utcnow() + timedelta(hours=1)) == []
+    assert len(search.search("stress", until=datetime.utcnow() + timedelta(hours=1), limit=2)) == 2
+
+    with pytest.raises(ValueError):
+        search.search("de het")
+
+def test_catch_up_indexes_stored_turns(session_factory):
+    """Test turns stored before the index existed are indexed once"""
+    db = session_factory()
+    db.add(CallRecord(call_id="old", user_id="user_1", voice_profile="lifestyle", status="completed"))
+    db.add(ConversationTurn(call_id="old", role="user", text="Ik heb hoofdpijn", timestamp=datetime.utcnow()))
+    db.commit()
+    db.close()
+
+    search = TranscriptSearch(session_factory)
+    assert search.search("hoofdpijn") == []
+    assert search.catch_up() == 1
+    assert search.catch_up() == 0
+    assert [result["call_id"] for result in search.search("hoofdpijn")] == ["old"]
+
+def test_catch_up_indexes_turns_written_elsewhere(session_factory):
+    """Test turns stored after indexed ones without being indexed are found"""
+    search = TranscriptSearch(session_factory)
+    now = datetime.utcnow()
+    db = session_factory()
+    db.add(CallRecord(call_id="live", user_id="user_1", voice_profile="lifestyle", status="completed"))
+    db.add(CallRecord(call_id="batch", user_id="batch", voice_profile="lifestyle", status="transcribed"))
+    db.flush()
+    live = ConversationTurn(call_id="live", role="user", text="Ik heb rugpijn", timestamp=now)
+    db.add(live)
+    db.flush()
+    search.index_turns(db, [{"turn_id": live.turn_id, "text": live.text}])
+    # Stored later, but recorded a day earlier
+    db.add(ConversationTurn(call_id="batch", role="user", text="Ook rugpijn", timestamp=now - timedelta(days=1)))
+    db.commit()
+    db.close()
+
+    assert [result["call_id"] for result in search.search("rugpijn")] == ["live"]
+    assert search.catch_up() == 1
+    assert {result["call_id"] for result in search.search("rugpijn")} == {"live", "batch"}
+    assert [result["call_id"] for result in search.search("rugpijn", until=now - timedelta(hours=1))] == ["batch"]
+    assert [result["call_id"] for result in search.search("rugpijn", since=now - timedelta(hours=1))] == ["live"]
+
+def test_like_fallback_matches_wildcards_literally(session_factory):
+    """Test % and _ in a query match only themselves without FTS5"""
+    db = session_factory()
+    db.add(CallRecord(call_id="pct", user_id="user_1", voice_profile="lifestyle", status="completed"))
+    db.add(ConversationTurn(call_id="pct", role="user", text="Korting van 50% op vitamines", timestamp=datetime.utcnow()))
+    db.add(ConversationTurn(call_id="pct", role="user", text="Korting van 50 euro", timestamp=datetime.utcnow()))
+    db.add(ConversationTurn(call_id="pct", role="user", text="Mijn code is ab_c", timestamp=datetime.utcnow()))
+    db.add(ConversationTurn(call_id="pct", role="user", text="Mijn code is abxc", timestamp=datetime.utcnow()))
+    db.commit()
+    db.close()
+
+    search = TranscriptSearch(session_factory)
+    search.available = False
+    assert [result["text"] for result in search.search("50%")] == ["Korting van 50% op vitamines"]
+    assert [result["text"] for result in search.search("ab_c")] == ["Mijn code is ab_c"]
@@ -0,0 +1,86 @@
+"""Test TTS audio cache"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import pytest
+from tts_cache import TTSCache, cache_key
+from conversation_flows import ConversationFlowManager, VoiceProfile
+
+def test_cache_key_covers_voice_parameters():
+    """Test key changes with any synthesis parameter"""
+    base = cache_key("Hallo!", "nl-NL", "nl-NL-Neural2-F", 0.0, 0.9)
+    assert base == cache_key("Hallo!", "nl-NL", "nl-NL-Neural2-F", 0.0, 0.9)
+    assert base != cache_key("Hallo!", "nl-NL", "nl-NL-Neural2-M", 0.0, 0.9)
+    assert base != cache_key("Hallo!", "nl-NL", "nl-NL-Neural2-F", 1.0, 0.9)
+    assert base != cache_key("Hallo!", "nl-NL", "nl-NL-Neural2-F", 0.0, 1.0)
+    assert base != cache_key("Hallo", "nl-NL", "nl-NL-Neural2-F", 0.0, 0.9)
+
+@pytest.mark.asyncio
+async def test_memory_hit_and_miss():
+    """Test basic lookups and stats"""
+    cache = TTSCache(max_bytes=1024)
+    assert await cache.get("a") is None
+    await cache.put("a", b"audio")
+    assert await cache.get("a") == b"audio"
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes"] == 5
+
+@pytest.mark.asyncio
+async def test_lru_byte_eviction():
+    """Test least recently used entries are evicted by size"""
+    cache = TTSCache(max_bytes=10)
+    await cache.put("a", b"1234")
+    await cache.put("b", b"1234")
+    await cache.get("a")
+    await cache.put("c", b"1234")
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1234"
+    assert await cache.get("c") == b"1234"
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.current_bytes <= 10
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    """Test entries are reloaded from disk by a new cache"""
+    first = TTSCache(max_bytes=1024, directory=str(tmp_path))
+    await first.put("greeting", b"mp3-bytes")
+
+    second = TTSCache(max_bytes=1024, directory=str(tmp_path))
+    assert "greeting" in second
+    assert await second.get("greeting") == b"mp3-bytes"
+    assert second.get_stats()["disk_hits"] == 1
+    assert await second.get("greeting") == b"mp3-bytes"
+    assert second.get_stats()["memory_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_bounded(tmp_path):
+    """Test the least recently used files are deleted beyond the disk limit"""
+    cache = TTSCache(max_bytes=4, directory=str(tmp_path), max_disk_bytes=10)
+    for key in ("a", "b"):
+        await cache.put(key, b"1234")
+    assert await cache.get("a") == b"1234"  # from disk, memory holds only one
+    await cache.put("c", b"1234")
+    await asyncio.sleep(0.05)  # files are removed in the background
+    assert sorted(os.listdir(tmp_path)) == ["a.audio", "c.audio"]
+    assert "b" not in cache
+    stats = cache.get_stats()
+    assert (stats["disk_entries"], stats["disk_bytes"], stats["disk_evictions"]) == (2, 8, 1)
+
+    # Recency survives a restart through the files' modification times
+    os.utime(tmp_path / "c.audio", (0, 0))
+    restarted = TTSCache(max_bytes=4, directory=str(tmp_path), max_disk_bytes=10)
+    await restarted.put("d", b"1234")
+    await asyncio.sleep(0.05)
+    assert sorted(os.listdir(tmp_path)) == ["a.audio", "d.audio"]
+
+@pytest.mark.asyncio
+async def test_templated_business_responses_not_cacheable():
+    """Test responses echoing caller input are flagged as uncacheable"""
+    manager = ConversationFlowManager(profile=VoiceProfile.BUSINESS)
+    await manager.respond("Help nodig")
+    assert manager.last_response_cacheable
+    await manager.respond("Mijn naam is Jan")
+    assert not manager.last_response_cacheable
@@ -0,0 +1,79 @@
+"""Test sentence-chunked streaming TTS"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from voice_manager import VoiceManager, split_sentences
+
+class DelayedVoiceManager(VoiceManager):
+    """Synthesizes each sentence after a per-sentence delay"""
+
+    def __init__(self, delays):
+        super().__init__()
+        self.delays = delays
+        self.cancelled = 0
+
+    async def synthesize_speech(self, text, voice_profile="lifestyle", cacheable=True, audio_format=None):
+        delay = self.delays.get(text, 0.05)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return text.encode()
+
+def test_split_sentences():
+    """Test replies split at sentence punctuation"""
+    text = "Dank u voor deze informatie. Ik begrijp dat het gaat om: x. Wat zou u willen dat wij doen?"
+    assert split_sentences(text) == [
+        "Dank u voor deze informatie.",
+        "Ik begrijp dat het gaat om: x.",
+        "Wat zou u willen dat wij doen?",
+    ]
+    assert split_sentences("Hallo!") == ["Hallo!"]
+
+@pytest.mark.asyncio
+async def test_stream_yields_in_order_concurrently():
+    """Test segments arrive in order while being synthesized in parallel"""
+    manager = DelayedVoiceManager({"Dank u.": 0.1})
+    started = time.perf_counter()
+    chunks = [chunk async for chunk in manager.synthesize_stream("Dank u. Een. Twee. Drie.")]
+    elapsed = time.perf_counter() - started
+    assert chunks == [b"Dank u.", b"Een.", b"Twee.", b"Drie."]
+    assert elapsed < 0.2
+    assert manager.get_stream_stats()["streams_started"] == 1
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_pending_segments():
+    """Test stopping early cancels unfinished synthesis"""
+    manager = DelayedVoiceManager({"Een.": 0.01, "Twee.": 0.5, "Drie.": 0.5})
+    stream = manager.synthesize_stream("Een. Twee. Drie.")
+    assert await stream.__anext__() == b"Een."
+    await stream.aclose()
+    await asyncio.sleep(0)
+    assert manager.cancelled == 2
+
+def next_json(ws) -> dict:
+    """Next JSON message, skipping the binary audio frames before it"""
+    while True:
+        message = ws.receive()
+        if message.get("text") is not None:
+            return json.loads(message["text"])
+
+def test_call_websocket_reports_time_to_first_audio():
+    """Test every spoken turn ends with an audio_end summary"""
+    from main import app
+    client = TestClient(app)
+    with client.websocket_connect("/ws/call/tts-stream-test?voice_profile=lifestyle") as ws:
+        assert next_json(ws)["type"] == "greeting"
+        assert next_json(ws)["type"] == "audio_end"
+        ws.send_json({"text": "Ik ben moe"})
+        assert next_json(ws)["type"] == "response"
+        summary = next_json(ws)
+        assert summary["type"] == "audio_end"
+        assert "time_to_first_audio" in summary
+        ws.send_json({"text": "bye"})
@@ -0,0 +1,89 @@
+"""Test voice activity detection"""
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+from vad import VADEvent, VoiceActivityDetector
+
+RATE = 16000
+
+def tone(seconds: float, amplitude: float = 8000, frequency: float = 220) -> bytes:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype("<i2").tobytes()
+
+def silence(seconds: float) -> bytes:
+    return b"\x00\x00" * int(RATE * seconds)
+
+def noise(seconds: float, amplitude: float = 3000) -> bytes:
+    rng = np.random.default_rng(0)
+    return rng.uniform(-amplitude, amplitude, int(RATE * seconds)).astype("<i2").tobytes()
+
+def make_vad(**kwargs) -> VoiceActivityDetector:
+    params = dict(sample_rate=RATE, frame_ms=20, energy_threshold=500,
+                  zcr_max=0.4, hangover_ms=200, min_speech_ms=60)
+    params.update(kwargs)
+    return VoiceActivityDetector(**params)
+
+def test_detects_utterance_boundaries():
+    """Test start and end offsets of a tone between silences"""
+    vad = make_vad()
+    events = vad.process(silence(0.4) + tone(0.6) + silence(0.4))
+    assert events == [
+        VADEvent("start", int(0.4 * RATE) * 2),
+        VADEvent("end", int(1.0 * RATE) * 2),
+    ]
+    assert not vad.in_speech
+
+def test_hangover_bridges_short_pauses():
+    """Test pauses shorter than the hangover stay in one utterance"""
+    vad = make_vad(hangover_ms=200)
+    events = vad.process(tone(0.3) + silence(0.1) + tone(0.3) + silence(0.3))
+    assert [e.kind for e in events] == ["start", "end"]
+
+def test_ignores_silence_and_noise():
+    """Test quiet audio and high zero-crossing noise are not speech"""
+    vad = make_vad()
+    assert vad.process(silence(1.0)) == []
+    assert vad.process(noise(1.0)) == []
+    assert vad.get_stats()["speech_frames"] == 0
+
+def test_ignores_short_clicks():
+    """Test bursts shorter than min_speech_ms do not start an utterance"""
+    vad = make_vad(min_speech_ms=60)
+    assert vad.process(silence(0.2) + tone(0.02) + silence(0.2)) == []
+
+def test_streaming_matches_batch():
+    """Test odd-sized chunks give the same boundaries as one batch"""
+    audio = silence(0.3) + tone(0.5) + silence(0.5)
+    batch = make_vad().process(audio)
+
+    streaming = make_vad()
+    events = []
+    for i in range(0, len(audio), 333):
+        events.extend(streaming.process(audio[i:i + 333]))
+    assert events == batch
+
+class RecordingRecognizer:
+    def __init__(self):
+        self.fed = bytearray()
+        self.utterances = 0
+
+    def feed(self, data):
+        self.fed += data
+
+    def end_utterance(self):
+        self.utterances += 1
+
+def test_pipeline_feeds_whole_utterance():
+    """Test the speech before VAD confirms a start still reaches STT"""
+    from ws_handler import AudioPipeline
+    recognizer = RecordingRecognizer()
+    pipeline = AudioPipeline(recognizer, make_vad())
+    speech = tone(0.2)
+    audio = silence(0.4) + speech + silence(0.4)
+    for offset in range(0, len(audio), 640):  # 20 ms frames
+        pipeline.push(audio[offset:offset + 640])
+    assert recognizer.utterances == 1
+    # All of the speech, then only the hangover's silence
+    assert recognizer.fed[:len(speech)] == speech
+    assert not any(recognizer.fed[len(speech):])